@@ -1,21 +1,43 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
+from .utils.pool_stats import TimedQueuePool, TimedAsyncAdaptedQueuePool, track_connection_hold_time
 
 """
 Understanding the modules and libraries
 - create_engine: create connection between python and the database. Connect and send sql commands to postgreSQL
 - orm: allows you to work with database tables as Python objects
 - declarative_base: classes recognized as tables
-- sessionmaker: create objects to use in database queries 
+- sessionmaker: create objects to use in database queries
+- create_async_engine / async_sessionmaker: the same, but non-blocking ('await'), using the asyncpg driver
 """
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# "sync": routes use a blocking Session (FastAPI runs them in its threadpool)
+# "async": routes use an AsyncSession and run on the event loop (app/routers/aio)
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+# 1 = seats, holds and reservations are LIST-partitioned by event_id, one partition per event (app/utils/partitioning.py)
+# Decided when the tables are created: a database created with 0 keeps plain tables
+PARTITION_BY_EVENT = os.getenv("PARTITION_BY_EVENT", "0") == "1"
+
+# Connection pool settings (the same values are used by the sync and the async engine)
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")), # connections kept open
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")), # extra connections opened under load, closed when returned
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")), # seconds to wait for a free connection before failing
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "0") == "1", # test each connection before use (survives DB restarts)
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")), # reopen connections older than N seconds (-1 = never)
+}
+
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **POOL_OPTIONS)
+track_connection_hold_time(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base() # Make Python classes be tables in the database
 
@@ -32,4 +54,29 @@ def get_db():
     try:
         yield db # provides the session for routes that need it
     finally:
-        db.close() # and then it closes
\ No newline at end of file
+        db.close() # and then it closes
+
+
+# The async engine is only built in async mode, so the sync mode doesn't need the asyncpg driver installed
+async_engine = None
+AsyncSessionLocal = None
+
+
+def make_async_engine():
+    # the asyncpg engine of DATABASE_URL (or ASYNC_DATABASE_URL), with the same pool settings as the sync one
+    url = os.getenv("ASYNC_DATABASE_URL") or make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+    async_engine = create_async_engine(url, poolclass=TimedAsyncAdaptedQueuePool, **POOL_OPTIONS)
+    track_connection_hold_time(async_engine.sync_engine)
+    return async_engine
+
+
+if DB_MODE == "async":
+    async_engine = make_async_engine()
+    # expire_on_commit=False : objects stay readable after commit (async sessions can't lazy-load attributes implicitly)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+# Async version of get_db (used by the routers in app/routers/aio)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,39 +1,68 @@
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2AuthorizationCodeBearer
-from jose import JWSError
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from .database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_db, get_async_db
 from . import models
 from .utils.security import decode_access_token
-from schemas import TokenData
+from .schemas import TokenData
+from .utils.token_cache import token_cache, CurrentUser
 
 """
 Understanding Core Concepts
-- OAuth2AuthorizationCodeBearer: A FastAPI security scheme for OAuth2 authorization code flow; extracts Bearer tokens from HTTP Authorization headers and validates them against a token endpoint (here, "/auth/token")
-- JWSError: An exception from the jose library (JWT handling); raised during token decoding if the JWT is malformed, expired, or signature-invalid, caught here to trigger authentication failure
+- OAuth2PasswordBearer: A FastAPI security scheme for the OAuth2 password flow; extracts Bearer tokens from HTTP Authorization headers, issued by the token endpoint (here, "/auth/token")
 - decode_access_token: A custom utility function (from .utils.security); decodes and verifies a JWT access token, returning its payload (e.g., claims like "sub" for subject/email)
 - TokenData: A Pydantic model (from schemas); used to structure validated token payload data, such as the user's email (sub claim), ensuring type safety and validation
 - payload: The decoded JWT dictionary containing claims; "sub" is the standard claim for the subject (here, the user's email identifier)
-- credentials_exception: A pre-defined HTTPException instance; reused for common auth failures like invalid tokens or missing users, standardizing error responses
+- credentials_exception: Builds the HTTPException reused for common auth failures like invalid tokens or missing users, standardizing error responses
+- token_cache: Remembers which user a verified token belongs to (until the token expires or a short TTL), so repeated calls skip the JWT decode and the user query
+- CurrentUser: The (id, email) identity returned to the routes, instead of a User ORM object tied to one request's session
 """
 
-oauth2_scheme = OAuth2AuthorizationCodeBearer(tokenUrl="/auth/token")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
-                                          detail="Could not validate credentials",
-                                          headers={"WWW-Authenticate": "Bearer"},
-                                          )
-    
+def credentials_exception():
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
+                         detail="Could not validate credentials",
+                         headers={"WWW-Authenticate": "Bearer"},
+                         )
+
+
+# Decodes the JWT and returns the validated token data and its expiry (shared by the sync and async dependencies)
+def get_token_data(token: str):
     try:
         payload = decode_access_token(token)
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
+            raise credentials_exception()
+        return TokenData(email=email), float(payload.get("exp", 0))
     except Exception:
-        raise credentials_exception
-    user = db.query(models.User).filter(models.User.email == token_data.email).filter(models.User.email == token_data.email).first()
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise credentials_exception()
+
+
+def remember_user(token: str, row, expires_at: float) -> CurrentUser:
+    # row: the (id, email) of the user the token belongs to, or None if the user doesn't exist
+    if row is None:
+        raise credentials_exception()
+    user = CurrentUser(id=row.id, email=row.email)
+    token_cache.put(token, user, expires_at)
+    return user
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> CurrentUser:
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+    token_data, expires_at = get_token_data(token)
+    row = db.query(models.User.id, models.User.email).filter(models.User.email == token_data.email).first()
+    return remember_user(token, row, expires_at)
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> CurrentUser:
+    user = token_cache.get(token)
+    if user is not None:
+        return user
+    token_data, expires_at = get_token_data(token)
+    row = (await db.execute(select(models.User.id, models.User.email).where(models.User.email == token_data.email))).first()
+    return remember_user(token, row, expires_at)
@@ -1,19 +1,78 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from . import models
-from .database import SessionLocal, engine
-from .routers import events, seats, reservations, holds
+from .database import SessionLocal, engine, async_engine, DB_MODE
+from .routers import auth, metrics
+from .utils.hold_scheduler import hold_scheduler
+from .utils.seat_index import seat_index
+from .utils.response_cache import response_cache
+from .utils.password_pool import password_pool
+from .utils.seat_events import SeatEventListener
+from .utils.request_metrics import RequestMetricsMiddleware, REQUEST_METRICS
+from .utils.sql_profiler import SQLProfilerMiddleware, SQL_PROFILER, SQL_PROFILER_STRICT
+from .utils.idempotency import IdempotencyMiddleware, IDEMPOTENCY_KEYS
 
 # Ensure models are registered and tables exist
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI() # Create the instance of the application
+HOLD_EXPIRY_SCHEDULER = os.getenv("HOLD_EXPIRY_SCHEDULER", "1") == "1"
+SEAT_EVENTS_LISTENER = os.getenv("SEAT_EVENTS_LISTENER", "1") == "1"
+
+seat_event_listener = SeatEventListener(engine) # relays seat changes committed by other processes (LISTEN/NOTIFY)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once on startup (before 'yield') and once on shutdown (after 'yield')
+    seat_index.invalidate() # the seat availability index is rebuilt lazily from the database
+    response_cache.clear() # same for the cached GET responses (ETags)
+    if HOLD_EXPIRY_SCHEDULER:
+        hold_scheduler.start()
+    if SEAT_EVENTS_LISTENER:
+        seat_event_listener.start()
+    yield
+    hold_scheduler.stop()
+    seat_event_listener.stop()
+    password_pool.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+def create_app(db_mode: str = DB_MODE) -> FastAPI:
+    """
+    Build the application with the routers of a DB_MODE ("sync" or "async")
+    (the module-level 'app' uses the configured one; tests build the other one too)
+    """
+    app = FastAPI(lifespan=lifespan) # Create the instance of the application
+    if IDEMPOTENCY_KEYS:
+        app.add_middleware(IdempotencyMiddleware) # replays hold/reservation POSTs retried with the same Idempotency-Key (innermost: replays still show in the metrics)
+    if REQUEST_METRICS:
+        app.add_middleware(RequestMetricsMiddleware) # per-route latency, requests in flight and SQL time per request (GET /metrics)
+    if SQL_PROFILER:
+        app.add_middleware(SQLProfilerMiddleware, strict=SQL_PROFILER_STRICT) # debug: every statement per request, N+1 warnings
+
+    # DB_MODE=async swaps the core routers for their AsyncSession versions (same endpoints and responses)
+    if db_mode == "async":
+        from .routers.aio import events, seats, reservations, holds, waiting_room
+    else:
+        from .routers import events, seats, reservations, holds, waiting_room
+
+    app.include_router(auth.router)
+    app.include_router(events.router)
+    app.include_router(seats.router)
+    app.include_router(reservations.router_reservation_by_seat)
+    app.include_router(reservations.router_reservations_by_event)
+    app.include_router(holds.router)
+    app.include_router(holds.router_holds_by_event)
+    app.include_router(waiting_room.router)
+    app.include_router(metrics.router)
+    app.add_api_route("/", root, methods=["GET"])
+    return app
 
-app.include_router(events.router)
-app.include_router(seats.router)
-app.include_router(reservations.router_reservation_by_seat)
-app.include_router(reservations.router_reservations_by_event)
-app.include_router(holds.router)
 
-@app.get("/")
 def root():
-    return {"message": "API is working."}
\ No newline at end of file
+    return {"message": "API is working."}
+
+
+app = create_app()
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, ForeignKeyConstraint, DateTime, UniqueConstraint, Index, Enum, text
 from sqlalchemy.orm import relationship
-from .database import Base
+from .database import Base, PARTITION_BY_EVENT
 from datetime import datetime, timezone, timedelta
 
 """
@@ -9,13 +9,46 @@ Understanding the modules and imports
 - Column : Each attribute of the class turns into a column in the database
 - Integer, String : Data types of the columns 
 - ForeignKey : Connect different tables
+- ForeignKeyConstraint : A foreign key over several columns (seat_id, event_id) -> seats (id, event_id), used when the tables are partitioned
 - DateTime : Add a column to store date and/or time
 - UniqueConstraint : Ensures that values in one or more columns are unique inside the table
+- Index : Creates an index over one or more columns, so filters and ORDER BY on them don't scan the whole table
+  (postgresql_where makes it a partial index: only the rows matching the condition are indexed)
+- Enum : A column that only accepts a fixed set of values; on PostgreSQL it is a native ENUM type (4 bytes per row instead of the text)
+- text : A raw SQL fragment (used for the partial index condition)
 - relationship : Make easier the queries between tables, define relations
 - timezone : Use UTC time to avoid timezone headaches across servers
 - timedelta : Represent differences between two dates or times (hold duration)
 """
 
+# Every status a seat can have ("available" -> "on_hold" -> "reserved")
+SEAT_STATUSES = ("available", "on_hold", "reserved")
+SeatStatus = Enum(*SEAT_STATUSES, name="seat_status")
+
+
+def per_event_table(*table_args, references_seat: bool = False) -> tuple:
+    """
+    __table_args__ of the tables with per-event rows (seats, holds, reservations)
+    - PARTITION_BY_EVENT=1 makes them LIST-partitioned by event_id, one partition per event (app/utils/partitioning.py)
+    - PostgreSQL only enforces keys that contain the partition key: the primary keys become (id, event_id) (see the
+      event_id columns), "one hold/reservation per seat" becomes unique (event_id, seat_id), and references to a seat
+      go through (seat_id, event_id); seat IDs still come from one sequence, so they stay unique across events
+    """
+    if not PARTITION_BY_EVENT:
+        return table_args
+    if references_seat:
+        table_args += (UniqueConstraint("event_id", "seat_id"),
+                       ForeignKeyConstraint(["seat_id", "event_id"], ["seats.id", "seats.event_id"]))
+    return (*table_args, {"postgresql_partition_by": "LIST (event_id)"})
+
+
+def seat_id_column(**kwargs) -> Column:
+    # holds/reservations -> seats.id, unique: a seat has at most one hold and one reservation
+    if PARTITION_BY_EVENT:
+        return Column(Integer, **kwargs) # key and reference come from per_event_table
+    return Column(Integer, ForeignKey("seats.id"), unique=True, **kwargs)
+
+
 class Event(Base):
     __tablename__ = "events"
 
@@ -31,10 +64,10 @@ class Event(Base):
 class Seat(Base):
     __tablename__ = "seats"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True) # still a SERIAL when the key is (id, event_id)
     number = Column(Integer, nullable=False)
-    status = Column(String, nullable=False, default="available")
-    event_id = Column(Integer, ForeignKey("events.id")) # 'event_id' is a foreign key that references the 'id' column in the 'events' table.
+    status = Column(SeatStatus, nullable=False, default="available")
+    event_id = Column(Integer, ForeignKey("events.id"), primary_key=PARTITION_BY_EVENT) # 'event_id' is a foreign key that references the 'id' column in the 'events' table.
 
     # Inverse relation to access Event
     event = relationship("Event", back_populates="seats")
@@ -43,29 +76,49 @@ class Seat(Base):
 
     hold = relationship("Hold", back_populates="seat", uselist=False) # a new relationship, to "Hold"
 
+    __table_args__ = per_event_table(
+        Index("ix_seats_event_id_number", "event_id", "number", unique=True), # seat listing pages (ORDER BY number)
+        Index("ix_seats_event_id_status_number", "event_id", "status", "number"), # seat listing filtered by ?status=
+        Index("ix_seats_event_id_number_available", "event_id", "number", postgresql_where=text("status = 'available'")), # free seats only (best-available, ?status=available)
+    )
+
 
 class Hold(Base):
     __tablename__ = "holds"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, nullable=False, index=True)
-    seat_id = Column(Integer, ForeignKey("seats.id"), unique=True, nullable=False) # unique : just a single hold for a seat
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(String, nullable=False) # searched through ix_holds_event_id_user_id
+    seat_id = seat_id_column(nullable=False) # unique : just a single hold for a seat
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, primary_key=PARTITION_BY_EVENT) # copy of seat.event_id, so per-event queries don't join seats
     held_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True) # range-scanned by expire_holds (expires_at <= now)
 
     seat = relationship("Seat", back_populates="hold", uselist=False)
 
+    __table_args__ = per_event_table(
+        Index("ix_holds_event_id_user_id", "event_id", "user_id"), # a user's holds in an event (per-user limit)
+        Index("ix_holds_event_id_expires_at", "event_id", "expires_at"), # expire_holds for one event
+        references_seat=True,
+    )
+
 
 class Reservation(Base):
     __tablename__ = "reservations"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String, nullable=False) 
-    seat_id = Column(Integer, ForeignKey("seats.id"), unique=True) # Create an unique index to this column
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(String, nullable=False)
+    seat_id = seat_id_column() # Create an unique index to this column
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False, primary_key=PARTITION_BY_EVENT) # copy of seat.event_id, so per-event queries don't join seats
     reserved_at = Column(DateTime(timezone=True), nullable=False, default=lambda:datetime.now(timezone.utc)) # Uses UTC timezone to ensure consistency across different servers and timezones
 
     seat = relationship("Seat", back_populates="reservation", uselist=False) # sets the current time in UTC when a new reservation is created
 
+    __table_args__ = per_event_table(
+        Index("ix_reservations_event_id_reserved_at_id", "event_id", "reserved_at", "id"), # reservation listing pages (ORDER BY reserved_at, id)
+        Index("ix_reservations_event_id_user_id", "event_id", "user_id"), # one reservation per user per event
+        references_seat=True,
+    )
+
 
 class User(Base):
     __tablename__ = "users"
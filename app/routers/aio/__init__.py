@@ -0,0 +1,7 @@
+"""
+Async versions of the events, seats, holds, reservations and waiting room routers.
+
+They expose the same endpoints and responses as the routers in app/routers, but use an
+AsyncSession (asyncpg driver), so requests wait on the database without holding a threadpool thread.
+app/main.py includes them instead of the sync routers when DB_MODE=async.
+"""
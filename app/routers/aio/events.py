@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ... import models
+from ...schemas import EventRead, EventCreate
+from ...database import get_async_db
+from ...utils.seat_generation import generate_seats
+from ...utils.pagination import decode_cursor, paginate, cursor_headers
+from ...utils.response_cache import response_cache, CATALOG
+from ...utils.fast_json import schema_columns, rows_body, row_body
+
+"""
+Understanding Core Concepts
+- async def / await : the route gives the event loop back while it waits for the database
+- select(...) : 2.0-style query; AsyncSession only runs statements through 'await db.execute(...)'
+- run_sync : runs a sync helper (generate_seats) with the same connection, without blocking the event loop
+"""
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+@router.get("/", response_model=List[EventRead])
+async def read_events(response: Response, db: AsyncSession = Depends(get_async_db),
+                      cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000),
+                      if_none_match: Optional[str] = Header(None)):
+    """
+    Read-only endpoint: fetch events from DB, one page at a time (cursor in 'X-Next-Cursor', 304 via If-None-Match)
+    """
+    variant = f"events|{cursor}|{limit}"
+    cached, seen_version = response_cache.cached_response(CATALOG, variant, if_none_match)
+    if cached is not None:
+        return cached
+
+    stmt = select(*schema_columns(models.Event, EventRead))
+    if cursor:
+        (after_id,) = decode_cursor(cursor, int)
+        stmt = stmt.where(models.Event.id > after_id)
+    result = await db.execute(stmt.order_by(models.Event.id).limit(limit + 1))
+    events = paginate(result.all(), limit, response, key=lambda e: (e.id,))
+    return response_cache.respond(CATALOG, variant, seen_version, rows_body(EventRead, events),
+                                  headers=cursor_headers(response), if_none_match=if_none_match)
+
+
+@router.get("/{event_id}", response_model=EventRead)
+async def read_event(event_id: int, db: AsyncSession = Depends(get_async_db), if_none_match: Optional[str] = Header(None)):
+    """
+    Read a single event by its ID (304 via If-None-Match)
+    """
+    cached, seen_version = response_cache.cached_response(event_id, "event", if_none_match)
+    if cached is not None:
+        return cached
+
+    event = (await db.execute(select(*schema_columns(models.Event, EventRead)).where(models.Event.id == event_id))).first()
+
+    if not event:
+        response_cache.discard(event_id, seen_version)
+        raise HTTPException(status_code=404, detail="Event not found")
+    return response_cache.respond(event_id, "event", seen_version, row_body(EventRead, event), if_none_match=if_none_match)
+
+
+@router.post("/", response_model=EventRead, status_code=status.HTTP_201_CREATED)
+async def create_event(event_in: EventCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create an event and generate the seats
+    """
+    # Defensive check
+    if not (10 <= event_in.total_seats <= 1000):
+        raise HTTPException(status_code=400, detail="total_seats must be between 10 and 1000")
+    
+    # Create and persist the Event and Seat inside a single transaction
+    try:
+        db_event = models.Event(name=event_in.name, total_seats=event_in.total_seats)
+        db.add(db_event)
+        await db.flush()
+
+        await db.run_sync(lambda session: generate_seats(session, db_event.id, db_event.total_seats))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Could not create event") from e
+    response_cache.bump(CATALOG) # the event list changed: new ETags for its pages
+    return db_event
@@ -0,0 +1,163 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Header
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone, timedelta
+from ... import models
+from ...database import get_async_db
+from ...deps import get_current_user_async
+from ...utils.token_cache import CurrentUser
+from ...utils.waiting_room import waiting_room
+from ...utils.hold_scheduler import hold_scheduler
+from ...utils.seat_events import record_seat_change_async
+from ...utils.fast_json import iso_datetime
+from ...schemas import HoldBatchCreate, HoldBestAvailableCreate
+from ..holds import MAX_HOLD_SECONDS, check_hold_seconds, check_holds_quantity, reject_indexed_taken_seats, hold_seats, hold_best_available
+from ..holds import holds_refreshed, holds_cancelled
+
+router = APIRouter(prefix="/events/{event_id}/seats/{seat_id}/hold", tags=["holds"])
+router_holds_by_event = APIRouter(prefix="/events/{event_id}/holds", tags=["holds"])
+
+
+# Lock the seat row (SELECT ... FOR UPDATE) to prevent race conditions during update
+async def lock_seat(db: AsyncSession, event_id: int, seat_id: int):
+    result = await db.execute(select(models.Seat)
+                              .where(models.Seat.id == seat_id, models.Seat.event_id == event_id)
+                              .with_for_update())
+    return result.scalars().first()
+
+
+async def get_seat_hold(db: AsyncSession, seat_id: int):
+    result = await db.execute(select(models.Hold).where(models.Hold.seat_id == seat_id))
+    return result.scalars().first()
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def create_hold(event_id: int, seat_id: int, db: AsyncSession = Depends(get_async_db), body: dict = Body(...), current_user: CurrentUser = Depends(get_current_user_async), x_queue_ticket: Optional[str] = Header(None)):
+    user_id = str(current_user.id) # 'holds.user_id' is a string column
+    waiting_room.admit(event_id, user_id, x_queue_ticket) # 429 until the queue ticket is admitted (when the waiting room is on)
+
+    seconds = int(body.get("seconds", MAX_HOLD_SECONDS))
+    check_hold_seconds(seconds)
+
+    # The locking logic is shared with the sync router; run_sync runs it on this session's connection without blocking the event loop
+    await db.run_sync(reject_indexed_taken_seats, event_id, [seat_id])
+    (hold,) = await db.run_sync(hold_seats, event_id, [seat_id], user_id, seconds)
+    
+    return {
+        "seat": hold.seat_id, 
+        "user_id": hold.user_id, 
+        "expires_at": iso_datetime(hold.expires_at)
+        }
+
+
+@router_holds_by_event.post("/", status_code=status.HTTP_201_CREATED)
+async def create_holds(event_id: int, hold_in: HoldBatchCreate, db: AsyncSession = Depends(get_async_db), current_user: CurrentUser = Depends(get_current_user_async), x_queue_ticket: Optional[str] = Header(None)):
+    """
+    Hold several seats of an event at once (all or nothing)
+    """
+    user_id = str(current_user.id)
+    waiting_room.admit(event_id, user_id, x_queue_ticket)
+    seconds = hold_in.seconds if hold_in.seconds is not None else MAX_HOLD_SECONDS
+    check_hold_seconds(seconds)
+    check_holds_quantity(len(set(hold_in.seat_ids)))
+
+    await db.run_sync(reject_indexed_taken_seats, event_id, hold_in.seat_ids)
+    holds = await db.run_sync(hold_seats, event_id, hold_in.seat_ids, user_id, seconds)
+
+    return {
+        "seats": [hold.seat_id for hold in holds],
+        "user_id": user_id,
+        "expires_at": iso_datetime(holds[0].expires_at)
+        }
+
+
+@router_holds_by_event.post("/best-available", status_code=status.HTTP_201_CREATED)
+async def create_best_available_holds(event_id: int, hold_in: HoldBestAvailableCreate, db: AsyncSession = Depends(get_async_db), current_user: CurrentUser = Depends(get_current_user_async), x_queue_ticket: Optional[str] = Header(None)):
+    """
+    Hold N adjacent seats picked by the server (lowest seat numbers first)
+    """
+    user_id = str(current_user.id)
+    waiting_room.admit(event_id, user_id, x_queue_ticket)
+    seconds = hold_in.seconds if hold_in.seconds is not None else MAX_HOLD_SECONDS
+    check_hold_seconds(seconds)
+    check_holds_quantity(hold_in.quantity)
+
+    holds = await db.run_sync(hold_best_available, event_id, hold_in.quantity, user_id, seconds)
+
+    return {
+        "seats": [hold.seat_id for hold in holds],
+        "user_id": user_id,
+        "expires_at": iso_datetime(holds[0].expires_at)
+        }
+
+
+@router.put("/", status_code=status.HTTP_200_OK)
+async def refresh_hold(event_id: int, seat_id: int, body: dict, db: AsyncSession = Depends(get_async_db)):
+    user_id = body.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=400, detail="user_id is required")
+    
+    seconds = int(body.get("seconds", MAX_HOLD_SECONDS))
+    check_hold_seconds(seconds)
+
+    try:
+        seat = await lock_seat(db, event_id, seat_id)
+        if not seat:
+            raise HTTPException(status_code=404, detail="Seat not found")
+
+        now = datetime.now(timezone.utc)
+
+        hold = await get_seat_hold(db, seat.id)
+        if not hold or hold.expires_at <= now:
+            raise HTTPException(status_code=403, detail="No active hold for this user on this seat")
+        
+        hold.expires_at = now + timedelta(seconds=seconds)
+        await db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Could not refresh hold") from e
+
+    holds_refreshed.inc()
+    hold_scheduler.schedule(hold.id, hold.expires_at, event_id)
+    
+    return {
+        "seat_id": seat.id,
+        "expires_at": iso_datetime(hold.expires_at)
+        }
+
+
+@router.delete("/", status_code=status.HTTP_200_OK)
+async def cancel_hold(event_id: int, seat_id: int, body: dict, db: AsyncSession = Depends(get_async_db)):
+    user_id = body.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=400, detail="user_id is required")
+    
+    try:
+        seat = await lock_seat(db, event_id, seat_id)
+        if not seat:
+            raise HTTPException(status_code=404, detail="Seat not found")
+        
+        hold = await get_seat_hold(db, seat.id)
+        if not hold:
+            raise HTTPException(status_code=404, detail="Hold not found")
+        if hold.user_id != user_id:
+            raise HTTPException(status_code=403, detail="You are not the owner of this hold")
+        
+        await db.delete(hold)
+        seat.status = "available"
+        await record_seat_change_async(db, event_id, [seat.id], "available")
+        await db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Could not cancel hold") from e
+
+    holds_cancelled.inc()
+    return {
+        "detail": "Hold cancelled", 
+        "seat_id": seat.id
+        }
@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+from typing import List, Optional
+from ... import models
+from ...schemas import ReservationRead, ReservationCancel
+from ...database import get_async_db
+from ...deps import get_current_user_async
+from ...utils.token_cache import CurrentUser
+from ...utils.seat_index import seat_index
+from ...utils.seat_events import record_seat_change_async
+from ...utils.pagination import decode_cursor, paginate, cursor_headers
+from ...utils.fast_json import schema_columns, rows_body, JSON_MEDIA_TYPE
+from .holds import lock_seat, get_seat_hold
+from ..reservations import reservations_made, reservations_cancelled
+
+router_reservation_by_seat = APIRouter(prefix="/events/{event_id}/seats/{seat_id}/reservation", tags=["reservations"])
+router_reservations_by_event = APIRouter(prefix="/events/{event_id}/reservations", tags=["reservations"])
+
+@router_reservation_by_seat.post("/", response_model=ReservationRead, status_code=status.HTTP_201_CREATED)
+async def reserve_seat(event_id: int, seat_id: int, db: AsyncSession = Depends(get_async_db), current_user: CurrentUser = Depends(get_current_user_async)):
+    """
+    Reserve a specific seat for a user (the user must hold the seat)
+    """
+    user_id = str(current_user.id) # 'user_id' columns are strings
+
+    # Fast rejection from the seat availability index (no row lock)
+    if await db.run_sync(seat_index.status, event_id, seat_id) == "reserved":
+        raise HTTPException(status_code=409, detail="Seat is not available (status: reserved)")
+
+    try:
+        seat = await lock_seat(db, event_id, seat_id)
+
+        if not seat:
+            raise HTTPException(status_code=404, detail="Seat not found for this event")
+        
+        if seat.status == "reserved":
+            raise HTTPException(status_code=409, detail=f"Seat is not available (status: {seat.status})")
+        
+        existing_user_reservation = (await db.execute(select(models.Reservation.id)
+                                                      .where(models.Reservation.event_id == event_id, models.Reservation.user_id == user_id))).first()
+        
+        hold = await get_seat_hold(db, seat.id)
+        if not hold or hold.user_id != user_id or hold.expires_at <= datetime.now(timezone.utc):
+            raise HTTPException(status_code=403, detail="You must hold the seat before reserving")
+        
+        if existing_user_reservation:
+            raise HTTPException(status_code=409, detail="User already has a reservation for this event")
+        
+        db_res = models.Reservation(user_id=user_id, seat_id=seat.id, event_id=event_id)
+        db.add(db_res)
+        await db.delete(hold)
+        seat.status = "reserved"
+        await record_seat_change_async(db, event_id, [seat.id], "reserved")
+        await db.commit()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Could not reserve seat") from e
+
+    reservations_made.inc()
+    return db_res
+
+
+@router_reservation_by_seat.delete("/", status_code=status.HTTP_200_OK)
+async def cancel_reservation(event_id: int, seat_id: int, cancel_in: ReservationCancel, db: AsyncSession = Depends(get_async_db)):
+    """
+    Cancel reservation for a specific seat
+    - Expects body: { "user_id": "<uuid>" } to verify ownership
+    """
+    try:
+        seat = await lock_seat(db, event_id, seat_id)
+
+        if not seat:
+            raise HTTPException(status_code=404, detail="Seat not found for this event")
+        
+        result = await db.execute(select(models.Reservation).where(models.Reservation.seat_id == seat.id))
+        reservation = result.scalars().first()
+
+        if not reservation:
+            raise HTTPException(status_code=404, detail="Reservation not found for this seat")
+        
+        if reservation.user_id != cancel_in.user_id:
+            raise HTTPException(status_code=403, detail="You are not the owner of this reservation")
+        
+        # delete + free the seat in the same transation
+        await db.delete(reservation)
+        seat.status = "available"
+        await record_seat_change_async(db, event_id, [seat.id], "available")
+        await db.commit()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Could not cancel reservation") from e
+
+    reservations_cancelled.inc()
+    return {"detail": "Reservation cancelled", "seat_id": seat.id}
+
+
+@router_reservations_by_event.get("/", response_model=List[ReservationRead])
+async def list_reservations(event_id: int, response: Response, db: AsyncSession = Depends(get_async_db),
+                            cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
+    """
+    List the reservations for a given event, one page at a time, ordered by the date/time they were made
+    """
+    event = await db.get(models.Event, event_id)
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    stmt = select(*schema_columns(models.Reservation, ReservationRead)).where(models.Reservation.event_id == event_id)
+    if cursor:
+        after = decode_cursor(cursor, datetime.fromisoformat, int)
+        stmt = stmt.where(tuple_(models.Reservation.reserved_at, models.Reservation.id) > tuple_(*after))
+    result = await db.execute(stmt.order_by(models.Reservation.reserved_at, models.Reservation.id).limit(limit + 1))
+    reservations = paginate(result.all(), limit, response, key=lambda r: (r.reserved_at, r.id))
+    return Response(rows_body(ReservationRead, reservations), media_type=JSON_MEDIA_TYPE, headers=cursor_headers(response))
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from ... import models
+from ...schemas import SeatRead
+from ...database import get_async_db
+from ...utils.seat_map import build_seat_map, requested_encoding, SEAT_MAP_MEDIA_TYPE
+from ...utils.pagination import decode_cursor, paginate, cursor_headers
+from ...utils.response_cache import response_cache
+from ...utils.fast_json import schema_columns, rows_body, dumps
+from ...utils.seat_events import stream_seat_events
+
+router = APIRouter(prefix="/events/{event_id}/seats", tags=["seats"])
+
+@router.get("/", response_model=List[SeatRead])
+async def read_event_seats(event_id: int, response: Response, db: AsyncSession = Depends(get_async_db),
+                           format: Optional[str] = Query(None, pattern="^(json|packed|rle)$"),
+                           accept: Optional[str] = Header(None),
+                           seat_status: Optional[str] = Query(None, alias="status", pattern="^(available|on_hold|reserved)$"),
+                           cursor: Optional[str] = None, limit: int = Query(1000, ge=1, le=1000),
+                           if_none_match: Optional[str] = Header(None)):
+    """
+    Return the seats for a given event, one page at a time ('format=packed|rle' returns the compact seat map)
+    - 304 (or the cached bytes) without a query while the event's seats don't change
+    """
+    encoding = requested_encoding(format, accept)
+    variant = f"seats|{encoding or 'json'}|{seat_status}|{cursor}|{limit}"
+    cached, seen_version = response_cache.cached_response(event_id, variant, if_none_match)
+    if cached is not None:
+        return cached
+
+    event = await db.get(models.Event, event_id) # To ensure that event exists (gives 404 if not)
+    if not event:
+        response_cache.discard(event_id, seen_version)
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    if encoding:
+        rows = (await db.execute(select(models.Seat.id, models.Seat.status)
+                                 .where(models.Seat.event_id == event_id)
+                                 .order_by(models.Seat.number))).all()
+        return response_cache.respond(event_id, variant, seen_version, dumps(build_seat_map(event_id, rows, encoding)),
+                                      media_type=SEAT_MAP_MEDIA_TYPE, headers={"Vary": "Accept"}, if_none_match=if_none_match)
+    
+    stmt = select(*schema_columns(models.Seat, SeatRead)).where(models.Seat.event_id == event_id)
+    if seat_status:
+        stmt = stmt.where(models.Seat.status == seat_status)
+    if cursor:
+        (after_number,) = decode_cursor(cursor, int)
+        stmt = stmt.where(models.Seat.number > after_number)
+    result = await db.execute(stmt.order_by(models.Seat.number).limit(limit + 1))
+    seats = paginate(result.all(), limit, response, key=lambda s: (s.number,))
+    return response_cache.respond(event_id, variant, seen_version, rows_body(SeatRead, seats),
+                                  headers={"Vary": "Accept", **cursor_headers(response)}, if_none_match=if_none_match)
+
+
+@router.get("/stream")
+async def stream_event_seats(event_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Live seat status changes of an event, as Server-Sent Events
+    """
+    if not await db.get(models.Event, event_id):
+        raise HTTPException(status_code=404, detail="Event not found")
+    return StreamingResponse(stream_seat_events(event_id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/{seat_id}", response_model=SeatRead)
+async def read_event_seat(event_id: int, seat_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Return a single seat for a given event
+    """
+    result = await db.execute(select(models.Seat).where(models.Seat.id == seat_id, models.Seat.event_id == event_id))
+    seat = result.scalars().first()
+
+    if not seat:
+        raise HTTPException(status_code=404, detail="Seat not found for this event")
+    return seat
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from ... import models
+from ...database import get_async_db
+from ...deps import get_current_user_async
+from ...utils.token_cache import CurrentUser
+from ...utils.waiting_room import waiting_room
+from ..waiting_room import ticket_status
+
+router = APIRouter(prefix="/events/{event_id}/queue", tags=["waiting room"])
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def take_ticket(event_id: int, db: AsyncSession = Depends(get_async_db), current_user: CurrentUser = Depends(get_current_user_async)):
+    if not await db.get(models.Event, event_id):
+        raise HTTPException(status_code=404, detail="Event not found")
+    return waiting_room.issue(event_id, str(current_user.id))
+
+
+# the status endpoint doesn't touch the database, the sync handler is reused as is
+router.get("/")(ticket_status)
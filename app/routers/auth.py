@@ -5,7 +5,8 @@ from datetime import timedelta
 from .. import models
 from ..schemas import UserCreate, UserRead, Token, TokenData
 from ..database import get_db
-from ..utils.security import verify_password, get_password_hash, create_access_token, decode_access_token
+from ..utils.security import create_access_token, decode_access_token
+from ..utils.password_pool import password_pool
 import os
 
 """
@@ -19,6 +20,7 @@ Understanding Core Concepts
 - TokenData : a Pydantic schema used to structure the payload (data stored) inside the JWT
 - create_access_token : a function used to generate the new, signed access token
 - decode_access_token : a function used to verify the signature of the token and extract the data
+- password_pool : runs the bcrypt hashing/verification in separate worker processes (503 when too many are waiting)
 """
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -38,7 +40,7 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed = get_password_hash(user_in.password)
+    hashed = password_pool.hash(user_in.password)
     
     user = models.User(email=user_in.email, hashed_password=hashed)
     db.add(user)
@@ -60,7 +62,7 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     user = db.query(models.User).filter(models.User.email == form_data.username).first()
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
-    if not verify_password(form_data.password, user.hashed_password):
+    if not password_pool.verify(form_data.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
    
     access_token_expires = timedelta (minutes=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "60")))
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from .. import models
 from ..schemas import EventRead, EventCreate
 from ..database import get_db
+from ..utils.seat_generation import generate_seats
+from ..utils.pagination import decode_cursor, paginate, cursor_headers
+from ..utils.response_cache import response_cache, CATALOG
+from ..utils.fast_json import schema_columns, rows_body, row_body
 
 """
 Understanding Core Concepts
@@ -13,35 +17,57 @@ Understanding Core Concepts
 - raise : used to interrupt the flow and throw an error intentionally. Return HTTP errors with custom status codes and messages
 - rollback : cancels all changes made during the current database transaction. It helps to avoid saving incomplete or invalid data
 - refresh : updates the Python object with the latest data from the database
+- flush : sends pending changes to the database inside the current transaction (without committing), e.g. to get a generated ID
+- ETag / If-None-Match : the GET routes answer from the response cache (app/utils/response_cache.py) when nothing changed
 """
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 @router.get("/", response_model=List[EventRead]) # return the data as a list
-def read_events(db: Session = Depends(get_db)): # it means that the 'read_events' route depends on 'get_db' to work
+def read_events(response: Response, db: Session = Depends(get_db), # it means that the 'read_events' route depends on 'get_db' to work
+                cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000),
+                if_none_match: Optional[str] = Header(None)):
     """
-    Read-only endpoint: fetch all events from DB
+    Read-only endpoint: fetch events from DB, one page at a time (ordered by ID)
     - db: a variable with SQLAlchemy Session injected by FastAPI (get_db)
     - Session: just a type annotation telling that db is expected to be a SQLAlchemy session
     - Depends: inject dependencies
-    - response_model: tells FastAPI/Pydantic to serialize the output using EventRead 
+    - response_model: documents the output (EventRead); the rows are plain column tuples encoded with rows_body (app/utils/fast_json.py)
+    - cursor / limit: keyset pagination; the next page's cursor comes in the 'X-Next-Cursor' response header
+    - if_none_match: the ETag of a page the client already has; 304 (no body, no query) if the event list didn't change
     """
-    events = db.query(models.Event).all() # Works like "SELECT * FROM events"
-    return events
+    variant = f"events|{cursor}|{limit}"
+    cached, seen_version = response_cache.cached_response(CATALOG, variant, if_none_match)
+    if cached is not None:
+        return cached
+
+    query = db.query(*schema_columns(models.Event, EventRead)) # Works like "SELECT name, total_seats, id FROM events"
+    if cursor:
+        (after_id,) = decode_cursor(cursor, int)
+        query = query.filter(models.Event.id > after_id)
+    events = paginate(query.order_by(models.Event.id).limit(limit + 1).all(), limit, response, key=lambda e: (e.id,))
+    return response_cache.respond(CATALOG, variant, seen_version, rows_body(EventRead, events),
+                                  headers=cursor_headers(response), if_none_match=if_none_match)
 
 
 @router.get("/{event_id}", response_model=EventRead)
-def read_event(event_id: int, db: Session = Depends(get_db)):
+def read_event(event_id: int, db: Session = Depends(get_db), if_none_match: Optional[str] = Header(None)):
     """
     Read a single event by its ID
     - event_id: path parameter (FastAPI converts it to 'int')
     - db: SQLAlchemy Session injected via 'Depends(get_db)'
+    - if_none_match: 304 straight from the event's version when the client's copy is current
     """
-    event = db.query(models.Event).filter(models.Event.id == event_id).first()
+    cached, seen_version = response_cache.cached_response(event_id, "event", if_none_match)
+    if cached is not None:
+        return cached
+
+    event = db.query(*schema_columns(models.Event, EventRead)).filter(models.Event.id == event_id).first()
 
     if not event:
+        response_cache.discard(event_id, seen_version)
         raise HTTPException(status_code=404, detail="Event not found")
-    return event
+    return response_cache.respond(event_id, "event", seen_version, row_body(EventRead, event), if_none_match=if_none_match)
 
 
 @router.post("/", response_model=EventRead, status_code=status.HTTP_201_CREATED)
@@ -55,22 +81,18 @@ def create_event(event_in: EventCreate, db: Session = Depends(get_db)):
     if not (10 <= event_in.total_seats <= 1000):
         raise HTTPException(status_code=400, detail="total_seats must be between 10 and 1000")
     
-    # Create and persist the Event and Seat inside a transaction
+    # Create and persist the Event and Seat inside a single transaction
     try:
         db_event = models.Event(name=event_in.name, total_seats=event_in.total_seats)
         db.add(db_event)
-        db.commit()
-        db.refresh(db_event)
+        db.flush() # sends the INSERT to get 'db_event.id' without committing yet
 
-        # Create Seat rows for this event
-        seats = []
-        for i in range(1, db_event.total_seats + 1):
-            seat = models.Seat(number=i, status="available", event_id=db_event.id)
-            seats.append(seat)
-            db.add(seat)
+        # Create Seat rows for this event with one set-based INSERT (no per-seat ORM objects)
+        generate_seats(db, db_event.id, db_event.total_seats)
+        event = EventRead.model_validate(db_event, from_attributes=True) # read before commit: no refresh SELECT afterwards
         db.commit()
-        db.refresh(db_event)
     except Exception as e:
         db.rollback() # 'rollback' ensures DB stays consistent if anything fails, prevents partial writes and sends clear error response
         raise HTTPException(status_code=500, detail="Could not create event") from e
-    return db_event
\ No newline at end of file
+    response_cache.bump(CATALOG) # the event list changed: new ETags for its pages
+    return event
\ No newline at end of file
@@ -5,81 +5,364 @@ Endpoints:
 - POST /: Creates a temporary hold on a seat for a user (with expiration time and limit per event).
 - PUT /: Refreshes (extends) the duration of an existing seat hold.
 - DELETE /: Cancels a seat hold, making the seat available again.
+- POST /events/{event_id}/holds/: Holds several seats at once (all or nothing).
+- POST /events/{event_id}/holds/best-available: Holds N adjacent seats chosen by the server.
 
-It prevents race conditions via row-level locking and enforces limits per user/event.
+It prevents race conditions via row-level locking (or, with HOLD_ACQUISITION_MODE=optimistic, a single
+conditional UPDATE that skips locked rows) and enforces limits per user/event.
+Expired holds are released in the background by the hold expiry scheduler (app/utils/hold_scheduler.py).
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+import os
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Header
+from typing import Optional, NamedTuple
+from sqlalchemy import select, update, insert, func, literal
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone, timedelta
 from .. import models
 from ..database import get_db
-from ..utils.expire_holds import expire_holds
+from ..utils.hold_scheduler import hold_scheduler
+from ..utils.seat_index import seat_index
+from ..utils.seat_events import record_seat_change
 from ..deps import get_current_user
+from ..utils.token_cache import CurrentUser
+from ..utils.waiting_room import waiting_room
+from ..utils.metrics import Counter
+from ..utils.fast_json import iso_datetime
+from ..schemas import HoldBatchCreate, HoldBestAvailableCreate
 
 router = APIRouter(prefix="/events/{event_id}/seats/{seat_id}/hold", tags=["holds"])
+router_holds_by_event = APIRouter(prefix="/events/{event_id}/holds", tags=["holds"])
 
 MAX_HOLD_SECONDS = 60
 MAX_HOLDS_PER_USER_PER_EVENT = 3
+BEST_AVAILABLE_ATTEMPTS = 5 # candidate runs tried by one best-available request before giving up
+OPTIMISTIC_HOLD_ATTEMPTS = 2 # optimistic mode: statements tried while the seats are free but locked by another request
+# "lock": SELECT ... FOR UPDATE, then checks and inserts; "optimistic": one conditional UPDATE + INSERT statement
+HOLD_ACQUISITION_MODE = os.getenv("HOLD_ACQUISITION_MODE", "lock")
 
+class HeldSeat(NamedTuple):
+    # A created hold as the routes and the expiry scheduler need it (plain values: reading it after commit runs no query)
+    id: int
+    seat_id: int
+    user_id: str
+    expires_at: datetime
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
-def create_hold(event_id: int, seat_id: int, db: Session = Depends(get_db), body: dict = Body(...), current_user: models.User = Depends(get_current_user)):
-    user_id = current_user.id
-    if not user_id:
-        raise HTTPException(status_code=400, detail="user_id required")
-    
-    seconds = int(body.get("seconds", MAX_HOLD_SECONDS))
+
+# counted once committed (shared with the async router)
+holds_created = Counter("holds_created_total", "Seat holds created")
+holds_refreshed = Counter("holds_refreshed_total", "Seat holds extended")
+holds_cancelled = Counter("holds_cancelled_total", "Seat holds cancelled by their user")
+
+
+def check_hold_seconds(seconds: int):
     if seconds <= 0 or seconds > MAX_HOLD_SECONDS:
         raise HTTPException(status_code=400, detail=f"seconds must be between 1 and {MAX_HOLD_SECONDS}")
-    
-    # Pass the current event ID to expire_holds to clean up expired holds for this event only;
-    expire_holds(db, event_id=event_id)
 
+
+def check_holds_quantity(quantity: int):
+    # a request asking for more seats than a user may hold is refused before any seat is looked up or locked
+    if quantity > MAX_HOLDS_PER_USER_PER_EVENT:
+        raise HTTPException(status_code=409, detail="User holds limit reached for this event")
+
+
+def reject_indexed_taken_seats(db: Session, event_id: int, seat_ids: list):
+    # Fast rejection: seats this process already knows are taken get their 409 without locking the rows
+    for seat_id in seat_ids:
+        indexed_status = seat_index.status(db, event_id, seat_id)
+        if indexed_status == "reserved":
+            raise HTTPException(status_code=409, detail="Seat already reserved")
+        if indexed_status == "on_hold":
+            raise HTTPException(status_code=409, detail="Seat already on hold")
+
+
+def hold_seats(db: Session, event_id: int, seat_ids: list, user_id: str, seconds: int) -> list:
+    """
+    Hold every seat in 'seat_ids' for the user, or none of them, with the HOLD_ACQUISITION_MODE strategy
+    """
+    if HOLD_ACQUISITION_MODE == "optimistic":
+        return hold_seats_optimistic(db, event_id, seat_ids, user_id, seconds)
+    return hold_seats_locking(db, event_id, seat_ids, user_id, seconds)
+
+
+def hold_seats_locking(db: Session, event_id: int, seat_ids: list, user_id: str, seconds: int) -> list:
+    """
+    Hold every seat in 'seat_ids' for the user, or none of them (single transaction)
+    - locks all the seat rows with one SELECT ... FOR UPDATE, always in ascending ID order, so two
+      requests holding overlapping seats wait for each other instead of deadlocking
+    - applies MAX_HOLDS_PER_USER_PER_EVENT once for the whole set
+    - returns the created holds (already committed)
+    """
+    seat_ids = sorted(set(seat_ids))
     try:
-        # Lock the seat row to prevent race conditions during update
-        seat = db.query(models.Seat).filter(models.Seat.id == seat_id, models.Seat.event_id == event_id).with_for_update().first()
-        if not seat:
+        seats = (db.query(models.Seat)
+                 .filter(models.Seat.id.in_(seat_ids), models.Seat.event_id == event_id)
+                 .order_by(models.Seat.id)
+                 .with_for_update().all())
+        if len(seats) != len(seat_ids):
             raise HTTPException(status_code=404, detail="Seat not found for this event")
         
-        if seat == "reserved":
+        if any(seat.status == "reserved" for seat in seats):
             raise HTTPException(status_code=409, detail="Seat already reserved")
         
-        # check if seat already on hold (someone else)
-        if seat.status == "on_hold":
-            # check if hold belongs to same user
-            existing_hold = db.query(models.Hold.seat_id == models.Seat.id).first()
-            if existing_hold and existing_hold.user_id == user_id:
-                raise HTTPException(status_code=409, detail="You already hold this seat")
-            raise HTTPException(status_code=409, detail="Seat already on hold")
-        
         now = datetime.now(timezone.utc)
 
-        # Count active holds for this user in the same event
-        user_holds_count = (db.query(models.Hold)
-                            .join(models.Seat, models.Hold.seat_id == models.Seat.id)
-                            .filter(models.Seat.event_id == event_id, models.Hold.user_id == user_id, models.Hold.expires_at > now)
-                            .count())
-        if user_holds_count >= MAX_HOLDS_PER_USER_PER_EVENT:
-            raise HTTPException(status_code=409, detail="User holds limit reached for this event")
-        
-        # create hold
-        expires_at = datetime.now(timezone.utc) + timedelta(seconds=seconds)
-        hold = models.Hold(user_id=user_id, seat_id=seat.id, held_at=datetime.now(timezone.utc), expires_at=expires_at)
-        db.add(hold)
-        seat.status = "on_hold"
-        db.commit()
-        db.refresh(hold)
-        db.refresh(seat)
+        # check if any seat is already on hold (someone else)
+        held_seat_ids = [seat.id for seat in seats if seat.status == "on_hold"]
+        if held_seat_ids:
+            for existing_hold in db.query(models.Hold).filter(models.Hold.seat_id.in_(held_seat_ids)).all():
+                # expired holds are released by the expiry scheduler; if it hasn't run yet, release this one here (the seat is already locked)
+                if existing_hold.expires_at <= now:
+                    db.delete(existing_hold)
+                # check if hold belongs to same user
+                elif existing_hold.user_id == user_id:
+                    raise HTTPException(status_code=409, detail="You already hold this seat")
+                else:
+                    raise HTTPException(status_code=409, detail="Seat already on hold")
+            db.flush()
+
+        holds = create_locked_holds(db, event_id, seats, user_id, seconds, now)
+
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="could not create hold") from e
+
+    after_holds_committed(event_id, holds)
+    return holds
 
-    except HTTPException as e:
+
+def hold_seats_optimistic(db: Session, event_id: int, seat_ids: list, user_id: str, seconds: int) -> list:
+    """
+    Hold every seat in 'seat_ids' for the user, or none of them, with one conditional statement:
+        WITH free AS (SELECT id FROM seats WHERE id IN (...) AND status = 'available' FOR UPDATE SKIP LOCKED),
+             taken AS (UPDATE seats SET status = 'on_hold' WHERE id IN (SELECT id FROM free)
+                         AND (SELECT count(*) FROM free) = n
+                         AND <user holds in the event> + n <= MAX_HOLDS_PER_USER_PER_EVENT
+                       RETURNING id)
+        INSERT INTO holds (...) SELECT ... FROM taken RETURNING ...
+    - SKIP LOCKED: a seat another request is taking right now is skipped instead of waited for, so losers fail at once
+    - either every seat is taken or none; when none, explain_failed_hold() reads (without locks) why,
+      to answer with the same errors as the locking mode
+    - when the seats still look free, they were only locked for a moment by another request (which may have rolled
+      back): the statement is tried once more, then a distinct, retryable 409 is returned (Retry-After: 1)
+    - not faster than 'lock' everywhere: benchmarks/bench_hold_acquisition.py compares both modes, measure before switching
+    - an on_hold seat whose hold expired but wasn't released yet counts as taken (the expiry scheduler frees it)
+    """
+    seat_ids = sorted(set(seat_ids))
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=seconds)
+
+    free = (select(models.Seat.id)
+            .where(models.Seat.id.in_(seat_ids), models.Seat.event_id == event_id, models.Seat.status == "available")
+            .with_for_update(skip_locked=True)
+            .cte("free"))
+    user_holds = (select(func.count(models.Hold.id))
+                  .where(models.Hold.event_id == event_id, models.Hold.user_id == user_id, models.Hold.expires_at > now)
+                  .scalar_subquery())
+    taken = (update(models.Seat)
+             .where(models.Seat.id.in_(select(free.c.id)),
+                    select(func.count()).select_from(free).scalar_subquery() == len(seat_ids),
+                    user_holds + len(seat_ids) <= MAX_HOLDS_PER_USER_PER_EVENT)
+             .values(status="on_hold")
+             .returning(models.Seat.id)
+             .cte("taken"))
+    stmt = (insert(models.Hold)
+            .from_select(["user_id", "seat_id", "event_id", "held_at", "expires_at"],
+                         select(literal(user_id), taken.c.id, literal(event_id),
+                                literal(now, models.Hold.held_at.type), literal(expires_at, models.Hold.expires_at.type)))
+            .returning(models.Hold.id, models.Hold.seat_id, models.Hold.user_id, models.Hold.expires_at))
+
+    try:
+        for _ in range(OPTIMISTIC_HOLD_ATTEMPTS):
+            holds = sorted(db.execute(stmt).all(), key=lambda hold: hold.seat_id)
+            if holds:
+                break
+            explain_failed_hold(db, event_id, seat_ids, user_id, now)
+        else:
+            raise HTTPException(status_code=409, detail="Seat is being taken by another request, try again",
+                                headers={"Retry-After": "1"})
+        record_seat_change(db, event_id, seat_ids, "on_hold")
+        db.commit()
+    except HTTPException:
         db.rollback()
-        raise HTTPException(status_code=500, detaill="could not create hold") from e
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="could not create hold") from e
+
+    after_holds_committed(event_id, holds)
+    return holds
+
+
+def explain_failed_hold(db: Session, event_id: int, seat_ids: list, user_id: str, now: datetime):
+    # Raise the error the locking mode would have given (plain reads, no locks; one query unless it's the limit)
+    # Returns without raising when nothing explains it: the seats were free but locked by another request (SKIP LOCKED)
+    seats = db.execute(select(models.Seat.id, models.Seat.status, models.Hold.user_id)
+                       .outerjoin(models.Hold, models.Hold.seat_id == models.Seat.id)
+                       .where(models.Seat.id.in_(seat_ids), models.Seat.event_id == event_id)).all()
+    if len({seat.id for seat in seats}) != len(seat_ids):
+        raise HTTPException(status_code=404, detail="Seat not found for this event")
+    if any(seat.status == "reserved" for seat in seats):
+        raise HTTPException(status_code=409, detail="Seat already reserved")
+    holders = [seat.user_id for seat in seats if seat.user_id is not None]
+    if user_id in holders:
+        raise HTTPException(status_code=409, detail="You already hold this seat")
+    if holders:
+        raise HTTPException(status_code=409, detail="Seat already on hold")
+    user_holds_count = (db.query(models.Hold)
+                        .filter(models.Hold.event_id == event_id, models.Hold.user_id == user_id, models.Hold.expires_at > now)
+                        .count())
+    if user_holds_count + len(seat_ids) > MAX_HOLDS_PER_USER_PER_EVENT:
+        raise HTTPException(status_code=409, detail="User holds limit reached for this event")
+    # the seats were free but another request was taking them at the same moment
+
+
+def create_locked_holds(db: Session, event_id: int, seats: list, user_id: str, seconds: int, now: datetime) -> list:
+    """
+    Hold seats that are already locked by this transaction and free to take, then commit
+    - applies MAX_HOLDS_PER_USER_PER_EVENT once for the whole set
+    - returns HeldSeat tuples read before the commit (the committed ORM objects would reload one by one)
+    """
+    # Count active holds for this user in the same event
+    user_holds_count = (db.query(models.Hold)
+                        .filter(models.Hold.event_id == event_id, models.Hold.user_id == user_id, models.Hold.expires_at > now)
+                        .count())
+    if user_holds_count + len(seats) > MAX_HOLDS_PER_USER_PER_EVENT:
+        raise HTTPException(status_code=409, detail="User holds limit reached for this event")
+    
+    # create holds
+    expires_at = now + timedelta(seconds=seconds)
+    holds = [models.Hold(user_id=user_id, seat_id=seat.id, event_id=event_id, held_at=now, expires_at=expires_at) for seat in seats]
+    db.add_all(holds)
+    for seat in seats:
+        seat.status = "on_hold"
+    record_seat_change(db, event_id, [seat.id for seat in seats], "on_hold")
+    db.flush() # assigns the hold IDs
+    held = [HeldSeat(hold.id, hold.seat_id, hold.user_id, hold.expires_at) for hold in holds]
+    db.commit()
+    return held
+
+
+def after_holds_committed(event_id: int, holds: list):
+    # the expiry scheduler releases the seats when the holds expire
+    holds_created.inc(len(holds))
+    for hold in holds:
+        hold_scheduler.schedule(hold.id, hold.expires_at, event_id)
+
+
+def hold_best_available(db: Session, event_id: int, quantity: int, user_id: str, seconds: int) -> list:
+    """
+    Hold the 'quantity' lowest-numbered adjacent available seats of an event (one transaction per attempt)
+    - candidate runs come from the in-memory seat index (a byte search over seat numbers, no query)
+    - the candidate rows are locked with FOR UPDATE SKIP LOCKED: rows another request is holding are
+      skipped instead of waited for, so concurrent allocators never block each other and always end up
+      with disjoint seats
+    - if part of a run was skipped (or the index was stale), the next run after it is tried, up to
+      BEST_AVAILABLE_ATTEMPTS times
+    """
+    seat_map = seat_index.get_map(db, event_id)
+    if not seat_map.positions and not db.get(models.Event, event_id):
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    holds = None
+    start = 0
+    for _ in range(BEST_AVAILABLE_ATTEMPTS):
+        position = seat_map.find_available_run(quantity, start)
+        if position < 0:
+            break
+        run = {seat_map.ids[i]: i for i in range(position, position + quantity)}
+
+        try:
+            seats = (db.query(models.Seat)
+                     .filter(models.Seat.id.in_(run), models.Seat.event_id == event_id, models.Seat.status == "available")
+                     .order_by(models.Seat.id)
+                     .with_for_update(skip_locked=True).all())
+            if len(seats) == quantity:
+                holds = create_locked_holds(db, event_id, seats, user_id, seconds, datetime.now(timezone.utc))
+                break
+            # someone else has part of this run: release what was locked and look past the last missing seat
+            db.rollback()
+        except HTTPException:
+            db.rollback()
+            raise
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail="could not create hold") from e
+
+        locked_ids = {seat.id for seat in seats}
+        start = max(i for seat_id, i in run.items() if seat_id not in locked_ids) + 1
+
+    if not holds:
+        raise HTTPException(status_code=409, detail=f"No {quantity} adjacent seats available")
+
+    after_holds_committed(event_id, holds)
+    return holds
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+def create_hold(event_id: int, seat_id: int, db: Session = Depends(get_db), body: dict = Body(...), current_user: CurrentUser = Depends(get_current_user), x_queue_ticket: Optional[str] = Header(None)):
+    user_id = str(current_user.id) # 'holds.user_id' is a string column
+    waiting_room.admit(event_id, user_id, x_queue_ticket) # 429 until the queue ticket is admitted (when the waiting room is on)
+    if not user_id:
+        raise HTTPException(status_code=400, detail="user_id required")
+    
+    seconds = int(body.get("seconds", MAX_HOLD_SECONDS))
+    check_hold_seconds(seconds)
+    reject_indexed_taken_seats(db, event_id, [seat_id])
+
+    (hold,) = hold_seats(db, event_id, [seat_id], user_id, seconds)
     
     return {
-        "seat": seat.id, 
+        "seat": hold.seat_id, 
         "user_id": hold.user_id, 
-        "expires_at": hold.expires_at.isoformat()
+        "expires_at": iso_datetime(hold.expires_at)
+        }
+
+
+@router_holds_by_event.post("/", status_code=status.HTTP_201_CREATED)
+def create_holds(event_id: int, hold_in: HoldBatchCreate, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user), x_queue_ticket: Optional[str] = Header(None)):
+    """
+    Hold several seats of an event at once: either all of them are held, or none (409/404 and nothing changes)
+    - hold_in: { "seat_ids": [...], "seconds": 60 }
+    """
+    user_id = str(current_user.id)
+    waiting_room.admit(event_id, user_id, x_queue_ticket)
+    seconds = hold_in.seconds if hold_in.seconds is not None else MAX_HOLD_SECONDS
+    check_hold_seconds(seconds)
+    check_holds_quantity(len(set(hold_in.seat_ids)))
+    reject_indexed_taken_seats(db, event_id, hold_in.seat_ids)
+
+    holds = hold_seats(db, event_id, hold_in.seat_ids, user_id, seconds)
+
+    return {
+        "seats": [hold.seat_id for hold in holds],
+        "user_id": user_id,
+        "expires_at": iso_datetime(holds[0].expires_at)
+        }
+
+
+@router_holds_by_event.post("/best-available", status_code=status.HTTP_201_CREATED)
+def create_best_available_holds(event_id: int, hold_in: HoldBestAvailableCreate, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user), x_queue_ticket: Optional[str] = Header(None)):
+    """
+    Hold N adjacent seats picked by the server (lowest seat numbers first), instead of specific seat IDs
+    - hold_in: { "quantity": 2, "seconds": 60 }
+    - 409 when no run of that many adjacent seats could be held
+    """
+    user_id = str(current_user.id)
+    waiting_room.admit(event_id, user_id, x_queue_ticket)
+    seconds = hold_in.seconds if hold_in.seconds is not None else MAX_HOLD_SECONDS
+    check_hold_seconds(seconds)
+    check_holds_quantity(hold_in.quantity)
+
+    holds = hold_best_available(db, event_id, hold_in.quantity, user_id, seconds)
+
+    return {
+        "seats": [hold.seat_id for hold in holds],
+        "user_id": user_id,
+        "expires_at": iso_datetime(holds[0].expires_at)
         }
 
 
@@ -90,33 +373,36 @@ def refresh_hold(event_id: int, seat_id: int, body: dict, db: Session = Depends(
         raise HTTPException(status_code=400, detail="user_id is required")
     
     seconds = int(body.get("seconds", MAX_HOLD_SECONDS))
-    if seconds <= 0 or seconds > MAX_HOLD_SECONDS:
-        raise HTTPException(status_code=400, detail=f"seconds must be between 1 and {MAX_HOLD_SECONDS}")
-    expire_holds(db, event_id=event_id)
+    check_hold_seconds(seconds)
 
     try:
         seat = db.query(models.Seat).filter(models.Seat.id == seat_id, models.Seat.event_id == event_id).with_for_update().first()
         if not seat:
-            HTTPException(status_code=404, detail="Seat not found")
+            raise HTTPException(status_code=404, detail="Seat not found")
+
+        now = datetime.now(timezone.utc)
 
-        # Find the current hold for this seat
+        # Find the current hold for this seat (an expired hold can't be refreshed, even if the scheduler hasn't released it yet)
         hold = db.query(models.Hold).filter(models.Hold.seat_id == seat.id).first()
-        if not hold:
+        if not hold or hold.expires_at <= now:
             raise HTTPException(status_code=403, detail="No active hold for this user on this seat")
         
-        # Update expiration time for the hold
-        hold.expires_at = datetime.now(timezone.utc) + timedelta(seconds=seconds)
+        # Update expiration time for the hold (kept in locals: reading the committed object would reload it)
+        hold_id, expires_at = hold.id, now + timedelta(seconds=seconds)
+        hold.expires_at = expires_at
         db.commit()
-        db.refresh(hold)
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail="Could nt=ot refresh holf") from e
+        raise HTTPException(status_code=500, detail="Could not refresh hold") from e
+
+    holds_refreshed.inc()
+    hold_scheduler.schedule(hold_id, expires_at, event_id)
     
     return {
-        "seat_id": seat.id,
-        "expires_at": hold.expires_at.isoformat()
+        "seat_id": seat_id,
+        "expires_at": iso_datetime(expires_at)
         }
 
 
@@ -139,14 +425,16 @@ def cancel_hold(event_id: int, seat_id: int, body: dict, db: Session = Depends(g
         
         db.delete(hold)
         seat.status = "available"
+        record_seat_change(db, event_id, [seat.id], "available")
         db.commit()
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Could not cancel hold") from e
-    
+
+    holds_cancelled.inc()
     return {
         "detail": "Hold cancelled", 
-        "seat_id": seat.id
+        "seat_id": seat_id
         }
\ No newline at end of file
@@ -0,0 +1,75 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..database import engine, async_engine, POOL_OPTIONS
+from ..utils.hold_scheduler import hold_scheduler
+from ..utils.pool_stats import pool_status, export_pool_status, checkout_wait, connection_held, checkout_timeouts
+from ..utils.token_cache import token_cache
+from ..utils.password_pool import password_pool
+from ..utils.waiting_room import waiting_room
+from ..utils.metrics import render_prometheus
+
+"""
+Operational metrics endpoints (read-only)
+- /metrics : every metric in the Prometheus text format (request latency per route, SQL time per request,
+  holds and reservations counters, and all the metrics below), for a Prometheus scraper
+- /metrics/holds : state of the hold expiry scheduler (pending holds, released seats, expiry lag)
+- /metrics/pool : database connection pool usage and checkout wait times
+- /metrics/auth : bearer token cache size, hits and misses, and the password hashing pool
+- /metrics/waiting-room : admission rate and per-event backlog of the waiting room
+"""
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """
+    Export every registered metric (app/utils/metrics.py REGISTRY) in the Prometheus text exposition format
+    """
+    export_pool_status("sync", engine.pool, POOL_OPTIONS["max_overflow"])
+    if async_engine is not None:
+        export_pool_status("async", async_engine.sync_engine.pool, POOL_OPTIONS["max_overflow"])
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/holds")
+def hold_expiry_metrics():
+    """
+    Report the hold expiry scheduler state and how late holds are being released
+    """
+    return hold_scheduler.stats()
+
+
+@router.get("/pool")
+def pool_metrics():
+    """
+    Report the connection pool state (in use, idle, overflow) and checkout wait/hold time histograms
+    """
+    pools = {"sync": pool_status(engine.pool, POOL_OPTIONS["max_overflow"])}
+    if async_engine is not None:
+        pools["async"] = pool_status(async_engine.sync_engine.pool, POOL_OPTIONS["max_overflow"])
+    return {
+        "pools": pools,
+        "checkout_wait_seconds": checkout_wait.snapshot(),
+        "connection_held_seconds": connection_held.snapshot(),
+        "checkout_timeouts": checkout_timeouts.snapshot(),
+    }
+
+
+@router.get("/auth")
+def auth_metrics():
+    """
+    Report how many bearer tokens were resolved from the token cache (hits) vs verified + queried (misses),
+    and how busy the password hashing pool is
+    """
+    return {"token_cache": token_cache.stats(), "password_hashing": password_pool.stats()}
+
+
+@router.get("/waiting-room")
+def waiting_room_metrics():
+    """
+    Report the waiting room settings, tickets issued/turned away and how far behind each event's queue is
+    """
+    return waiting_room.stats()
@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from .. import models
 from ..schemas import ReservationCreate, ReservationRead, ReservationCancel
 from ..database import get_db
-from typing import List
-from ..utils.expire_holds import expire_holds
+from typing import List, Optional
+from datetime import datetime, timezone
 from ..deps import get_current_user
+from ..utils.token_cache import CurrentUser
+from ..utils.seat_index import seat_index
+from ..utils.seat_events import record_seat_change
+from ..utils.pagination import decode_cursor, paginate, cursor_headers
+from ..utils.fast_json import schema_columns, rows_body, JSON_MEDIA_TYPE
+from ..utils.metrics import Counter
 
 router_reservation_by_seat = APIRouter(prefix="/events/{event_id}/seats/{seat_id}/reservation", tags=["reservations"])
 router_reservations_by_event = APIRouter(prefix="/events/{event_id}/reservations", tags=["reservations"])
 
+# counted once committed (shared with the async router)
+reservations_made = Counter("reservations_made_total", "Seats reserved")
+reservations_cancelled = Counter("reservations_cancelled_total", "Reservations cancelled")
+
+
 @router_reservation_by_seat.post("/", response_model=ReservationRead, status_code=status.HTTP_201_CREATED)
-def reserve_seat(event_id: int, seat_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def reserve_seat(event_id: int, seat_id: int, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     """
     Reserve a specific seat for a user
     - event_id: path parameter
@@ -19,42 +31,50 @@ def reserve_seat(event_id: int, seat_id: int, db: Session = Depends(get_db), cur
     - current_user: authenticated user making the reservation
     - db: injected SQLAlchemy session
     """
+    user_id = str(current_user.id) # 'user_id' columns are strings
+
+    # Fast rejection: a seat this process already knows is reserved gets its 409 without locking the row
+    if seat_index.status(db, event_id, seat_id) == "reserved":
+        raise HTTPException(status_code=409, detail="Seat is not available (status: reserved)")
+
     try:
-        expire_holds(db, event_id=event_id)
-        
         seat = db.query(models.Seat).filter(models.Seat.id == seat_id, models.Seat.event_id == event_id).with_for_update().first()
 
         if not seat:
             raise HTTPException(status_code=404, detail="Seat not found for this event")
         
-        if seat.status != "available":
+        if seat.status == "reserved":
             raise HTTPException(status_code=409, detail=f"Seat is not available (status: {seat.status})")
         
         existing_user_reservation = (db.query(models.Reservation)
-                                     .join(models.Seat, models.Reservation.seat_id == models.Seat.id)
-                                     .filter(models.Seat.event_id == event_id, models.Reservation.user_id == current_user.id).first())
+                                     .filter(models.Reservation.event_id == event_id, models.Reservation.user_id == user_id).first())
         
+        # the hold must belong to the user and still be active (expired holds may not have been released by the scheduler yet)
         hold = db.query(models.Hold).filter(models.Hold.seat_id == seat.id).first()
-        if not hold or hold.user_id != current_user.id:
+        if not hold or hold.user_id != user_id or hold.expires_at <= datetime.now(timezone.utc):
             raise HTTPException(status_code=403, detail="You must hold the seat before reserving")
         
         if existing_user_reservation:
             raise HTTPException(status_code=409, detail="User already has a reservation for this event")
         
-        db_res = models.Reservation(user_id=current_user.id, seat_id=seat.id)
+        db_res = models.Reservation(user_id=user_id, seat_id=seat.id, event_id=event_id)
         db.add(db_res)
         db.delete(hold)
         seat.status = "reserved"
+        record_seat_change(db, event_id, [seat.id], "reserved")
+        db.flush() # assigns the reservation ID
+        # read the response before commit: the committed objects would be reloaded with extra SELECTs
+        reservation = ReservationRead.model_validate(db_res, from_attributes=True)
         db.commit()
-        db.refresh(db_res)
-        db.refresh(seat)
 
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Could not reserve seat") from e
-    return db_res
+
+    reservations_made.inc()
+    return reservation
 
 
 @router_reservation_by_seat.delete("/", status_code=status.HTTP_200_OK)
@@ -82,23 +102,26 @@ def cancel_reservation(event_id: int, seat_id: int, cancel_in: ReservationCancel
         # delete + free the seat in the same transation
         db.delete(reservation)
         seat.status = "available"
+        record_seat_change(db, event_id, [seat.id], "available")
 
         db.commit()
-        db.refresh(seat)
 
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Could not cancel reservation") from e
-    
-    return {"detail": "Reservation cancelled", "seat_id": seat.id}
+
+    reservations_cancelled.inc()
+    return {"detail": "Reservation cancelled", "seat_id": seat_id}
 
 
 @router_reservations_by_event.get("/", response_model=List[ReservationRead])
-def list_reservations(event_id: int, db: Session = Depends(get_db)):
+def list_reservations(event_id: int, response: Response, db: Session = Depends(get_db),
+                      cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
     """
-    List all reservations for a given event
+    List the reservations for a given event, one page at a time
+    - cursor / limit: keyset pagination on (reserved_at, id); the next page's cursor comes in the 'X-Next-Cursor' response header
     """
 
     # search for the event in the database, using the given ID
@@ -108,14 +131,16 @@ def list_reservations(event_id: int, db: Session = Depends(get_db)):
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    reservations = (db.query(models.Reservation)
-                    .join(models.Seat, models.Reservation.seat_id == models.Seat.id)
-                    .filter(models.Seat.event_id == event_id)
-                    .order_by(models.Reservation.reserved_at).all())
+    query = db.query(*schema_columns(models.Reservation, ReservationRead)).filter(models.Reservation.event_id == event_id)
+    if cursor:
+        after = decode_cursor(cursor, datetime.fromisoformat, int)
+        query = query.filter(tuple_(models.Reservation.reserved_at, models.Reservation.id) > tuple_(*after))
+    reservations = query.order_by(models.Reservation.reserved_at, models.Reservation.id).limit(limit + 1).all()
     """
-    Query all reservations associated with the event:
-    - Performs a join with the Seat table to access the event_id
-    - Filters only the seats that belong to the current event
-    - Orders the reservations by the date/time they were made
+    Query the reservations associated with the event:
+    - Filters on the reservation's own event_id (no join with the Seat table)
+    - Orders the reservations by the date/time they were made (ID breaks ties), starting after the cursor
+    - Only the ReservationRead columns, as tuples encoded straight to JSON (no ORM objects, no per-row Pydantic model)
     """
-    return reservations
\ No newline at end of file
+    reservations = paginate(reservations, limit, response, key=lambda r: (r.reserved_at, r.id))
+    return Response(rows_body(ReservationRead, reservations), media_type=JSON_MEDIA_TYPE, headers=cursor_headers(response))
\ No newline at end of file
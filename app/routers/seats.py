@@ -1,25 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from .. import models
 from ..schemas import SeatRead
 from ..database import get_db
+from ..utils.seat_map import build_seat_map, requested_encoding, SEAT_MAP_MEDIA_TYPE
+from ..utils.pagination import decode_cursor, paginate, cursor_headers
+from ..utils.response_cache import response_cache
+from ..utils.fast_json import schema_columns, rows_body, dumps
+from ..utils.seat_events import stream_seat_events
 
 router = APIRouter(prefix="/events/{event_id}/seats", tags=["seats"])
 
 @router.get("/", response_model=List[SeatRead])
-def read_event_seats(event_id, db: Session = Depends(get_db)):
+def read_event_seats(event_id: int, response: Response, db: Session = Depends(get_db),
+                     format: Optional[str] = Query(None, pattern="^(json|packed|rle)$"),
+                     accept: Optional[str] = Header(None),
+                     seat_status: Optional[str] = Query(None, alias="status", pattern="^(available|on_hold|reserved)$"),
+                     cursor: Optional[str] = None, limit: int = Query(1000, ge=1, le=1000),
+                     if_none_match: Optional[str] = Header(None)):
     """
-    Return all seats for a given event
+    Return the seats for a given event, one page at a time (ordered by seat number)
     - event_id: path parameter (int)
     - db: SQLAlchemy Session injected by Depends(get_db)
+    - status: optional filter, e.g. ?status=available
+    - cursor / limit: keyset pagination; the next page's cursor comes in the 'X-Next-Cursor' response header
+    - format: "packed" (2 bits per seat) or "rle" (run-length) returns the compact seat map of the whole event instead of
+      one object per seat; the same happens with 'Accept: application/vnd.reservio.seatmap+json' (add ';encoding=rle' for run-length)
+    - if_none_match: the ETag the client got before; while the event's seats don't change the answer is a 304
+      (or the cached bytes for a new client) without any query
     """
+    encoding = requested_encoding(format, accept)
+    variant = f"seats|{encoding or 'json'}|{seat_status}|{cursor}|{limit}"
+    cached, seen_version = response_cache.cached_response(event_id, variant, if_none_match)
+    if cached is not None:
+        return cached
+
     event = db.get(models.Event, event_id) # To ensure that event exists (gives 404 if not)
     if not event:
+        response_cache.discard(event_id, seen_version)
         raise HTTPException(status_code=404, detail="Event not found")
+
+    if encoding:
+        # column-only query: no Seat objects, no per-seat Pydantic model
+        rows = db.execute(select(models.Seat.id, models.Seat.status)
+                          .where(models.Seat.event_id == event_id)
+                          .order_by(models.Seat.number)).all()
+        return response_cache.respond(event_id, variant, seen_version, dumps(build_seat_map(event_id, rows, encoding)),
+                                      media_type=SEAT_MAP_MEDIA_TYPE, headers={"Vary": "Accept"}, if_none_match=if_none_match)
     
-    seats = db.query(models.Seat).filter(models.Seat.event_id == event_id).order_by(models.Seat.number).all()
-    return seats
+    # served by the (event_id, number) index, or (event_id, status, number) when filtering by status
+    # column tuples encoded straight to JSON (no Seat objects, no per-seat Pydantic model)
+    query = db.query(*schema_columns(models.Seat, SeatRead)).filter(models.Seat.event_id == event_id)
+    if seat_status:
+        query = query.filter(models.Seat.status == seat_status)
+    if cursor:
+        (after_number,) = decode_cursor(cursor, int)
+        query = query.filter(models.Seat.number > after_number)
+    seats = paginate(query.order_by(models.Seat.number).limit(limit + 1).all(), limit, response, key=lambda s: (s.number,))
+    return response_cache.respond(event_id, variant, seen_version, rows_body(SeatRead, seats),
+                                  headers={"Vary": "Accept", **cursor_headers(response)}, if_none_match=if_none_match)
+
+
+@router.get("/stream")
+def stream_event_seats(event_id: int, db: Session = Depends(get_db)):
+    """
+    Live seat status changes of an event, as Server-Sent Events (text/event-stream)
+    - each change is one 'seats' event: {"event_id", "seat_ids", "status"}
+    - load the current state first (e.g. ?format=packed), then apply the changes as they arrive
+    - a 'dropped' event means the client fell behind: reload the seat map and reconnect
+    """
+    if not db.get(models.Event, event_id):
+        raise HTTPException(status_code=404, detail="Event not found")
+    return StreamingResponse(stream_seat_events(event_id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 
 @router.get("/{seat_id}", response_model=SeatRead)
 def read_event_seat(event_id: int, seat_id: int, db: Session = Depends(get_db)):
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Header
+from sqlalchemy.orm import Session
+from typing import Optional
+from .. import models
+from ..database import get_db
+from ..deps import get_current_user
+from ..utils.token_cache import CurrentUser
+from ..utils.waiting_room import waiting_room
+
+"""
+Virtual waiting room of an event (see app/utils/waiting_room.py)
+- POST /events/{event_id}/queue : take a queue ticket (returns the ticket, position and ETA)
+- GET /events/{event_id}/queue : position and ETA of the ticket sent in the X-Queue-Ticket header
+The hold endpoints require an admitted ticket in X-Queue-Ticket when WAITING_ROOM=1.
+"""
+
+router = APIRouter(prefix="/events/{event_id}/queue", tags=["waiting room"])
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+def take_ticket(event_id: int, db: Session = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    if not db.get(models.Event, event_id):
+        raise HTTPException(status_code=404, detail="Event not found")
+    return waiting_room.issue(event_id, str(current_user.id))
+
+
+@router.get("/")
+def ticket_status(event_id: int, x_queue_ticket: Optional[str] = Header(None)):
+    # no database access: everything needed is in the signed ticket
+    if not x_queue_ticket:
+        raise HTTPException(status_code=400, detail="X-Queue-Ticket header is required")
+    return waiting_room.status(x_queue_ticket, event_id)
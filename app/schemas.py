@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
+from typing import Optional, List
 from datetime import datetime
 
 """
@@ -9,6 +9,7 @@ Field : is used to metadata, like 'title', 'example', and validation like 'ge' a
 Optional : we use when a field can be 'None', when is not mandatory
 datetime : used as a timestamp to know when a reservation was created
 EmailStr : a Pydantic type that ensures the value is a valid email format
+ConfigDict(from_attributes=True) : lets a schema read its fields from an object's attributes (SQLAlchemy models), not only from dicts
 """
 
 class EventBase(BaseModel):
@@ -27,8 +28,7 @@ class EventRead(EventBase):
     # Schema for reading an event (includes ID)
     id: int
 
-    class Config:
-        orm_mode = True 
+    model_config = ConfigDict(from_attributes=True) # can be built from a 'models.Event' (SQLAlchemy model) instance
 
 
 class SeatRead(BaseModel):
@@ -36,8 +36,7 @@ class SeatRead(BaseModel):
     number: int = Field(..., title="Seat number", example=1)
     status: str = Field(..., title="Seat status", example="available")
 
-    class config:
-        orm_mode= True # allows Pydantic to convert 'models.Seat' (SQLAlchemy model) instances to JSON without manual transformation
+    model_config = ConfigDict(from_attributes=True) # allows Pydantic to convert 'models.Seat' (SQLAlchemy model) instances to JSON without manual transformation
 
 
 class ReservationCreate(BaseModel): # input schema (defines which data the client must provide to create a reservation)
@@ -50,14 +49,23 @@ class ReservationRead(BaseModel): # output schema (defines which data is returne
     seat_id: int
     reserved_at: datetime
 
-    class config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ReservationCancel(BaseModel): # schema for reservation cancellation request, identifying the user by UUID.
     user_id: str = Field(..., title="User UUID", example="123e4567-e89b-12d3-a456-426614174000")
 
 
+class HoldBatchCreate(BaseModel): # input schema to hold several seats of an event at once
+    seat_ids: List[int] = Field(..., min_length=1, title="Seat IDs", example=[1, 2, 3])
+    seconds: Optional[int] = Field(None, title="Hold duration in seconds", example=60)
+
+
+class HoldBestAvailableCreate(BaseModel): # input schema to hold N adjacent seats chosen by the server
+    quantity: int = Field(..., ge=1, title="Number of adjacent seats", example=2)
+    seconds: Optional[int] = Field(None, title="Hold duration in seconds", example=60)
+
+
 class UserCreate(BaseModel):
     email: EmailStr
     password: str
@@ -68,8 +76,7 @@ class UserRead(BaseModel):
     email: EmailStr
     created_at: datetime
 
-    class config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Token(BaseModel): # schema for login response (JWT token format)
@@ -1,32 +1,79 @@
 from datetime import datetime, timezone
+from sqlalchemy import delete, select, update
 from .. import models
+from .seat_events import record_seat_change
+from .metrics import Counter
 
-def expire_holds(db, event_id: int = None):
+"""
+Understanding the set-based expiration
+- Lock order : every path that touches a hold locks its seat first (reserve, cancel, refresh: SELECT ... FOR UPDATE on
+  the seat, then the hold); the expiry does the same, or a sweep and a reservation of the same seat deadlock
+- select(...).with_for_update(of=Seat) : locks the seats of the expired holds, in seat id order (two sweeps lock in the
+  same order); a seat being reserved right now is waited for, and its hold is gone by the time the DELETE runs
+- delete(...).returning(...) : 'DELETE ... RETURNING seat_id' removes the expired holds of the locked seats and gives back
+  which seats they were holding (expires_at is checked again: a refresh may have moved it while we waited)
+- cte : a WITH clause; the DELETE runs as a step of the UPDATE below, so both happen in a single statement (two round trips in all)
+- update(...) : sets the released seats back to "available" (only the ones still "on_hold")
+- synchronize_session=False : the statements run in the database only; no ORM objects are loaded into the session
+- record_seat_change : the released seats are announced per event (seat index + live seat streams) once the transaction commits
+"""
+
+holds_expired = Counter("holds_expired_total", "Expired holds whose seat was released", labelnames=("source",))
+
+
+def expire_holds(db, event_id: int = None, hold_ids: list = None, source: str = "sweep") -> int:
     """
     Remove expired holds and update seat status to "available"
+    - event_id: optional filter to expire only the holds of one event
+    - hold_ids: optional filter to expire only these holds (used by the expiry scheduler to work in batches)
+    - source: the "source" label of holds_expired_total ("scheduler" for its batches, "resync" for its sweeps)
+    - Returns the number of seats released (commits when any hold was removed)
     """
 
     # Get current UTC time for comparison
     now = datetime.now(timezone.utc)
 
-    # Query Holds and JOIN Seats to access event_id
-    # Filter: select only holds where expiration time (<=) now
-    q = db.query(models.Hold).join(models.Seat).filter(models.Hold.expires_at <= now)
-    
-    # optional filter if event_id is provided
+    # Lock the seats of the expired holds first (same order as the reserve/cancel paths)
+    # (matching event_id too: with per-event partitions the seat is found in its own event's partition)
+    locked = (select(models.Seat.id)
+              .join(models.Hold, (models.Hold.seat_id == models.Seat.id) & (models.Hold.event_id == models.Seat.event_id))
+              .where(models.Hold.expires_at <= now)
+              .order_by(models.Seat.id)
+              .with_for_update(of=models.Seat))
+
+    # optional filter if event_id is provided (lets the planner skip the other events' partitions)
+    if event_id:
+        locked = locked.where(models.Seat.event_id == event_id, models.Hold.event_id == event_id)
+
+    if hold_ids is not None:
+        locked = locked.where(models.Hold.id.in_(hold_ids))
+
+    seat_ids = db.execute(locked).scalars().all()
+    if not seat_ids:
+        return 0
+
+    # Filter: only the holds of the locked seats that are still expired
+    expired = (delete(models.Hold)
+               .where(models.Hold.seat_id.in_(seat_ids), models.Hold.expires_at <= now)
+               .returning(models.Hold.seat_id, models.Hold.event_id)
+               .cte("expired_holds"))
+
+    # set seat status to available only if it was "on_hold"
+    stmt = (update(models.Seat)
+            .where(models.Seat.id == expired.c.seat_id, models.Seat.event_id == expired.c.event_id, models.Seat.status == "on_hold")
+            .values(status="available")
+            .returning(models.Seat.id, models.Seat.event_id)
+            .execution_options(synchronize_session=False))
     if event_id:
-        q = q.filter(models.Seat.event_id == event_id)
-    
-    # execute query and fetch all expired holds
-    expired = q.all()
-
-    # process expired holds
-    for h in expired:
-        seat = h.seat
-        db.delete(h) # delete hold
-
-        # set seat status  to available only if it was "on_hold"
-        if seat and seat.status == "on_hold":
-            seat.status = "available"
-    if expired:
-        db.commit() 
\ No newline at end of file
+        stmt = stmt.where(models.Seat.event_id == event_id)
+
+    released = db.execute(stmt).all()
+    seat_ids_by_event = {}
+    for seat_id, seat_event_id in released:
+        seat_ids_by_event.setdefault(seat_event_id, []).append(seat_id)
+    for seat_event_id, released_seat_ids in seat_ids_by_event.items():
+        record_seat_change(db, seat_event_id, released_seat_ids, "available")
+    # commit even when no seat was released: the deleted holds (e.g. of seats already reserved) and the seat locks go with it
+    db.commit()
+    holds_expired.labels(source).inc(len(released))
+    return len(released)
@@ -0,0 +1,58 @@
+import json
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError: # optional: the stdlib encoder gives the same JSON, only slower
+    orjson = None
+
+"""
+Understanding the fast JSON path (list endpoints)
+- response_model=List[Schema] with ORM objects makes FastAPI load one ORM object per row, then validate and convert
+  each one through Pydantic before encoding: on a 1000-seat page that is most of the request's CPU time
+- Instead, the list routes select only the schema's columns (schema_columns: plain tuples, no ORM identity map),
+  zip them with the schema's field names and encode the list in one call with orjson
+- The JSON is the same as before (field names and order from the schema, datetimes as ISO 8601 with 'Z' for UTC);
+  tests check it against the Pydantic schemas once instead of every request paying for it
+- response_model stays on the routes, so the OpenAPI docs don't change
+- iso_datetime : the same timestamp format for the bodies built by hand (the hold routes), one format for the whole API
+"""
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def iso_datetime(value: datetime) -> str:
+    # a datetime the way Pydantic (and orjson with OPT_UTC_Z) writes it: ISO 8601, 'Z' for UTC
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def _default(value):
+    # stdlib fallback: datetimes the way Pydantic writes them
+    if isinstance(value, datetime):
+        return iso_datetime(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def schema_columns(model, schema) -> list:
+    """
+    The model columns behind a response schema, in the schema's field order (for select(...))
+    """
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_body(schema, rows) -> bytes:
+    """
+    JSON list of rows selected with schema_columns(), shaped like List[schema]
+    """
+    fields = tuple(schema.model_fields)
+    return dumps([dict(zip(fields, row)) for row in rows])
+
+
+def row_body(schema, row) -> bytes:
+    return dumps(dict(zip(schema.model_fields, row)))
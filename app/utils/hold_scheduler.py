@@ -0,0 +1,159 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from .. import models
+from ..database import SessionLocal
+from .expire_holds import expire_holds, holds_expired
+from .metrics import Gauge, Histogram
+
+"""
+Understanding the hold expiry scheduler
+- heapq : a min-heap of (expires_at, hold_id); the hold that expires first is always at heap[0]
+- threading.Condition : the worker sleeps until the next deadline, and wakes up earlier when a sooner hold is scheduled or on shutdown
+- batch : all due holds (up to HOLD_EXPIRY_BATCH_SIZE) are released with one set-based expire_holds call
+- resync : holds created by other processes are not in this heap, so every HOLD_EXPIRY_RESYNC_SECONDS
+  the scheduler sweeps all expired holds and reloads the deadlines due within the next two windows (a hold expiring
+  just after the next resync is already in the heap); later ones come with a later resync, so each reload reads one
+  index range on expires_at instead of every hold in the table
+- lag : how late (in seconds) a hold was released after its expires_at
+- per event : a batch is released with one expire_holds call per event, so each DELETE/UPDATE names its event
+  (one partition when PARTITION_BY_EVENT=1)
+"""
+
+logger = logging.getLogger(__name__)
+
+HOLD_EXPIRY_BATCH_SIZE = int(os.getenv("HOLD_EXPIRY_BATCH_SIZE", "500"))
+HOLD_EXPIRY_RESYNC_SECONDS = float(os.getenv("HOLD_EXPIRY_RESYNC_SECONDS", "30"))
+
+holds_pending = Gauge("hold_expiry_pending", "Holds waiting for their expiration in this process")
+expiry_lag = Histogram("hold_expiry_lag_seconds", "Delay between a hold's expires_at and its release")
+last_expiry_lag = Gauge("hold_expiry_last_lag_seconds", "Lag of the most recent expiry batch")
+
+
+class HoldExpiryScheduler:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self._heap = [] # (expires_at timestamp, hold_id)
+        self._scheduled = {} # hold_id -> expires_at timestamp (latest one wins, older heap entries are skipped)
+        self._events = {} # hold_id -> event_id
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._next_resync = 0.0
+
+    def start(self):
+        """
+        Start the worker thread (called once on app startup)
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="hold-expiry-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Wake the worker up and wait for it to finish (called on app shutdown)
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def schedule(self, hold_id: int, expires_at, event_id: int = None):
+        """
+        Register (or move) the deadline of a hold
+        - expires_at: timezone-aware datetime from the Hold row
+        - event_id: the hold's event (None = unknown, released by a query over every event)
+        """
+        deadline = expires_at.timestamp()
+        with self._cond:
+            if self._scheduled.get(hold_id) == deadline:
+                return
+            self._scheduled[hold_id] = deadline
+            self._events[hold_id] = event_id
+            heapq.heappush(self._heap, (deadline, hold_id))
+            holds_pending.set(len(self._scheduled))
+            # only wake the worker if this hold is now the next one to expire
+            if self._heap[0][1] == hold_id:
+                self._cond.notify()
+
+    def stats(self) -> dict:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "pending": holds_pending.snapshot(),
+            "seats_released": sum(holds_expired.labels(source).snapshot() for source in ("scheduler", "resync")),
+            "last_lag_seconds": last_expiry_lag.snapshot(),
+            "lag_seconds": expiry_lag.snapshot(),
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and self._seconds_until_next_wakeup() > 0:
+                    self._cond.wait(self._seconds_until_next_wakeup())
+                if self._stopping:
+                    return
+                batch = self._pop_due()
+
+            try:
+                if batch:
+                    self._release(batch)
+                if time.monotonic() >= self._next_resync:
+                    self._resync()
+            except Exception:
+                logger.exception("hold expiry scheduler iteration failed")
+                self._next_resync = time.monotonic() + HOLD_EXPIRY_RESYNC_SECONDS
+
+    def _seconds_until_next_wakeup(self) -> float:
+        until_resync = self._next_resync - time.monotonic()
+        if not self._heap:
+            return until_resync
+        return min(self._heap[0][0] - time.time(), until_resync)
+
+    def _pop_due(self) -> list:
+        now = time.time()
+        batch = []
+        while self._heap and self._heap[0][0] <= now and len(batch) < HOLD_EXPIRY_BATCH_SIZE:
+            deadline, hold_id = heapq.heappop(self._heap)
+            if self._scheduled.get(hold_id) != deadline:
+                continue # stale entry: the hold was refreshed and has a newer deadline
+            del self._scheduled[hold_id]
+            batch.append((deadline, hold_id))
+        holds_pending.set(len(self._scheduled))
+        return batch
+
+    def _release(self, batch: list):
+        lag = time.time() - batch[0][0] # the heap pops the oldest deadline first
+        hold_ids_by_event = {}
+        with self._cond:
+            for _, hold_id in batch:
+                # a hold refreshed since it was popped is scheduled again: keep its event for the next deadline
+                event_id = self._events.get(hold_id) if hold_id in self._scheduled else self._events.pop(hold_id, None)
+                hold_ids_by_event.setdefault(event_id, []).append(hold_id)
+        with self.session_factory() as db:
+            for event_id, hold_ids in hold_ids_by_event.items():
+                expire_holds(db, event_id=event_id, hold_ids=hold_ids, source="scheduler")
+            db.commit()
+        expiry_lag.observe(lag)
+        last_expiry_lag.set(lag)
+
+    def _resync(self):
+        self._next_resync = time.monotonic() + HOLD_EXPIRY_RESYNC_SECONDS
+        with self.session_factory() as db:
+            expire_holds(db, source="resync")
+            db.commit()
+            horizon = datetime.now(timezone.utc) + timedelta(seconds=2 * HOLD_EXPIRY_RESYNC_SECONDS)
+            pending = db.execute(select(models.Hold.id, models.Hold.expires_at, models.Hold.event_id)
+                                 .where(models.Hold.expires_at <= horizon)).all()
+        for hold_id, expires_at, event_id in pending:
+            self.schedule(hold_id, expires_at, event_id)
+
+
+hold_scheduler = HoldExpiryScheduler()
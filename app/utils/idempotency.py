@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from starlette.routing import Match
+from .metrics import Counter, Gauge
+
+"""
+Understanding the idempotency keys (hold and reservation creation)
+- A client sends 'Idempotency-Key: <unique value>' with a POST it may retry (e.g. after a timeout); every retry
+  with the same key gets the first attempt's response (status, headers, body) replayed from memory, marked with
+  'Idempotent-Replayed: true': no seat lock, no query, no confusing 409 for a seat the client itself just took
+- Scope : a key belongs to one caller (a digest of the Authorization header) and one request; the same key with a
+  different method, path or body is refused with 422
+- Coalescing : a duplicate arriving while the first one is still running waits for it (asyncio Future) instead
+  of running the lock-and-write path a second time; if the first one fails (5xx or exception) nothing is stored
+  and one of the waiters runs the request instead
+- What is stored : 2xx and the 4xx a retry would get again (400, 404, 422...); answers that depend on when or with
+  which credentials the request came (401, 403, 408, 409, 425, 428, 429: e.g. no queue ticket yet, Retry-After)
+  aren't, so the retry runs again instead of replaying them
+- Store : per process, at most IDEMPOTENCY_CACHE_SIZE responses, each kept IDEMPOTENCY_TTL_SECONDS; entries are
+  kept in insertion order, so the expired ones are always at the front and are purged from there
+  (a retry that reaches another API process runs again and gets the usual 409)
+- Only the routes in IDEMPOTENT_ROUTES (POST hold / reservation creation) use it; other requests go straight through
+"""
+
+IDEMPOTENCY_KEYS = os.getenv("IDEMPOTENCY_KEYS", "1") == "1"
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+
+KEY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+# 4xx answers a retry may not get again: never replayed
+TRANSIENT_STATUSES = frozenset({401, 403, 408, 409, 425, 428, 429})
+
+# POST paths whose responses are kept for replay
+IDEMPOTENT_ROUTES = re.compile(r"^/events/\d+/(seats/\d+/(hold|reservation)|holds(/best-available)?)/?$")
+
+replays = Counter("idempotency_replays_total", "Requests answered with the stored response of an earlier one with the same Idempotency-Key")
+coalesced = Counter("idempotency_coalesced_total", "Requests that waited for an in-flight request with the same Idempotency-Key")
+stored_responses = Gauge("idempotency_stored_responses", "Responses kept for Idempotency-Key replays")
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str # digest of method, path, query string and body
+    status: int
+    headers: list # [(name, value)] as bytes, like the ASGI message
+    body: bytes
+    expires_at: float # time.monotonic()
+
+
+class IdempotencyStore:
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL_SECONDS, max_size: int = IDEMPOTENCY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._responses = OrderedDict() # key -> StoredResponse, oldest first
+        self._in_flight = {} # key -> (fingerprint, Future resolved when the first request finishes)
+        self._lock = threading.Lock()
+
+    def begin(self, key: str, fingerprint: str):
+        """
+        Decide what a request with this key does: ("replay", StoredResponse), ("wait", Future),
+        ("conflict", None) when the key was used for another request, or ("run", None) (then call finish())
+        """
+        with self._lock:
+            self._purge()
+            stored = self._responses.get(key)
+            if stored is not None:
+                return ("replay", stored) if stored.fingerprint == fingerprint else ("conflict", None)
+            running = self._in_flight.get(key)
+            if running is not None:
+                return ("wait", running[1]) if running[0] == fingerprint else ("conflict", None)
+            self._in_flight[key] = (fingerprint, asyncio.get_running_loop().create_future())
+            return "run", None
+
+    def finish(self, key: str, stored: StoredResponse = None):
+        """
+        The first request is done: keep its response (None = don't, e.g. a 5xx) and wake the waiters
+        """
+        with self._lock:
+            _, done = self._in_flight.pop(key)
+            if stored is not None:
+                self._responses[key] = stored
+                while len(self._responses) > self.max_size:
+                    self._responses.popitem(last=False)
+            stored_responses.set(len(self._responses))
+        if not done.done():
+            done.set_result(stored)
+
+    def _purge(self):
+        # every entry lives the same TTL, so the expired ones are at the front
+        now = time.monotonic()
+        while self._responses:
+            key, stored = next(iter(self._responses.items()))
+            if stored.expires_at > now:
+                break
+            del self._responses[key]
+        stored_responses.set(len(self._responses))
+
+    def clear(self):
+        with self._lock:
+            self._responses.clear()
+            stored_responses.set(0)
+
+
+idempotency_store = IdempotencyStore()
+
+
+def header(scope, name: bytes):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def resolve_route(scope):
+    # answers sent before the router ran: find the route anyway, so the metrics label them with its template
+    for route in scope["app"].router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            scope.update(child_scope)
+            return
+
+
+def is_replayable(status: int) -> bool:
+    return 200 <= status < 300 or (400 <= status < 500 and status not in TRANSIENT_STATUSES)
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def send_json(send, status: int, body: bytes, headers: list = ()):
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *headers]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, store: IdempotencyStore = idempotency_store):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not IDEMPOTENT_ROUTES.match(scope["path"]):
+            return await self.app(scope, receive, send)
+        raw_key = header(scope, KEY_HEADER)
+        if raw_key is None:
+            return await self.app(scope, receive, send)
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            return await send_json(send, 400, b'{"detail":"Invalid Idempotency-Key"}')
+
+        body = await read_body(receive)
+        caller = header(scope, b"authorization") or b""
+        key = hashlib.sha256(caller + b"\0" + raw_key).hexdigest()
+        fingerprint = hashlib.sha256(b"\0".join([scope["method"].encode(), scope["path"].encode(),
+                                                  scope.get("query_string", b""), body])).hexdigest()
+
+        while True:
+            action, value = self.store.begin(key, fingerprint)
+            if action == "replay":
+                replays.inc()
+                resolve_route(scope)
+                return await self.replay(send, value)
+            if action == "conflict":
+                resolve_route(scope)
+                return await send_json(send, 422, b'{"detail":"Idempotency-Key already used for a different request"}')
+            if action == "run":
+                return await self.run(scope, body, receive, send, key, fingerprint)
+            coalesced.inc()
+            await asyncio.shield(value) # then replay it, or run it if the first attempt stored nothing
+
+    async def run(self, scope, body: bytes, receive, send, key: str, fingerprint: str):
+        sent_body = False
+        response = {"status": 500, "headers": [], "body": []}
+
+        async def receive_wrapper():
+            # the body was already read (for the fingerprint): hand it over once, then pass through (disconnects)
+            nonlocal sent_body
+            if sent_body:
+                return await receive()
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+            if is_replayable(response["status"]):
+                stored = StoredResponse(fingerprint, response["status"], response["headers"], b"".join(response["body"]),
+                                        time.monotonic() + self.store.ttl)
+        finally:
+            self.store.finish(key, stored)
+
+    @staticmethod
+    async def replay(send, stored: StoredResponse):
+        await send({"type": "http.response.start", "status": stored.status,
+                    "headers": stored.headers + [(REPLAYED_HEADER, b"true")]})
+        await send({"type": "http.response.body", "body": stored.body})
@@ -0,0 +1,164 @@
+import threading
+from bisect import bisect_left
+
+"""
+Understanding the metrics helpers
+- Counter : a value that only goes up (e.g. how many seats were released)
+- Gauge : a value that can go up and down (e.g. how many holds are waiting to expire)
+- Histogram : counts observations into buckets (e.g. how late each expiration happened)
+- REGISTRY : every metric created here is registered by name, so any endpoint can report all of them
+- threading.Lock : routes run in a threadpool, so updates are protected against concurrent writes
+- labels : a metric created with labelnames keeps one child per combination of label values
+  (e.g. request latency per method and route); metric.labels("GET", "/events/") returns that child
+- render_prometheus() : every registered metric in the Prometheus text format (served at GET /metrics)
+"""
+
+REGISTRY = {}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._children = {} # label values -> child metric (only when labelnames is set)
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry[name] = self
+
+    def new_child(self):
+        return type(self)(self.name, self.description, registry=None)
+
+    def labels(self, *values):
+        """
+        The child metric for these label values (in labelnames order), created on first use
+        """
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self.new_child())
+        return child
+
+    def children(self) -> dict:
+        return dict(self._children)
+
+    def labeled_snapshot(self):
+        # {"method=GET,route=/events/": snapshot, ...} for labeled metrics, the plain snapshot otherwise
+        if not self.labelnames:
+            return self.snapshot()
+        return {",".join(f"{k}={v}" for k, v in zip(self.labelnames, values)): child.snapshot()
+                for values, child in self.children().items()}
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames=(), registry=REGISTRY):
+        super().__init__(name, description, labelnames, registry)
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labelnames=(), registry=REGISTRY):
+        super().__init__(name, description, labelnames, registry)
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def snapshot(self):
+        return self.value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, buckets=DEFAULT_BUCKETS, labelnames=(), registry=REGISTRY):
+        super().__init__(name, description, labelnames, registry)
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # last slot is "+Inf"
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def new_child(self):
+        return Histogram(self.name, self.description, self.buckets, registry=None)
+
+    def snapshot(self):
+        # cumulative counts per upper bound, like Prometheus histograms
+        cumulative, total = {}, 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        return {"buckets": cumulative, "count": self.count, "sum": self.sum}
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: list) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def format_value(value) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_samples(metric: Metric, labels: list) -> list:
+    if metric.kind != "histogram":
+        return [f"{metric.name}{format_labels(labels)} {format_value(metric.value)}"]
+    with metric._lock: # buckets, sum and count from the same moment
+        counts, total_sum, total_count = list(metric.counts), metric.sum, metric.count
+    lines, total = [], 0
+    for bound, count in zip(metric.buckets + (float("inf"),), counts):
+        total += count
+        lines.append(f"{metric.name}_bucket{format_labels(labels + [('le', format_value(float(bound)))])} {total}")
+    lines.append(f"{metric.name}_sum{format_labels(labels)} {format_value(total_sum)}")
+    lines.append(f"{metric.name}_count{format_labels(labels)} {total_count}")
+    return lines
+
+
+def render_prometheus(registry: dict = REGISTRY) -> str:
+    """
+    Every metric of the registry in the Prometheus text exposition format (version 0.0.4)
+    """
+    lines = []
+    for metric in list(registry.values()):
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        if not metric.labelnames:
+            lines.extend(render_samples(metric, []))
+            continue
+        for values, child in sorted(metric.children().items()):
+            lines.extend(render_samples(child, list(zip(metric.labelnames, values))))
+    return "\n".join(lines) + "\n"
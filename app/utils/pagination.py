@@ -0,0 +1,51 @@
+import base64
+import json
+from fastapi import HTTPException
+
+"""
+Understanding keyset pagination
+- Instead of OFFSET (which reads and skips every previous row), each page starts right after the last row
+  of the previous one: WHERE (sort key) > (last key) ORDER BY (sort key) LIMIT n, which an index answers directly
+- cursor : the last key of a page, encoded as an opaque URL-safe string; clients send it back as ?cursor=...
+- X-Next-Cursor : response header with the cursor of the next page (absent on the last page)
+- One extra row (limit + 1) is fetched to know whether a next page exists
+"""
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([v.isoformat() if hasattr(v, "isoformat") else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> list:
+    """
+    Decode a cursor into its key values, converting each one with the given types (e.g. int, datetime.fromisoformat)
+    - raises 400 for malformed cursors
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if len(values) != len(types):
+            raise ValueError("wrong cursor size")
+        return [convert(value) for convert, value in zip(types, values)]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+def paginate(rows: list, limit: int, response, key) -> list:
+    """
+    Trim the extra row and, if there is a next page, set its cursor header
+    - rows: up to limit + 1 rows in sort order
+    - key: function returning the sort key values of a row
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
+    return rows
+
+
+def cursor_headers(response) -> dict:
+    # the next-cursor header set by paginate(), for routes that build their own Response
+    cursor = response.headers.get(NEXT_CURSOR_HEADER)
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
@@ -0,0 +1,103 @@
+import argparse
+from sqlalchemy import text
+from ..database import PARTITION_BY_EVENT
+
+"""
+Understanding the per-event partitions (PARTITION_BY_EVENT=1, PostgreSQL)
+- seats, holds and reservations are LIST-partitioned by event_id: each event gets its own seats_event_<id>,
+  holds_event_<id> and reservations_event_<id> tables (with their own small indexes), created by generate_seats
+  in the create_event transaction
+- Partition pruning : a query with 'event_id = X' (every per-event route, the expiry of one event's holds) is planned
+  against that event's partitions only, so it never walks the B-trees of every other event
+- A partition is built detached (CREATE TABLE ... LIKE), then ATTACHed: the parent only takes a SHARE UPDATE EXCLUSIVE
+  lock, so reads and writes of other events go on (attaching the holds/reservations partitions also checks their
+  reference to seats, which briefly blocks seat writes until create_event commits)
+- Detach : when an event is over, detach_event_partitions() takes its rows out of the shared tables without copying
+  or deleting anything (DETACH PARTITION is a catalog change); the detached tables stay as an archive, or are dropped
+- The primary keys include event_id ((id, event_id)) because PostgreSQL only enforces keys containing the partition key
+- Changing PARTITION_BY_EVENT doesn't convert an existing database: the tables are partitioned when create_all() creates them
+"""
+
+PARTITIONED_TABLES = ("seats", "holds", "reservations") # holds and reservations reference seats: attached after it
+
+
+def partition_name(table: str, event_id: int) -> str:
+    return f"{table}_event_{int(event_id)}"
+
+
+def create_event_partitions(connection, event_id: int):
+    """
+    Create and attach the partitions of one event (inside the caller's transaction)
+    - connection: a SQLAlchemy Connection (or Session) on PostgreSQL
+    - the DDL is sent as one DO block: one round trip for the 12 statements, and a single statement for asyncpg
+      (which prepares every statement and refuses several commands in one)
+    """
+    event_id = int(event_id)
+    statements = []
+    for table in PARTITIONED_TABLES:
+        name = partition_name(table, event_id)
+        statements += [
+            f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)",
+            # lets ATTACH skip the scan that proves every row belongs to the partition; redundant afterwards
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_event_id CHECK (event_id = {event_id})",
+            f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES IN ({event_id})",
+            f"ALTER TABLE {name} DROP CONSTRAINT {name}_event_id",
+        ]
+    connection.execute(text("DO $$ BEGIN\n" + "".join(f"{statement};\n" for statement in statements) + "END $$"))
+
+
+def detach_event_partitions(connection, event_id: int, drop: bool = False, concurrently: bool = False) -> list:
+    """
+    Take one event's rows out of seats, holds and reservations; returns the detached (or dropped) table names
+    - concurrently: DETACH PARTITION ... CONCURRENTLY (PostgreSQL 14+), which doesn't block queries on the parent tables;
+      it can't run inside a transaction block, so pass an AUTOCOMMIT connection
+    - the detached tables are a standalone archive: their foreign keys (to events, and to seats, which would pin the
+      detached seats to the parent) and id default (the parent's sequence) are dropped
+    - an event detached earlier is skipped, or only dropped with drop=True
+    """
+    event_id = int(event_id)
+    detached = []
+    for table in reversed(PARTITIONED_TABLES): # referencing tables first
+        name = partition_name(table, event_id)
+        if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+            continue
+        attached = connection.execute(text("SELECT 1 FROM pg_inherits WHERE inhrelid = CAST(:name AS regclass) "
+                                           "AND inhparent = CAST(:table AS regclass)"), {"name": name, "table": table}).scalar()
+        if attached:
+            connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}{' CONCURRENTLY' if concurrently else ''}"))
+            references = connection.execute(text("SELECT conname FROM pg_constraint WHERE conrelid = CAST(:name AS regclass) "
+                                                 "AND contype = 'f'"), {"name": name}).scalars().all()
+            for constraint in references:
+                connection.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"'))
+            connection.execute(text(f"ALTER TABLE {name} ALTER COLUMN id DROP DEFAULT"))
+        elif not drop:
+            continue
+        if drop:
+            connection.execute(text(f"DROP TABLE {name}"))
+        detached.append(name)
+    return detached
+
+
+def main():
+    # python -m app.utils.partitioning detach <event_id> [--drop] [--concurrently]
+    from ..database import engine
+    parser = argparse.ArgumentParser(description="Detach the partitions of a past event (PARTITION_BY_EVENT=1)")
+    parser.add_argument("command", choices=["detach"])
+    parser.add_argument("event_id", type=int)
+    parser.add_argument("--drop", action="store_true", help="drop the detached tables instead of keeping them as an archive")
+    parser.add_argument("--concurrently", action="store_true", help="don't block queries on the parent tables (PostgreSQL 14+)")
+    args = parser.parse_args()
+
+    if not PARTITION_BY_EVENT:
+        parser.error("PARTITION_BY_EVENT is not set")
+    if args.concurrently:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            tables = detach_event_partitions(connection, args.event_id, args.drop, concurrently=True)
+    else:
+        with engine.begin() as connection:
+            tables = detach_event_partitions(connection, args.event_id, args.drop)
+    print(("dropped: " if args.drop else "detached: ") + (", ".join(tables) or "nothing"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from . import security
+from .metrics import Gauge, Counter, Histogram
+
+"""
+Understanding the password hashing pool
+- bcrypt is deliberately slow (about 0.25s of CPU per hash at cost 12); run inside the API process it holds
+  the GIL and a request thread for that long, so a login spike starves every other request
+- ProcessPoolExecutor : hashing and verification run in separate worker processes (PASSWORD_HASH_WORKERS),
+  each with its own interpreter and GIL; the request thread only waits for the result
+- spawn : workers start as fresh interpreters instead of forking this (multi-threaded) process
+- BoundedSemaphore : at most PASSWORD_HASH_CONCURRENCY operations are queued or running in the pool; further
+  requests wait up to PASSWORD_HASH_QUEUE_TIMEOUT seconds for a slot, then get a 503 instead of piling up
+- queue depth : requests waiting for a slot (password_hash_queue_depth), plus in-flight operations
+"""
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(PASSWORD_HASH_WORKERS * 2)))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+
+queue_depth = Gauge("password_hash_queue_depth", "Password operations waiting for a free slot in the hashing pool")
+in_flight = Gauge("password_hash_in_flight", "Password operations queued or running in the hashing pool")
+rejected = Counter("password_hash_rejected_total", "Password operations rejected because the hashing pool was full")
+duration = Histogram("password_hash_seconds", "Time to hash or verify a password, including the wait for a slot")
+
+
+class PasswordHashPool:
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, concurrency: int = PASSWORD_HASH_CONCURRENCY,
+                 queue_timeout: float = PASSWORD_HASH_QUEUE_TIMEOUT):
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # created on first use, so importing the app (or running tests that never log in) starts no processes
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def run(self, fn, *args):
+        """
+        Run fn(*args) in a worker process and return its result (blocks the calling thread, not the CPU)
+        - raises 503 if no slot frees up within queue_timeout
+        """
+        start = time.perf_counter()
+        queue_depth.inc()
+        try:
+            acquired = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            queue_depth.dec()
+        if not acquired:
+            rejected.inc()
+            raise HTTPException(status_code=503, detail="Too many login attempts, try again shortly", headers={"Retry-After": "1"})
+
+        in_flight.inc()
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            in_flight.dec()
+            self._slots.release()
+            duration.observe(time.perf_counter() - start)
+
+    def hash(self, password: str) -> str:
+        return self.run(security.get_password_hash, password)
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self.run(security.verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": queue_depth.snapshot(),
+            "in_flight": in_flight.snapshot(),
+            "rejected": rejected.snapshot(),
+            "seconds": duration.snapshot(),
+        }
+
+
+password_pool = PasswordHashPool()
@@ -0,0 +1,78 @@
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from .metrics import Counter, Gauge, Histogram
+
+"""
+Understanding the pool statistics
+- QueuePool : SQLAlchemy's default pool; keeps up to pool_size idle connections and opens up to max_overflow extra ones
+- _do_get : the pool method that waits for a free connection; timing it gives the checkout wait time
+  (the 'checkout' pool event only fires after a connection was obtained, so it can't see the wait)
+- checkout / checkin events : mark when a request takes and gives back a connection (how long connections are held)
+- checkedout / checkedin / overflow : live counters kept by the pool itself
+"""
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+checkout_wait = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a free pooled connection", WAIT_BUCKETS)
+connection_held = Histogram("db_pool_connection_held_seconds", "Time a connection stays checked out", WAIT_BUCKETS)
+checkout_timeouts = Counter("db_pool_checkout_timeouts_total", "Checkouts that gave up after pool_timeout")
+pool_connections = Gauge("db_pool_connections", "Pooled connections by pool and state (set when metrics are read)", labelnames=("pool", "state"))
+
+
+class TimedPoolMixin:
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            checkout_timeouts.inc()
+            raise
+        finally:
+            checkout_wait.observe(time.perf_counter() - start)
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def track_connection_hold_time(engine):
+    """
+    Register the checkout/checkin listeners on an engine's pool
+    """
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            connection_held.observe(time.perf_counter() - checked_out_at)
+
+
+def pool_status(pool, max_overflow: int) -> dict:
+    """
+    Live state of a QueuePool: connections in use, idle and opened beyond pool_size
+    - max_overflow: the configured value (POOL_OPTIONS), which the pool keeps only in a private attribute
+    """
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0), # negative while the pool hasn't opened pool_size connections yet
+        "max_overflow": max_overflow,
+        "timeout_s": pool.timeout(),
+    }
+
+
+def export_pool_status(name: str, pool, max_overflow: int):
+    # copy the live pool state into the db_pool_connections gauge (called before the metrics are exported)
+    status = pool_status(pool, max_overflow)
+    for state in ("checked_out", "idle", "overflow"):
+        pool_connections.labels(name, state).set(status[state])
@@ -0,0 +1,110 @@
+import os
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .metrics import Gauge, Histogram
+
+"""
+Understanding the request metrics
+- RequestMetricsMiddleware : a plain ASGI middleware (no BaseHTTPMiddleware, so no extra task or body copy per request)
+  that times every HTTP request and counts the requests in flight
+- route label : the route template ("/events/{event_id}/seats/"), not the raw path, so there is one series per
+  endpoint instead of one per seat ID; requests that match no route are reported as "<unmatched>"
+- DB timing : before/after_cursor_execute engine events time every statement; the time and count are also added
+  to the current request's RequestStats (a ContextVar, copied into the threadpool that runs sync routes)
+- overhead : a few perf_counter() calls and lock-protected increments per request and per statement
+- REQUEST_METRICS=0 turns the middleware off (the engine events then only feed db_query_duration_seconds)
+- Streaming responses (seat status streams) are timed until the stream ends
+"""
+
+REQUEST_METRICS = os.getenv("REQUEST_METRICS", "1") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests being handled right now")
+request_duration = Histogram("http_request_duration_seconds", "Time to handle an HTTP request, by method, route and status",
+                             LATENCY_BUCKETS, labelnames=("method", "route", "status"))
+query_duration = Histogram("db_query_duration_seconds", "Time of each SQL statement (cursor execute)", QUERY_BUCKETS)
+request_queries = Histogram("db_queries_per_request", "SQL statements run by one HTTP request, by route",
+                            COUNT_BUCKETS, labelnames=("route",))
+request_query_time = Histogram("db_query_seconds_per_request", "Time spent in SQL statements by one HTTP request, by route",
+                               LATENCY_BUCKETS, labelnames=("route",))
+
+
+class RequestStats:
+    # SQL statements run while handling one request
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+current_request = ContextVar("current_request", default=None)
+
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500 # if the app raises before sending a response
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            requests_in_flight.dec()
+            current_request.reset(token)
+            route = route_template(scope)
+            request_duration.labels(scope["method"], route, str(status)).observe(elapsed)
+            request_queries.labels(route).observe(stats.queries)
+            request_query_time.labels(route).observe(stats.query_seconds)
+
+
+# Registered on the Engine class: every engine (sync, the async one's sync_engine, test engines) is timed
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started_at")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    query_duration.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _drop_failed_statement(exception_context):
+    # a failed statement never reaches after_cursor_execute: forget its start time
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        connection.info["query_started_at"].pop()
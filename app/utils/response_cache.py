@@ -0,0 +1,196 @@
+import hashlib
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple
+from fastapi import Response
+from .fast_json import JSON_MEDIA_TYPE
+
+"""
+Understanding the conditional GET cache (ETag / If-None-Match)
+- version : a number per event, replaced by a new one on every seat transition of the event (hold, cancel,
+  reserve, expire), right after the commit or when another process's change arrives (seat_events.apply_change)
+- the numbers come from one process-wide counter, so they only grow and are never reused (not even for an
+  event that was dropped from the cache and comes back)
+- ETag : W/"<process>-<version>-<variant>"; variant is a digest of what else shapes the body (format, status
+  filter, cursor, limit), so each URL/representation has its own tag; <process> is random per process, so a
+  tag from another process (or from before a restart) never matches
+- If-None-Match with the current tag : 304 Not Modified from memory, without touching the database
+- bytes cache : the last body of each variant (up to RESPONSE_CACHE_VARIANTS per event, RESPONSE_CACHE_SIZE events, LRU),
+  served as is while the version doesn't change: no query, no Pydantic, no JSON encoding
+- CATALOG : the key of the event list (GET /events/), bumped when an event is created here
+- a miss leaves an empty entry with a version (not yet checked against the database) before the body is read, so a
+  change committed while the body is built replaces that version and the body isn't kept; an entry evicted or
+  cleared meanwhile isn't kept either (store() only trusts the exact version lookup() returned); the LRU size is
+  enforced when a body is stored, and a 404 drops the empty entry (discard), so unknown IDs can't evict cached events
+- RESPONSE_CACHE_TTL_SECONDS : a version is trusted that long after it was last checked against the database; after that
+  the next request reloads, and the version is only replaced if the body changed (so clients keep their 304s).
+  It bounds staleness for changes this process can't hear about (SEAT_EVENTS_LISTENER=0, event created by another process)
+- RESPONSE_CACHE=0 turns it off (every GET reloads, no ETag)
+"""
+
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "1") == "1"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+RESPONSE_CACHE_VARIANTS = int(os.getenv("RESPONSE_CACHE_VARIANTS", "16"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+
+CATALOG = "events" # cache key of the event list
+CACHE_CONTROL = "no-cache" # clients may keep the body but must revalidate it (If-None-Match) before using it
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    media_type: str
+    headers: dict # extra response headers, e.g. X-Next-Cursor
+
+
+class CacheEntry:
+    __slots__ = ("version", "checked_at", "bodies")
+
+    def __init__(self, version: int):
+        self.version = version
+        self.checked_at = None # last time the version was known to match the database (None: not yet)
+        self.bodies = OrderedDict() # variant -> CachedBody
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL_SECONDS, size: int = RESPONSE_CACHE_SIZE,
+                 variants: int = RESPONSE_CACHE_VARIANTS):
+        self.ttl = ttl
+        self.size = size
+        self.variants = variants
+        self.process = uuid.uuid4().hex[:8]
+        self._versions = itertools.count(1)
+        self._entries = OrderedDict() # key (event ID or CATALOG) -> CacheEntry, least recently used first
+        self._lock = threading.Lock()
+
+    def etag(self, version: int, variant: str) -> str:
+        digest = hashlib.blake2b(variant.encode(), digest_size=4).hexdigest()
+        return f'W/"{self.process}-{version}-{digest}"'
+
+    def lookup(self, key, variant: str):
+        """
+        Return (version, fresh, cached body) for a key and variant
+        - a key that isn't cached gets an empty entry: its version is what store() checks the body against
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # not counted against the size until store() keeps a body: a key that turns out not to exist
+                # (404, see discard()) never evicts a cached one
+                entry = self._entries[key] = CacheEntry(next(self._versions))
+                return entry.version, False, None
+            self._entries.move_to_end(key)
+            fresh = entry.checked_at is not None and time.monotonic() - entry.checked_at < self.ttl
+            return entry.version, fresh, entry.bodies.get(variant)
+
+    def store(self, key, variant: str, seen_version, cached: CachedBody) -> int:
+        """
+        Keep a body built from the database and return the version to tag it with
+        - seen_version: what lookup() returned before the database was read
+        - a version that changed meanwhile (or an entry evicted or cleared meanwhile) means the body may or may not
+          include that change: it isn't kept, and gets a throwaway version so its tag never matches later
+        - a stale entry (older than the TTL) keeps its version only if the body is the same as the cached one
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != seen_version:
+                return next(self._versions)
+            if entry.checked_at is None:
+                entry.checked_at = time.monotonic() # first body since lookup() created the entry, no change in between
+            elif time.monotonic() - entry.checked_at >= self.ttl:
+                if entry.bodies.get(variant) != cached:
+                    entry.version = next(self._versions)
+                    entry.bodies.clear()
+                entry.checked_at = time.monotonic()
+            entry.bodies[variant] = cached
+            entry.bodies.move_to_end(variant)
+            while len(entry.bodies) > self.variants:
+                entry.bodies.popitem(last=False)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+            return entry.version
+
+    def discard(self, key, seen_version):
+        """
+        The key doesn't exist (the route answered 404): drop the empty entry lookup() made for it
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == seen_version and entry.checked_at is None:
+                del self._entries[key]
+
+    def bump(self, key):
+        """
+        The data behind this key changed (committed): new version, cached bodies dropped
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return # no tag for it is valid, and no body being built can be kept (store() finds no entry)
+            entry.version = next(self._versions)
+            entry.checked_at = time.monotonic()
+            entry.bodies.clear()
+
+    def clear(self):
+        # forget everything (versions are never reused, so every tag handed out so far stops matching)
+        with self._lock:
+            self._entries.clear()
+
+    def cached_response(self, key, variant: str, if_none_match: str):
+        """
+        Answer a GET from memory when possible
+        - returns (response, seen_version): a 304 or the cached body, or None when the body must be built
+          (then call respond() with seen_version)
+        """
+        if not RESPONSE_CACHE:
+            return None, None
+        version, fresh, cached = self.lookup(key, variant)
+        if version is None or not fresh:
+            return None, version
+        etag = self.etag(version, variant)
+        if if_none_match and matches(if_none_match, etag):
+            return self.not_modified(etag), version
+        if cached is not None:
+            return self.make_response(cached, etag), version
+        return None, version
+
+    def respond(self, key, variant: str, seen_version, body: bytes, media_type: str = JSON_MEDIA_TYPE,
+                headers: dict = None, if_none_match: str = None) -> Response:
+        """
+        Build the response of a freshly loaded body, tagged with the key's version (and cache the bytes)
+        - still a 304 when the client's tag survived the reload (TTL check that found the same body)
+        """
+        cached = CachedBody(body, media_type, headers or {})
+        if not RESPONSE_CACHE:
+            return self.make_response(cached, None)
+        etag = self.etag(self.store(key, variant, seen_version, cached), variant)
+        if if_none_match and matches(if_none_match, etag):
+            return self.not_modified(etag)
+        return self.make_response(cached, etag)
+
+    @staticmethod
+    def not_modified(etag: str) -> Response:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+    @staticmethod
+    def make_response(cached: CachedBody, etag) -> Response:
+        headers = dict(cached.headers)
+        if etag:
+            headers.update({"ETag": etag, "Cache-Control": CACHE_CONTROL})
+        return Response(content=cached.body, media_type=cached.media_type, headers=headers)
+
+
+def matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison (RFC 9110): W/ prefixes are ignored; "*" matches any current representation
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import os
+import select as selectors
+import threading
+import time
+import uuid
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from .metrics import Counter, Gauge
+from .seat_index import seat_index
+from .response_cache import response_cache
+
+"""
+Understanding the seat status stream
+- Every seat status change is recorded with record_seat_change() inside the transaction that makes it:
+  - pg_notify(...) queues a NOTIFY that PostgreSQL delivers to the other processes only if the transaction commits
+  - the change is also kept in session.info; once the session commits (after_commit event) it is applied
+    to the local seat index and fanned out to this process's subscribers (a rollback discards it)
+- Fan-out : each subscriber (one open stream) has its own bounded asyncio.Queue; publishing never waits
+- Slow consumers : a subscriber whose queue is full is dropped (it gets a final 'dropped' event and should
+  reload the seat map and reconnect) so one slow viewer can't hold memory or delay the others
+- LISTEN : one background thread per process listens on SEAT_EVENTS_CHANNEL with a dedicated connection and
+  relays the other processes' changes, so N viewers cost one notification per change instead of N polls
+- origin : a random ID per process in every payload, so a process skips its own notifications
+"""
+
+logger = logging.getLogger(__name__)
+
+SEAT_EVENTS_CHANNEL = os.getenv("SEAT_EVENTS_CHANNEL", "seat_status")
+SEAT_EVENTS_QUEUE_SIZE = int(os.getenv("SEAT_EVENTS_QUEUE_SIZE", "100"))
+NOTIFY_CHUNK = 500 # seat IDs per NOTIFY payload (PostgreSQL limits payloads to 8000 bytes)
+
+ORIGIN = uuid.uuid4().hex[:12]
+PENDING_KEY = "pending_seat_changes"
+
+subscribers_gauge = Gauge("seat_events_subscribers", "Open seat status streams in this process")
+dropped_subscribers = Counter("seat_events_dropped_subscribers_total", "Streams closed because the client didn't keep up")
+changes_published = Counter("seat_events_published_total", "Seat status changes fanned out to local subscribers")
+notifications_received = Counter("seat_events_notifications_total", "Seat status changes received from other processes")
+
+DROPPED = object() # sentinel: the subscriber was too slow and must resync
+
+
+class Subscriber:
+    def __init__(self, broker, event_id: int, loop, max_size: int):
+        self.broker = broker
+        self.event_id = event_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_size)
+
+    def offer(self, message):
+        # runs on the subscriber's event loop
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(DROPPED)
+            self.broker.unsubscribe(self)
+            dropped_subscribers.inc()
+            return
+        self.queue.put_nowait(message)
+
+
+class SeatEventBroker:
+    def __init__(self, max_queue: int = SEAT_EVENTS_QUEUE_SIZE):
+        self.max_queue = max_queue
+        self._subscribers = {} # event_id -> set of Subscriber
+        self._lock = threading.Lock()
+
+    def subscribe(self, event_id: int) -> Subscriber:
+        subscriber = Subscriber(self, event_id, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(event_id, set()).add(subscriber)
+        subscribers_gauge.inc()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.event_id)
+            if not subscribers or subscriber not in subscribers:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.event_id]
+        subscribers_gauge.dec()
+
+    def publish(self, event_id: int, seat_ids: list, status: str):
+        """
+        Send a change to every local subscriber of the event (callable from any thread)
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(event_id, ()))
+        if not subscribers:
+            return
+        message = {"event_id": event_id, "seat_ids": list(seat_ids), "status": status}
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, message)
+            except RuntimeError: # the subscriber's loop is closed
+                self.unsubscribe(subscriber)
+        changes_published.inc()
+
+
+broker = SeatEventBroker()
+
+
+def apply_change(event_id: int, seat_ids: list, status: str):
+    # a committed change (from this process or another one): update the availability index, the event's
+    # response version (ETags) and the streams
+    seat_index.set_status(event_id, seat_ids, status)
+    response_cache.bump(event_id)
+    broker.publish(event_id, seat_ids, status)
+
+
+def notify_statements(event_id: int, seat_ids: list, status: str) -> list:
+    seat_ids = list(seat_ids)
+    statements = []
+    for i in range(0, len(seat_ids), NOTIFY_CHUNK):
+        payload = json.dumps({"o": ORIGIN, "e": event_id, "s": seat_ids[i:i + NOTIFY_CHUNK], "t": status}, separators=(",", ":"))
+        statements.append(select(func.pg_notify(SEAT_EVENTS_CHANNEL, payload)))
+    return statements
+
+
+def add_pending_change(session: Session, event_id: int, seat_ids: list, status: str):
+    session.info.setdefault(PENDING_KEY, []).append((event_id, list(seat_ids), status))
+
+
+def record_seat_change(db: Session, event_id: int, seat_ids: list, status: str):
+    """
+    Record that these seats change to 'status' in the current transaction (call it before commit)
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        for stmt in notify_statements(event_id, seat_ids, status):
+            db.execute(stmt)
+    add_pending_change(db, event_id, seat_ids, status)
+
+
+async def record_seat_change_async(db, event_id: int, seat_ids: list, status: str):
+    # same as record_seat_change, for an AsyncSession
+    if db.get_bind().dialect.name == "postgresql":
+        for stmt in notify_statements(event_id, seat_ids, status):
+            await db.execute(stmt)
+    add_pending_change(db.sync_session, event_id, seat_ids, status)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session):
+    for change in session.info.pop(PENDING_KEY, ()):
+        apply_change(*change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+class SeatEventListener:
+    """
+    Background thread: LISTEN on the channel and apply the changes committed by other processes
+    """
+
+    def __init__(self, engine, channel: str = SEAT_EVENTS_CHANNEL):
+        self.engine = engine
+        self.channel = channel
+        self._thread = None
+        self._stopping = threading.Event()
+        self._wake_r, self._wake_w = os.pipe() # written on stop() to interrupt the select() at once
+
+    def start(self):
+        if self.engine.dialect.name != "postgresql" or (self._thread and self._thread.is_alive()):
+            return
+        self._stopping.clear()
+        while selectors.select([self._wake_r], [], [], 0)[0]:
+            os.read(self._wake_r, 64) # discard wake-ups left by a previous stop()
+        self._thread = threading.Thread(target=self._run, name="seat-event-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        os.write(self._wake_w, b"x")
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("seat event listener failed, reconnecting")
+                # changes may have been missed while disconnected: reload the indexes from the database
+                seat_index.invalidate()
+                response_cache.clear()
+                self._stopping.wait(1.0)
+
+    def _listen(self):
+        connection = self.engine.raw_connection()
+        connection.detach() # a dedicated connection, not returned to the pool
+        try:
+            connection.dbapi_connection.autocommit = True
+            raw = connection.dbapi_connection
+            with raw.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            while not self._stopping.is_set():
+                readable, _, _ = selectors.select([raw, self._wake_r], [], [], 5.0)
+                if raw not in readable:
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    self._handle(raw.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+    def _handle(self, payload: str):
+        # a malformed payload is skipped: raising here would drop the LISTEN connection (and the whole seat index)
+        try:
+            change = json.loads(payload)
+            if change.get("o") == ORIGIN:
+                return # already applied locally after commit
+            event_id, seat_ids, status = change["e"], change["s"], change["t"]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logger.warning("skipping malformed seat event payload: %r", payload)
+            return
+        notifications_received.inc()
+        apply_change(event_id, seat_ids, status)
+
+
+def format_sse(name: str, data) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_seat_events(event_id: int, heartbeat: float = 15.0):
+    """
+    Server-Sent Events generator for one subscriber: one 'seats' event per change, a comment line as heartbeat
+    """
+    subscriber = broker.subscribe(event_id)
+    try:
+        yield format_sse("subscribed", {"event_id": event_id, "at": time.time()})
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is DROPPED:
+                yield format_sse("dropped", {"event_id": event_id, "detail": "too slow, reload the seat map and reconnect"})
+                return
+            yield format_sse("seats", message)
+    finally:
+        broker.unsubscribe(subscriber)
@@ -0,0 +1,34 @@
+from sqlalchemy import insert, select, func, literal
+from .. import models
+from ..database import PARTITION_BY_EVENT
+from .partitioning import create_event_partitions
+
+"""
+Understanding the bulk seat generation
+- insert(...).from_select(...) : builds a single 'INSERT INTO seats (...) SELECT ...' statement, so the database creates every row itself
+- generate_series : PostgreSQL function that returns the numbers 1..N as rows (one row per seat)
+- executemany : fallback for other databases; one INSERT statement sent with a list of parameters, without creating ORM objects
+- No 'models.Seat(...)' objects are created, so the session doesn't track (identity map) thousands of seats
+- PARTITION_BY_EVENT=1 : the event's seats/holds/reservations partitions are created first, in the same transaction
+"""
+
+
+def generate_seats(db, event_id: int, total_seats: int):
+    """
+    Create seats 1..total_seats for an event with one set-based statement
+    - db: SQLAlchemy Session (the caller commits)
+    - event_id: ID of an event already flushed to the database
+    - total_seats: how many seats to create
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        if PARTITION_BY_EVENT:
+            create_event_partitions(db, event_id)
+        number = func.generate_series(1, total_seats).column_valued("number")
+        stmt = insert(models.Seat).from_select(
+            ["number", "status", "event_id"],
+            select(number, literal("available", models.Seat.status.type), literal(event_id)),
+        )
+        db.execute(stmt)
+    else:
+        rows = [{"number": i, "status": "available", "event_id": event_id} for i in range(1, total_seats + 1)]
+        db.execute(insert(models.Seat), rows)
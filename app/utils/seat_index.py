@@ -0,0 +1,114 @@
+import os
+import threading
+from array import array
+import time
+from sqlalchemy import select
+from .. import models
+
+"""
+Understanding the seat availability index
+- One small map per event, kept in memory by each process: a bytearray with one byte per seat number
+  (0 = unknown, 1 = available, 2 = on_hold, 3 = reserved) plus the seat_id <-> position lookups
+- The same bytes are searched for runs of adjacent available seats (best-available allocation)
+- Routes check it before locking the seat row, so requests for seats that are already taken get
+  their 409 without a database round trip or a row lock
+- Every transition (hold, cancel, reserve, expire) updates it right after its commit
+- Changes made by other processes are not seen here, so a map is reloaded from the database after
+  SEAT_INDEX_TTL_SECONDS; a seat released elsewhere can be rejected for at most that long
+- generation : bumped on every update; a reload that raced with an update is discarded instead of
+  overwriting newer data with an older snapshot
+"""
+
+SEAT_INDEX_TTL_SECONDS = float(os.getenv("SEAT_INDEX_TTL_SECONDS", "2"))
+
+STATUS_CODES = {status: code for code, status in enumerate(models.SEAT_STATUSES, start=1)}
+CODE_STATUSES = {code: status for status, code in STATUS_CODES.items()}
+
+
+class EventSeatMap:
+    __slots__ = ("positions", "ids", "states", "loaded_at")
+
+    def __init__(self, rows):
+        size = max((number for _, number, _ in rows), default=0)
+        self.positions = {} # seat_id -> index in 'states' (seat number - 1)
+        self.ids = array("q", bytes(8 * size)) # index -> seat_id
+        self.states = bytearray(size)
+        for seat_id, number, status in rows:
+            self.positions[seat_id] = number - 1
+            self.ids[number - 1] = seat_id
+            self.states[number - 1] = STATUS_CODES.get(status, 0)
+        self.loaded_at = time.monotonic()
+
+    def find_available_run(self, quantity: int, start: int = 0) -> int:
+        """
+        Index of the first run of 'quantity' adjacent available seats at or after 'start' (-1 if none)
+        - bytearray.find scans for the byte pattern in C, so this is fast even for large events
+        - a run longer than the event can't exist: answered without building the pattern
+        """
+        if quantity > len(self.states):
+            return -1
+        return self.states.find(bytes([STATUS_CODES["available"]]) * quantity, start)
+
+
+class SeatAvailabilityIndex:
+    def __init__(self, ttl: float = SEAT_INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._maps = {} # event_id -> EventSeatMap
+        self._generations = {} # event_id -> number of updates applied
+        self._epoch = 0 # bumped when every map is dropped at once
+        self._lock = threading.Lock()
+
+    def status(self, db, event_id: int, seat_id: int):
+        """
+        Return the indexed status of a seat ("available", "on_hold", "reserved"), or None if unknown
+        - loads (or reloads) the event map with one column-only query when it's missing or older than the TTL
+        """
+        seat_map = self.get_map(db, event_id)
+        position = seat_map.positions.get(seat_id)
+        if position is None:
+            return None
+        return CODE_STATUSES.get(seat_map.states[position])
+
+    def get_map(self, db, event_id: int) -> EventSeatMap:
+        seat_map = self._maps.get(event_id)
+        if seat_map is not None and time.monotonic() - seat_map.loaded_at < self.ttl:
+            return seat_map
+
+        generation = (self._epoch, self._generations.get(event_id, 0))
+        rows = db.execute(select(models.Seat.id, models.Seat.number, models.Seat.status)
+                          .where(models.Seat.event_id == event_id)).all()
+        seat_map = EventSeatMap(rows)
+        with self._lock:
+            if (self._epoch, self._generations.get(event_id, 0)) == generation:
+                self._maps[event_id] = seat_map
+        return seat_map
+
+    def set_status(self, event_id: int, seat_ids, status: str):
+        """
+        Record a committed transition for these seats (ignored if the event isn't indexed yet)
+        """
+        code = STATUS_CODES[status]
+        with self._lock:
+            self._generations[event_id] = self._generations.get(event_id, 0) + 1
+            seat_map = self._maps.get(event_id)
+            if seat_map is None:
+                return
+            for seat_id in seat_ids:
+                position = seat_map.positions.get(seat_id)
+                if position is not None:
+                    seat_map.states[position] = code
+
+    def invalidate(self, event_id: int = None):
+        """
+        Drop one event map (or all of them); the next lookup reloads from the database
+        """
+        with self._lock:
+            if event_id is None:
+                self._maps.clear()
+                self._epoch += 1
+            else:
+                self._maps.pop(event_id, None)
+                self._generations[event_id] = self._generations.get(event_id, 0) + 1
+
+
+seat_index = SeatAvailabilityIndex()
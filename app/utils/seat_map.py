@@ -0,0 +1,76 @@
+import base64
+from .. import models
+
+"""
+Understanding the compact seat map
+- Each status becomes a small code: its position in models.SEAT_STATUSES (available=0, on_hold=1, reserved=2)
+- packed : 2 bits per seat, 4 seats per byte (seat 1 in the lowest bits of byte 0), sent as base64
+- rle : run-length encoding, a list of [code, how many seats in a row have it]; tiny when big blocks share a status
+- ids : seat IDs as runs of consecutive values, [first_id, count], in seat number order
+  (generated seats usually have consecutive IDs, so this is normally a single pair)
+"""
+
+SEAT_MAP_MEDIA_TYPE = "application/vnd.reservio.seatmap+json"
+ENCODINGS = ("packed", "rle")
+
+STATUS_CODES = {status: code for code, status in enumerate(models.SEAT_STATUSES)}
+
+
+def pack_2bit(codes: list) -> str:
+    packed = bytearray((len(codes) + 3) // 4)
+    for i, code in enumerate(codes):
+        packed[i >> 2] |= code << ((i & 3) * 2)
+    return base64.b64encode(packed).decode("ascii")
+
+
+def unpack_2bit(data: str, count: int) -> list:
+    packed = base64.b64decode(data)
+    return [(packed[i >> 2] >> ((i & 3) * 2)) & 3 for i in range(count)]
+
+
+def run_length(values: list) -> list:
+    runs = []
+    for value in values:
+        if runs and runs[-1][0] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([value, 1])
+    return runs
+
+
+def id_runs(ids: list) -> list:
+    runs = []
+    for seat_id in ids:
+        if runs and runs[-1][0] + runs[-1][1] == seat_id:
+            runs[-1][1] += 1
+        else:
+            runs.append([seat_id, 1])
+    return runs
+
+
+def build_seat_map(event_id: int, rows, encoding: str) -> dict:
+    """
+    Build the compact seat map from (id, status) rows ordered by seat number
+    - encoding: "packed" or "rle"
+    """
+    ids = [row[0] for row in rows]
+    codes = [STATUS_CODES[row[1]] for row in rows]
+    return {
+        "event_id": event_id,
+        "count": len(rows),
+        "statuses": list(models.SEAT_STATUSES),
+        "ids": id_runs(ids),
+        "encoding": encoding,
+        "data": pack_2bit(codes) if encoding == "packed" else run_length(codes),
+    }
+
+
+def requested_encoding(format: str, accept: str):
+    """
+    Pick the compact encoding from the 'format' query param or the Accept header (None = regular JSON list)
+    """
+    if format in ENCODINGS:
+        return format
+    if accept and SEAT_MAP_MEDIA_TYPE in accept:
+        return "rle" if "encoding=rle" in accept else "packed"
+    return None
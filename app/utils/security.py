@@ -8,10 +8,11 @@ from passlib.context import CryptContext
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12")) # cost factor: each +1 doubles the hashing time
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
-# password helpers
+# password helpers (CPU-heavy: the routes run them through utils/password_pool.py, not on the request thread)
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
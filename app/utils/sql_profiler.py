@@ -0,0 +1,154 @@
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from ..database import PARTITION_BY_EVENT
+from .request_metrics import route_template
+
+"""
+Understanding the SQL profiler (debug mode)
+- SQL_PROFILER=1 adds SQLProfilerMiddleware: every SQL statement a request runs is recorded with its time
+  (before/after_cursor_execute engine events, into the request's QueryProfile kept in a ContextVar)
+- statement shape : the SQL with whitespace collapsed and IN (...) lists folded, so the same query with other
+  parameters has the same shape
+- N+1 suspicion : one shape run SQL_PROFILER_REPEAT_THRESHOLD times or more in one request (e.g. a lazy load or
+  a refresh() per row inside a loop)
+- every profiled response gets an X-SQL-Profile header (queries, total time, repeated shapes) and one log line
+  ('app.utils.sql_profiler' logger; WARNING when a shape repeats or the route is over its budget)
+- query budget : QUERY_BUDGETS maps "METHOD /route/template" to the most statements that route may run
+  (SQL_QUERY_BUDGET is the default for routes not listed); with SQL_PROFILER_STRICT=1 (the tests) a request over its budget
+  raises QueryBudgetExceeded, so the test fails
+- it costs a list append and a regex per statement: leave it off in production (the /metrics counters are enough there)
+"""
+
+logger = logging.getLogger(__name__)
+
+SQL_PROFILER = os.getenv("SQL_PROFILER", "0") == "1"
+SQL_PROFILER_STRICT = os.getenv("SQL_PROFILER_STRICT", "0") == "1" # raise when a request goes over its budget (tests)
+SQL_PROFILER_REPEAT_THRESHOLD = int(os.getenv("SQL_PROFILER_REPEAT_THRESHOLD", "3"))
+SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", "10")) # default budget for routes not in QUERY_BUDGETS
+PROFILE_HEADER = "X-SQL-Profile"
+
+TOKEN_LOOKUP = 1 # the user query of get_current_user, when the bearer token isn't in the token cache yet
+
+# Most SQL statements a route may run per request (pg_notify for seat streams included)
+QUERY_BUDGETS = {
+    "POST /events/": 3 if PARTITION_BY_EVENT else 2, # + the partitions' DDL script
+    "GET /events/{event_id}/seats/": 2,
+    "POST /events/{event_id}/seats/{seat_id}/hold/": 6 + TOKEN_LOOKUP,
+    "POST /events/{event_id}/holds/": 6 + TOKEN_LOOKUP,
+    "POST /events/{event_id}/holds/best-available": 6 + TOKEN_LOOKUP,
+    "POST /events/{event_id}/seats/{seat_id}/reservation/": 7 + TOKEN_LOOKUP,
+    "GET /events/{event_id}/reservations/": 2,
+}
+
+IN_LIST = re.compile(r"IN \((?:__\[POSTCOMPILE_\w+\]|[^()]*)\)", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+# Transaction control is not counted: BEGIN/COMMIT never reach the cursor, and the app opens no savepoints
+# (they come from sessions joined to an outer transaction, like the tests')
+SAVEPOINT = re.compile(r"(RELEASE |ROLLBACK TO )?SAVEPOINT ", re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    return IN_LIST.sub("IN (...)", WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryProfile:
+    # The statements one request ran: (shape, seconds) in execution order
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def seconds(self) -> float:
+        return sum(seconds for _, seconds in self.statements)
+
+    def repeated(self, threshold: int = SQL_PROFILER_REPEAT_THRESHOLD) -> list:
+        """
+        Shapes run at least 'threshold' times, most repeated first: [(shape, times), ...]
+        """
+        counts = Counter(shape for shape, _ in self.statements)
+        return [(shape, times) for shape, times in counts.most_common() if times >= threshold]
+
+    def summary(self) -> str:
+        return f"queries={self.count}; time_ms={self.seconds * 1000:.1f}; repeated={len(self.repeated())}"
+
+
+current_profile = ContextVar("current_profile", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _profile_start(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None and not SAVEPOINT.match(statement):
+        conn.info.setdefault("profile_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _profile_end(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    started = conn.info.get("profile_started_at")
+    if profile is None or not started or SAVEPOINT.match(statement):
+        return
+    profile.statements.append((statement_shape(statement), time.perf_counter() - started.pop()))
+
+
+@event.listens_for(Engine, "handle_error")
+def _profile_failed(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("profile_started_at"):
+        connection.info["profile_started_at"].pop()
+
+
+def budget_for(method: str, route: str) -> int:
+    return QUERY_BUDGETS.get(f"{method} {route}", SQL_QUERY_BUDGET)
+
+
+class SQLProfilerMiddleware:
+    def __init__(self, app, strict: bool = False):
+        self.app = app
+        self.strict = strict # raise QueryBudgetExceeded when a request goes over its budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = QueryProfile()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                # the route has run by now (streamed bodies may still query, they show up in the log line only)
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(PROFILE_HEADER.lower().encode(), profile.summary().encode())]
+            await send(message)
+
+        token = current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+        self.report(scope, status, profile)
+
+    def report(self, scope, status: int, profile: QueryProfile):
+        route = route_template(scope)
+        budget = budget_for(scope["method"], route)
+        repeated = profile.repeated()
+        over_budget = profile.count > budget
+        level = logging.WARNING if repeated or over_budget else logging.INFO
+        logger.log(level, "%s %s %s %s budget=%d%s", scope["method"], route, status, profile.summary(), budget,
+                   "".join(f"\n  x{times} {shape}" for shape, times in repeated))
+        if over_budget and self.strict:
+            raise QueryBudgetExceeded(f"{scope['method']} {route} ran {profile.count} SQL statements (budget {budget}):\n"
+                                      + "\n".join(shape for shape, _ in profile.statements))
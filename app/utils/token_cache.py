@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from sqlalchemy import event
+from .. import models
+from .metrics import Counter
+
+"""
+Understanding the token cache
+- Every protected request sends the same bearer token again and again; verifying its signature and loading
+  the user by email each time costs crypto work plus one database round trip
+- The cache remembers, per token, the user it was verified for: a hit skips both the JWT decode and the query
+- An entry lives until the token's 'exp' or TOKEN_CACHE_TTL_SECONDS, whichever comes first
+  (the TTL bounds how long a user change made by another process can go unnoticed here)
+- Bounded: at most TOKEN_CACHE_SIZE tokens, the least recently used one is dropped first (OrderedDict)
+- Invalidation: updating or deleting a User through the ORM drops that user's tokens (invalidate_user)
+"""
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60")) # 0 disables the cache
+
+cache_hits = Counter("auth_token_cache_hits_total", "Bearer tokens resolved from the token cache")
+cache_misses = Counter("auth_token_cache_misses_total", "Bearer tokens verified and looked up in the database")
+
+
+class CurrentUser(NamedTuple):
+    # The identity protected routes work with (no ORM object, so it can be shared between requests)
+    id: int
+    email: str
+
+
+class TokenCache:
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE, ttl: float = TOKEN_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict() # token -> (CurrentUser, valid until, epoch seconds)
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        """
+        Return the cached CurrentUser for this token, or None (counts a hit or a miss)
+        """
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                if entry[1] > time.time():
+                    self._entries.move_to_end(token)
+                    cache_hits.inc()
+                    return entry[0]
+                del self._entries[token]
+        cache_misses.inc()
+        return None
+
+    def put(self, token: str, user: CurrentUser, expires_at: float):
+        """
+        Remember a verified token until 'expires_at' (the token's exp claim, epoch seconds) or the TTL
+        """
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (user, min(expires_at, time.time() + self.ttl))
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        """
+        Drop every cached token of a user (call it when the user changes or is removed)
+        """
+        with self._lock:
+            for token in [token for token, (user, _) in self._entries.items() if user.id == user_id]:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": cache_hits.snapshot(),
+            "misses": cache_misses.snapshot(),
+        }
+
+
+token_cache = TokenCache()
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    token_cache.invalidate_user(target.id)
@@ -0,0 +1,139 @@
+import heapq
+import math
+import os
+import threading
+import time
+from fastapi import HTTPException
+from jose import jwt, JWTError
+from . import security
+from .metrics import Counter
+
+"""
+Understanding the waiting room (admission control per event)
+- When an event opens, users first take a queue ticket (POST /events/{event_id}/queue) and may only
+  hold seats once their ticket is admitted; the hold endpoints then answer 429 + Retry-After until then
+- Tickets are admitted at WAITING_ROOM_RATE per second per event, with bursts of up to WAITING_ROOM_BURST;
+  size the rate to what the database sustains for holds (e.g. from benchmarks/load_holds.py), divided by
+  the number of API processes (each process admits at this rate)
+- Token bucket as a virtual schedule (GCRA): instead of counting tokens, each event keeps the time the next
+  ticket would be admitted ('tat'); every ticket moves it forward by 1/rate, and a burst may start up to
+  (burst - 1)/rate earlier, so the first WAITING_ROOM_BURST tickets are admitted at once
+- The admission time is written into the ticket itself (a signed JWT with the event, user and admit_at), so
+  checking a ticket, its position and ETA costs no lookup and works on any process
+- An admitted ticket stays valid for WAITING_ROOM_ADMISSION_SECONDS, then the user must queue again
+- One place per user : while a user's ticket is waiting or valid, queueing again returns the same ticket, so a
+  client looping on POST /queue can't push everyone else's admission back (per process, like the schedule itself)
+- Tickets carry their own audience ('aud': "waiting-room"): a queue ticket is refused as an access token, and an
+  access token (no audience) is refused as a queue ticket
+- WAITING_ROOM=0 (default) turns it off: no ticket is needed
+"""
+
+WAITING_ROOM = os.getenv("WAITING_ROOM", "0") == "1"
+WAITING_ROOM_RATE = float(os.getenv("WAITING_ROOM_RATE", "50")) # tickets admitted per second, per event
+WAITING_ROOM_BURST = int(os.getenv("WAITING_ROOM_BURST", "50"))
+WAITING_ROOM_ADMISSION_SECONDS = int(os.getenv("WAITING_ROOM_ADMISSION_SECONDS", "300"))
+
+QUEUE_TICKET_HEADER = "X-Queue-Ticket"
+QUEUE_TICKET_AUDIENCE = "waiting-room"
+
+tickets_issued = Counter("waiting_room_tickets_issued_total", "Queue tickets handed out")
+not_admitted = Counter("waiting_room_not_admitted_total", "Hold attempts turned away because the ticket wasn't admitted yet")
+
+
+class WaitingRoom:
+    def __init__(self, enabled: bool = WAITING_ROOM, rate: float = WAITING_ROOM_RATE, burst: int = WAITING_ROOM_BURST,
+                 admission_seconds: int = WAITING_ROOM_ADMISSION_SECONDS):
+        self.enabled = enabled
+        self.rate = rate
+        self.burst = burst
+        self.admission_seconds = admission_seconds
+        self._tat = {} # event_id -> when the next ticket would be admitted (epoch seconds)
+        self._issued = {} # (event_id, user_id) -> admit_at of the user's current ticket
+        self._expiries = [] # heap of (ticket exp, (event_id, user_id)), to forget tickets once they expire
+        self._lock = threading.Lock()
+
+    def issue(self, event_id: int, user_id: str) -> dict:
+        """
+        Hand out the next queue ticket of an event, or the user's current one while it's waiting or valid
+        """
+        key = (event_id, user_id)
+        with self._lock:
+            now = time.time()
+            self._forget_expired(now)
+            admit_at = self._issued.get(key)
+            if admit_at is None:
+                tat = max(self._tat.get(event_id, now), now)
+                admit_at = max(now, tat - (self.burst - 1) / self.rate)
+                self._tat[event_id] = tat + 1 / self.rate
+                self._issued[key] = admit_at
+                heapq.heappush(self._expiries, (int(admit_at + self.admission_seconds), key))
+                tickets_issued.inc()
+        claims = {"evt": event_id, "sub": user_id, "adm": admit_at, "exp": int(admit_at + self.admission_seconds),
+                  "aud": QUEUE_TICKET_AUDIENCE}
+        ticket = jwt.encode(claims, security.SECRET_KEY, algorithm=security.ALGORITHM)
+        return {"ticket": ticket, **self.position(admit_at)}
+
+    def _forget_expired(self, now: float):
+        # called with the lock held
+        while self._expiries and self._expiries[0][0] <= now:
+            _, key = heapq.heappop(self._expiries)
+            self._issued.pop(key, None)
+
+    def position(self, admit_at: float) -> dict:
+        wait = max(0.0, admit_at - time.time())
+        return {
+            "admitted": wait == 0,
+            "position": math.ceil(wait * self.rate), # tickets still to be admitted before this one
+            "eta_seconds": round(wait, 3),
+            "admit_at": admit_at,
+        }
+
+    def read_ticket(self, ticket: str, event_id: int) -> dict:
+        try:
+            claims = jwt.decode(ticket, security.SECRET_KEY, algorithms=security.ALGORITHM, audience=QUEUE_TICKET_AUDIENCE,
+                                options={"require_aud": True})
+        except JWTError as e:
+            raise HTTPException(status_code=403, detail="Invalid or expired queue ticket") from e
+        if claims.get("evt") != event_id:
+            raise HTTPException(status_code=403, detail="Queue ticket is for another event")
+        return claims
+
+    def status(self, ticket: str, event_id: int) -> dict:
+        """
+        Position and ETA of a ticket (no state is read: it's all in the signed ticket)
+        """
+        return self.position(self.read_ticket(ticket, event_id)["adm"])
+
+    def admit(self, event_id: int, user_id: str, ticket: str = None):
+        """
+        Let the request through only with an admitted ticket of this event and user (no-op when disabled)
+        - 428 without a ticket, 403 for a bad one, 429 + Retry-After while it's still waiting
+        """
+        if not self.enabled:
+            return
+        if not ticket:
+            raise HTTPException(status_code=428, detail=f"A queue ticket is required: POST /events/{event_id}/queue, then send it in the {QUEUE_TICKET_HEADER} header")
+        claims = self.read_ticket(ticket, event_id)
+        if claims.get("sub") != user_id:
+            raise HTTPException(status_code=403, detail="Queue ticket belongs to another user")
+        place = self.position(claims["adm"])
+        if not place["admitted"]:
+            not_admitted.inc()
+            raise HTTPException(status_code=429, detail={"detail": "Not admitted yet", **place},
+                                headers={"Retry-After": str(max(1, math.ceil(place["eta_seconds"])))})
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            backlog = {event_id: round(tat - now, 3) for event_id, tat in self._tat.items() if tat > now}
+        return {
+            "enabled": self.enabled,
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "backlog_seconds": backlog, # per event: how long a ticket issued now would wait
+            "tickets_issued": tickets_issued.snapshot(),
+            "not_admitted": not_admitted.snapshot(),
+        }
+
+
+waiting_room = WaitingRoom()
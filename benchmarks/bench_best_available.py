@@ -0,0 +1,117 @@
+"""
+Contention benchmark: "pick seat IDs and retry on 409" vs the best-available endpoint
+
+Usage:
+    # terminal 1 (same DATABASE_URL / JWT_SECRET_KEY as below)
+    uvicorn app.main:app --port 8000
+    # terminal 2
+    python -m benchmarks.bench_best_available --url http://localhost:8000 --clients 200 --quantity 2
+
+Every client wants 'quantity' adjacent seats of the same fresh event, all at once:
+- pick   : list the available seats, take the first adjacent run, POST /events/{id}/holds/ with those IDs,
+           and start over on 409 (what clients had to do before best-available)
+- best   : one POST /events/{id}/holds/best-available
+It prints a JSON summary per strategy: allocations, HTTP requests spent, 409s, latency per allocation,
+and whether any seat was handed out twice.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+import httpx
+from .load_holds import create_users, percentile
+
+
+async def fresh_event(client, seats: int) -> int:
+    r = await client.post("/events/", json={"name": "best-available bench", "total_seats": seats})
+    r.raise_for_status()
+    return r.json()["id"]
+
+
+def first_run(seats: list, quantity: int):
+    # seats: available seats ordered by number
+    for i in range(len(seats) - quantity + 1):
+        run = seats[i:i + quantity]
+        if run[-1]["number"] - run[0]["number"] == quantity - 1:
+            return [seat["id"] for seat in run]
+    return None
+
+
+async def pick_and_retry(client, event_id, headers, quantity, max_retries, requests):
+    for _ in range(max_retries):
+        requests["GET"] += 1
+        r = await client.get(f"/events/{event_id}/seats/", params={"status": "available", "limit": 1000})
+        requests[r.status_code] += 1
+        if r.status_code != 200:
+            continue
+        run = first_run(r.json(), quantity)
+        if run is None:
+            return None
+        requests["POST"] += 1
+        r = await client.post(f"/events/{event_id}/holds/", json={"seat_ids": run}, headers=headers)
+        requests[r.status_code] += 1
+        if r.status_code == 201:
+            return r.json()["seats"]
+    return None
+
+
+async def best_available(client, event_id, headers, quantity, max_retries, requests):
+    requests["POST"] += 1
+    r = await client.post(f"/events/{event_id}/holds/best-available", json={"quantity": quantity}, headers=headers)
+    requests[r.status_code] += 1
+    return r.json()["seats"] if r.status_code == 201 else None
+
+
+async def run_strategy(client, strategy, tokens, args) -> dict:
+    event_id = await fresh_event(client, args.seats)
+    requests, latencies, allocations = Counter(), [], []
+
+    async def one_client(token):
+        start = time.perf_counter()
+        seats = await strategy(client, event_id, {"Authorization": f"Bearer {token}"}, args.quantity, args.max_retries, requests)
+        latencies.append(time.perf_counter() - start)
+        if seats:
+            allocations.append(seats)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_client(token) for token in tokens))
+    elapsed = time.perf_counter() - start
+
+    handed_out = [seat_id for seats in allocations for seat_id in seats]
+    return {
+        "clients": len(tokens),
+        "allocations": len(allocations),
+        "http_requests": requests["GET"] + requests["POST"],
+        "conflicts_409": requests[409],
+        "errors_5xx": sum(n for code, n in requests.items() if isinstance(code, int) and code >= 500),
+        "elapsed_s": round(elapsed, 3),
+        "latency_ms": {p: round(percentile(latencies, p) * 1000, 1) for p in (50, 95, 99)},
+        "disjoint": len(handed_out) == len(set(handed_out)),
+    }
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+        results = {"url": args.url, "quantity": args.quantity, "seats": args.seats}
+        for name, strategy in (("pick", pick_and_retry), ("best", best_available)):
+            # new users per strategy, so the per-user hold limit doesn't carry over
+            results[name] = await run_strategy(client, strategy, create_users(args.clients), args)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--quantity", type=int, default=2)
+    parser.add_argument("--seats", type=int, default=1000)
+    parser.add_argument("--max-retries", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
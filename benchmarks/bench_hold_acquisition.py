@@ -0,0 +1,119 @@
+"""
+Contention benchmark: hold acquisition with SELECT ... FOR UPDATE vs the optimistic conditional UPDATE
+
+Usage:
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_hold_acquisition [--clients 500] [--hot-seats 20] [--pool 40]
+
+Every client thread tries to hold one seat picked at random among the first --hot-seats seats of a fresh event
+(an on-sale moment: everyone wants the same few seats), calling hold_seats_locking / hold_seats_optimistic
+directly on sessions from an engine with --pool connections, so the database is the only bottleneck.
+It prints a JSON summary per mode: holds/s, 409s, p50/p95/p99 latency of winners and losers, and whether
+any seat was held twice. The events, seats and holds it creates are deleted at the end.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+from app import models
+from app.database import DATABASE_URL, Base
+from app.routers.holds import hold_seats_locking, hold_seats_optimistic
+from app.utils.seat_generation import generate_seats
+from .load_holds import percentile
+
+MODES = {"lock": hold_seats_locking, "optimistic": hold_seats_optimistic}
+
+
+def fresh_event(Session, seats: int) -> int:
+    with Session() as db:
+        event = models.Event(name="hold acquisition bench", total_seats=seats)
+        db.add(event)
+        db.flush()
+        generate_seats(db, event.id, seats)
+        db.commit()
+        return event.id
+
+
+def drop_event(Session, event_id: int):
+    with Session() as db:
+        db.execute(delete(models.Hold).where(models.Hold.event_id == event_id))
+        db.execute(delete(models.Seat).where(models.Seat.event_id == event_id))
+        db.execute(delete(models.Event).where(models.Event.id == event_id))
+        db.commit()
+
+
+def run_mode(Session, mode: str, args) -> dict:
+    event_id = fresh_event(Session, args.seats)
+    with Session() as db:
+        seat_ids = [seat.id for seat in db.query(models.Seat.id).filter(models.Seat.event_id == event_id)
+                    .order_by(models.Seat.number).limit(args.hot_seats)]
+    hold = MODES[mode]
+    outcomes, won, lost, held = Counter(), [], [], []
+    lock = threading.Lock()
+    start_line = threading.Barrier(args.clients)
+
+    def one_client(_):
+        seat_id = random.choice(seat_ids)
+        start_line.wait() # every client starts at the same moment
+        start = time.perf_counter()
+        with Session() as db:
+            try:
+                hold(db, event_id, [seat_id], uuid.uuid4().hex, 60)
+                outcome = 201
+            except HTTPException as e:
+                outcome = e.status_code
+        elapsed = time.perf_counter() - start
+        with lock:
+            outcomes[outcome] += 1
+            (won if outcome == 201 else lost).append(elapsed)
+            if outcome == 201:
+                held.append(seat_id)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as clients:
+        list(clients.map(one_client, range(args.clients)))
+    elapsed = time.perf_counter() - start
+    drop_event(Session, event_id)
+
+    def latency(values):
+        if not values:
+            return None
+        return {f"p{p}_ms": round(percentile(values, p) * 1000, 1) for p in (50, 95, 99)}
+
+    return {
+        "mode": mode,
+        "clients": args.clients,
+        "hot_seats": len(seat_ids),
+        "elapsed_s": round(elapsed, 3),
+        "attempts_per_s": round(args.clients / elapsed, 1),
+        "outcomes": dict(outcomes),
+        "winners_latency": latency(won),
+        "losers_latency": latency(lost),
+        "seats_held_twice": sum(1 for count in Counter(held).values() if count > 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--hot-seats", type=int, default=20)
+    parser.add_argument("--seats", type=int, default=1000)
+    parser.add_argument("--pool", type=int, default=40, help="database connections shared by the clients")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+
+    engine = create_engine(DATABASE_URL, pool_size=args.pool, max_overflow=0, pool_timeout=120)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    print(json.dumps([run_mode(Session, mode, args) for mode in args.modes], indent=2))
+
+
+if __name__ == "__main__":
+    main()
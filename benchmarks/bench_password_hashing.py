@@ -0,0 +1,65 @@
+"""
+Benchmark: logins per second per core (bcrypt verification), inline vs the password hashing pool
+
+Usage:
+    python -m benchmarks.bench_password_hashing [--rounds 10 12] [--logins 40] [--workers 4]
+
+For each bcrypt cost factor it measures:
+- inline : verify_password called on one thread (what /auth/token did before; one core at most)
+- pool   : the same logins submitted concurrently through PasswordHashPool with --workers processes
+It prints a JSON summary: logins/s and logins/s per core for both, plus the time of one hash.
+No database is needed.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from app.utils.password_pool import PasswordHashPool
+from app.utils import security
+
+
+def measure(rounds: int, logins: int, workers: int) -> dict:
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    start = time.perf_counter()
+    hashed = context.hash("correct horse battery staple")
+    hash_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(logins):
+        context.verify("correct horse battery staple", hashed)
+    inline_rate = logins / (time.perf_counter() - start)
+
+    pool = PasswordHashPool(workers=workers, concurrency=workers * 2, queue_timeout=60)
+    pool.verify("warm up", hashed) # start the worker processes outside the timing
+    with ThreadPoolExecutor(max_workers=workers * 2) as request_threads:
+        start = time.perf_counter()
+        results = list(request_threads.map(lambda _: pool.verify("correct horse battery staple", hashed), range(logins)))
+        pool_rate = logins / (time.perf_counter() - start)
+    pool.shutdown()
+    assert all(results)
+
+    cores = min(workers, os.cpu_count() or 1)
+    return {
+        "rounds": rounds,
+        "hash_ms": round(hash_s * 1000, 1),
+        "inline_logins_per_s": round(inline_rate, 1),
+        "pool_logins_per_s": round(pool_rate, 1),
+        "pool_logins_per_s_per_core": round(pool_rate / cores, 1),
+        "pool_workers": workers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, security.BCRYPT_ROUNDS])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    print(json.dumps({"cpus": os.cpu_count(), "results": [measure(r, args.logins, args.workers) for r in args.rounds]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: seat generation for create_event (per-object ORM loop vs bulk insert)
+
+Usage:
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_seat_generation [--sizes 10 1000 100000] [--repeat 3]
+
+Every run happens inside an outer transaction that is rolled back at the end,
+so the benchmark never leaves rows behind in the database.
+"""
+
+import argparse
+import time
+from sqlalchemy.orm import Session
+from app import models
+from app.database import engine, Base
+from app.utils.seat_generation import generate_seats
+
+
+def orm_loop_path(db, total_seats):
+    # The previous create_event implementation: commit the event, one db.add() per seat, commit again
+    db_event = models.Event(name="bench", total_seats=total_seats)
+    db.add(db_event)
+    db.commit()
+    db.refresh(db_event)
+    for i in range(1, total_seats + 1):
+        db.add(models.Seat(number=i, status="available", event_id=db_event.id))
+    db.commit()
+    db.refresh(db_event)
+
+
+def bulk_path(db, total_seats):
+    # The current create_event implementation: flush the event, one set-based INSERT, one commit
+    db_event = models.Event(name="bench", total_seats=total_seats)
+    db.add(db_event)
+    db.flush()
+    generate_seats(db, db_event.id, total_seats)
+    db.commit()
+    db.refresh(db_event)
+
+
+def run_once(path, total_seats):
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        start = time.perf_counter()
+        path(db, total_seats)
+        return time.perf_counter() - start
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    print(f"{'seats':>8} {'orm loop (ms)':>14} {'bulk (ms)':>10} {'speedup':>8}")
+    for size in args.sizes:
+        old = min(run_once(orm_loop_path, size) for _ in range(args.repeat))
+        new = min(run_once(bulk_path, size) for _ in range(args.repeat))
+        print(f"{size:>8} {old * 1000:>14.1f} {new * 1000:>10.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Load test: concurrent hold attempts against a running API (compare DB_MODE=sync vs DB_MODE=async)
+
+Usage:
+    # terminal 1 (same DATABASE_URL / JWT_SECRET_KEY as below)
+    DB_MODE=sync uvicorn app.main:app --port 8000      # then again with DB_MODE=async
+    # terminal 2
+    python -m benchmarks.load_holds --url http://localhost:8000 --requests 1000 --concurrency 1000
+
+The script creates one event through the API, creates users directly in the database,
+signs their tokens with JWT_SECRET_KEY, and fires the hold attempts all at once.
+It prints a JSON summary (throughput, latency percentiles and status codes).
+
+With --waiting-room (server started with WAITING_ROOM=1), every attempt first takes a queue ticket and
+waits for its ETA; the hold latency is then measured from admission, to compare the tail with and without it.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter
+import httpx
+from sqlalchemy import insert
+from app import models
+from app.database import SessionLocal
+from app.utils.security import create_access_token
+
+
+def create_users(count: int) -> list:
+    # Users are inserted directly (no bcrypt) so the test only measures the hold path
+    run_id = uuid.uuid4().hex[:8]
+    emails = [f"load-{run_id}-{i}@example.com" for i in range(count)]
+    with SessionLocal() as db:
+        db.execute(insert(models.User), [{"email": email, "hashed_password": "-"} for email in emails])
+        db.commit()
+    return [create_access_token(data={"sub": email}) for email in emails]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+        r = await client.post("/events/", json={"name": "load test", "total_seats": args.seats})
+        r.raise_for_status()
+        event_id = r.json()["id"]
+        seat_ids = [s["id"] for s in (await client.get(f"/events/{event_id}/seats/")).json()]
+        tokens = create_users(args.users)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies, statuses = [], Counter()
+
+        async def attempt(i):
+            seat_id = random.choice(seat_ids)
+            headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+            if args.waiting_room:
+                ticket = (await client.post(f"/events/{event_id}/queue/", headers=headers)).json()
+                await asyncio.sleep(ticket["eta_seconds"])
+                headers["X-Queue-Ticket"] = ticket["ticket"]
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(f"/events/{event_id}/seats/{seat_id}/hold/", json={"seconds": 60}, headers=headers)
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(attempt(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "url": args.url,
+        "waiting_room": args.waiting_room,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "latency_ms": {p: round(percentile(latencies, p) * 1000, 1) for p in (50, 95, 99)},
+        "status_codes": {str(k): v for k, v in statuses.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=400)
+    parser.add_argument("--seats", type=int, default=1000)
+    parser.add_argument("--waiting-room", action="store_true", help="take a queue ticket and wait for admission first")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
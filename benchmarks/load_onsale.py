@@ -0,0 +1,249 @@
+"""
+Load test: an on-sale scenario (thousands of users, hot seats, hold -> reserve funnels, cancellations, expiries)
+
+Usage:
+    # against a running API (same DATABASE_URL / JWT_SECRET_KEY as below)
+    uvicorn app.main:app --port 8000
+    python -m benchmarks.load_onsale --url http://localhost:8000 --users 2000 --output onsale.json
+    # or drive the app in this process (ASGI transport, with its startup/shutdown), no server needed
+    python -m benchmarks.load_onsale --in-process --users 500
+
+Every user arrives within --ramp seconds and runs one funnel:
+- lists the available seats, picks one (a hot seat with probability --hot-share) and holds it,
+  retrying with another seat on 409 up to --retries times
+- after a think time, reserves it (--reserve), cancels the hold (--cancel), or walks away and lets
+  the hold expire (the rest; holds last --hold-seconds)
+It prints (and writes to --output) a JSON report: per endpoint throughput, p50/p95/p99 latency, status codes
+and 409/5xx rates, the funnel outcomes, lock waits sampled from pg_stat_activity, and an integrity
+check (seats reserved == reservations made). Two reports can be compared key by key.
+
+Keep --concurrency within the server's DB_POOL_SIZE + DB_MAX_OVERFLOW: sync routes run on a threadpool of 40,
+and far more requests in flight than connections makes them wait for the pool (and time out) instead of the database.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+import httpx
+from sqlalchemy import create_engine, text
+from app.database import DATABASE_URL
+from .load_holds import create_users, percentile
+
+
+class EndpointStats:
+    def __init__(self, concurrency: int):
+        self.in_flight = asyncio.Semaphore(concurrency)
+        self.latencies = defaultdict(list) # endpoint -> seconds
+        self.statuses = defaultdict(Counter) # endpoint -> status code -> count
+
+    async def call(self, client, endpoint: str, method: str, url: str, **kwargs):
+        # endpoint: the route template the call is reported under, e.g. "POST /events/{id}/seats/{id}/hold/"
+        async with self.in_flight:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                self.statuses[endpoint][response.status_code] += 1
+            except httpx.HTTPError as e:
+                response = None
+                self.statuses[endpoint][type(e).__name__] += 1
+            self.latencies[endpoint].append(time.perf_counter() - start)
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        report = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            statuses = self.statuses[endpoint]
+            count = len(latencies)
+            report[endpoint] = {
+                "requests": count,
+                "throughput_rps": round(count / elapsed, 1),
+                "latency_ms": {f"p{p}": round(percentile(latencies, p) * 1000, 1) for p in (50, 95, 99)},
+                "status_codes": {str(k): v for k, v in statuses.items()},
+                "rate_409": round(statuses[409] / count, 4),
+                "rate_5xx": round(sum(v for k, v in statuses.items() if isinstance(k, int) and k >= 500) / count, 4),
+            }
+        return report
+
+
+class LockWaitSampler:
+    """
+    Background thread: every 'interval' seconds, count the backends of this database waiting on a lock
+    - lock wait time is estimated as (waiting backends x interval), summed over the run
+    """
+
+    def __init__(self, url: str, interval: float):
+        self.engine = create_engine(url, pool_size=1, max_overflow=0)
+        self.interval = interval
+        self.samples = 0
+        self.waiting = Counter() # wait_event (tuple, transactionid, relation, ...) -> backend samples
+        self.max_waiting = 0
+        self.max_active = 0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lock-wait-sampler", daemon=True)
+
+    def _run(self):
+        query = text("SELECT state, wait_event_type, wait_event FROM pg_stat_activity "
+                     "WHERE datname = current_database() AND pid <> pg_backend_pid() AND backend_type = 'client backend'")
+        with self.engine.connect() as connection:
+            while not self._stopping.wait(self.interval):
+                rows = connection.execute(query).all()
+                connection.rollback() # don't keep a snapshot open between samples
+                locked = [row.wait_event for row in rows if row.wait_event_type == "Lock"]
+                self.samples += 1
+                self.waiting.update(locked)
+                self.max_waiting = max(self.max_waiting, len(locked))
+                self.max_active = max(self.max_active, sum(1 for row in rows if row.state == "active"))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopping.set()
+        self._thread.join()
+        self.engine.dispose()
+
+    def report(self) -> dict:
+        total = sum(self.waiting.values())
+        return {
+            "samples": self.samples,
+            "interval_s": self.interval,
+            "lock_wait_s": round(total * self.interval, 3),
+            "lock_wait_s_by_event": {event: round(n * self.interval, 3) for event, n in self.waiting.items()},
+            "avg_backends_waiting": round(total / self.samples, 2) if self.samples else 0,
+            "max_backends_waiting": self.max_waiting,
+            "max_backends_active": self.max_active,
+        }
+
+
+async def funnel(client, stats: EndpointStats, outcomes: Counter, event_id: int, hot_seats: list, token: str, args):
+    headers = {"Authorization": f"Bearer {token}"}
+    seat_url = "/events/{event_id}/seats/{seat_id}"
+    await asyncio.sleep(random.uniform(0, args.ramp)) # arrival
+
+    held = None
+    for _ in range(args.retries + 1):
+        r = await stats.call(client, "GET /events/{id}/seats/?status=available", "GET", f"/events/{event_id}/seats/",
+                             params={"status": "available", "limit": 1000})
+        available = [seat["id"] for seat in r.json()] if r is not None and r.status_code == 200 else []
+        if not available:
+            outcomes["sold_out"] += 1
+            return
+        free_hot = [seat_id for seat_id in hot_seats if seat_id in set(available)]
+        seat_id = random.choice(free_hot if free_hot and random.random() < args.hot_share else available)
+        r = await stats.call(client, "POST /events/{id}/seats/{id}/hold/", "POST", seat_url.format(event_id=event_id, seat_id=seat_id) + "/hold/",
+                             json={"seconds": args.hold_seconds}, headers=headers)
+        if r is not None and r.status_code == 201:
+            held = (seat_id, r.json()["user_id"])
+            break
+    if held is None:
+        outcomes["gave_up"] += 1
+        return
+
+    seat_id, user_id = held
+    await asyncio.sleep(random.uniform(0, args.think))
+    choice = random.random()
+    if choice < args.reserve:
+        r = await stats.call(client, "POST /events/{id}/seats/{id}/reservation/", "POST",
+                             seat_url.format(event_id=event_id, seat_id=seat_id) + "/reservation/", headers=headers)
+        outcomes["reserved" if r is not None and r.status_code == 201 else "reserve_failed"] += 1
+    elif choice < args.reserve + args.cancel:
+        r = await stats.call(client, "DELETE /events/{id}/seats/{id}/hold/", "DELETE",
+                             seat_url.format(event_id=event_id, seat_id=seat_id) + "/hold/", json={"user_id": user_id})
+        outcomes["cancelled" if r is not None and r.status_code == 200 else "cancel_failed"] += 1
+    else:
+        outcomes["abandoned"] += 1 # the hold expires
+
+
+async def final_seat_states(client, event_id: int) -> Counter:
+    r = await client.get(f"/events/{event_id}/seats/", params={"format": "rle"})
+    r.raise_for_status()
+    seat_map = r.json()
+    states = Counter()
+    for code, length in seat_map["data"]:
+        states[seat_map["statuses"][code]] += length
+    return states
+
+
+async def run(args, client) -> dict:
+    r = await client.post("/events/", json={"name": "on-sale load test", "total_seats": args.seats})
+    r.raise_for_status()
+    event_id = r.json()["id"]
+    seats = (await client.get(f"/events/{event_id}/seats/", params={"limit": 1000})).json()
+    hot_seats = [seat["id"] for seat in seats[:args.hot_seats]] # the front rows
+    tokens = create_users(args.users)
+
+    stats, outcomes = EndpointStats(args.concurrency), Counter()
+    with LockWaitSampler(DATABASE_URL, args.sample_interval) as sampler:
+        start = time.perf_counter()
+        await asyncio.gather(*(funnel(client, stats, outcomes, event_id, hot_seats, token, args) for token in tokens))
+        elapsed = time.perf_counter() - start
+        if args.wait_expiry:
+            await asyncio.sleep(args.hold_seconds + 2) # let the expiry scheduler release the abandoned holds
+        states = await final_seat_states(client, event_id)
+
+    requests = sum(len(latencies) for latencies in stats.latencies.values())
+    return {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "event_id": event_id,
+        "elapsed_s": round(elapsed, 3),
+        "requests": requests,
+        "throughput_rps": round(requests / elapsed, 1),
+        "endpoints": stats.report(elapsed),
+        "funnel": dict(outcomes),
+        "lock_waits": sampler.report(),
+        "final_seats": dict(states),
+        "integrity": {
+            "reservations_made": outcomes["reserved"],
+            "seats_reserved": states["reserved"],
+            "ok": outcomes["reserved"] == states["reserved"],
+        },
+    }
+
+
+async def main_async(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if not args.in_process:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=120) as client:
+            return await run(args, client)
+
+    from app.main import app, lifespan
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://in-process", timeout=120) as client:
+            return await run(args, client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="run the app in this process instead of calling --url")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--seats", type=int, default=1000)
+    parser.add_argument("--hot-seats", type=int, default=50, help="seats most users go for")
+    parser.add_argument("--hot-share", type=float, default=0.8, help="probability a user goes for a hot seat")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which the users arrive")
+    parser.add_argument("--think", type=float, default=1.0, help="max seconds between holding and reserving/cancelling")
+    parser.add_argument("--retries", type=int, default=3, help="new seats tried after a 409")
+    parser.add_argument("--reserve", type=float, default=0.6, help="share of holders who reserve")
+    parser.add_argument("--cancel", type=float, default=0.2, help="share of holders who cancel (the rest abandon)")
+    parser.add_argument("--hold-seconds", type=int, default=5)
+    parser.add_argument("--wait-expiry", action="store_true", help="wait for abandoned holds to expire before the final count")
+    parser.add_argument("--concurrency", type=int, default=50, help="max requests in flight (keep it within DB_POOL_SIZE + DB_MAX_OVERFLOW)")
+    parser.add_argument("--sample-interval", type=float, default=0.05, help="seconds between pg_stat_activity samples")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(asyncio.run(main_async(args)), indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
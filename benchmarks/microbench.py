@@ -0,0 +1,223 @@
+"""
+Microbenchmarks of the hot helpers, with JSON baselines and a regression check
+
+Usage:
+    DATABASE_URL=postgresql://... python -m benchmarks.microbench --save benchmarks/baselines/main.json
+    # after a change, on the same machine:
+    DATABASE_URL=postgresql://... python -m benchmarks.microbench --compare benchmarks/baselines/main.json [--threshold 0.2]
+
+Cases (parameterized by --sizes, seats per event, and --expired, expired holds to release):
+- expire_holds[expired=N]        : release N expired holds of one event (one DELETE ... RETURNING + UPDATE)
+- generate_seats[seats=N]        : create_event's set-based seat insert
+- read_event_seats[seats=N]      : GET /events/{id}/seats/ (query + response model + JSON), one page of up to 1000
+- read_event_seats_packed[seats=N] : the same event as a packed seat map (?format=packed)
+  (both with the response cache cleared before each call, so they measure the database path)
+- read_event_seats_304[seats=N]  : a poll with the current ETag (If-None-Match), answered from the event version
+- get_current_user[cold|warm]    : token -> user, with the token cache cleared before each call or kept
+- create_access_token / decode_access_token
+Each case runs once to warm up, then --repeat times; the median is what gets compared.
+Database work happens inside an outer transaction that is rolled back, so nothing is left behind.
+--compare exits with status 1 when a median is slower than the baseline by more than --threshold (0.2 = 20%).
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from app import models
+from app.database import engine, get_db, Base
+from app.deps import get_current_user
+from app.utils.expire_holds import expire_holds
+from app.utils.response_cache import response_cache
+from app.utils.seat_generation import generate_seats
+from app.utils.security import create_access_token, decode_access_token
+from app.utils.token_cache import token_cache
+
+
+@contextmanager
+def rolled_back_session():
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+
+def new_event(db, total_seats: int) -> int:
+    event = models.Event(name="microbench", total_seats=total_seats)
+    db.add(event)
+    db.flush()
+    generate_seats(db, event.id, total_seats)
+    return event.id
+
+
+def timed(fn, repeat: int, setup=None) -> list:
+    # fn(state) is timed; setup() (not timed) prepares a fresh state for each run
+    times = []
+    for _ in range(repeat + 1):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        fn(state)
+        times.append(time.perf_counter() - start)
+    return times[1:] # the first run is the warm-up
+
+
+def bench_expire_holds(expired: int, repeat: int) -> list:
+    with rolled_back_session() as db:
+        event_id = new_event(db, expired)
+        seat_ids = [seat_id for (seat_id,) in db.query(models.Seat.id).filter(models.Seat.event_id == event_id)]
+        past = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+        def setup():
+            db.execute(insert(models.Hold), [{"user_id": "bench", "seat_id": seat_id, "event_id": event_id,
+                                              "held_at": past, "expires_at": past} for seat_id in seat_ids])
+            db.execute(update(models.Seat).where(models.Seat.event_id == event_id).values(status="on_hold"))
+
+        return timed(lambda _: expire_holds(db, event_id=event_id), repeat, setup)
+
+
+def bench_generate_seats(seats: int, repeat: int) -> list:
+    with rolled_back_session() as db:
+        def setup():
+            event = models.Event(name="microbench", total_seats=seats)
+            db.add(event)
+            db.flush()
+            return event.id
+
+        return timed(lambda event_id: generate_seats(db, event_id, seats), repeat, setup)
+
+
+def bench_read_event_seats(seats: int, repeat: int, params: dict, revalidate: bool = False) -> list:
+    from app.main import app
+    with rolled_back_session() as db:
+        event_id = new_event(db, seats)
+        app.dependency_overrides[get_db] = lambda: db
+        try:
+            client = TestClient(app) # no 'with': the app's startup (scheduler, listener) isn't needed
+            headers = {}
+            if revalidate:
+                headers["If-None-Match"] = client.get(f"/events/{event_id}/seats/", params=params).headers["ETag"]
+
+            def read(_):
+                r = client.get(f"/events/{event_id}/seats/", params=params, headers=headers)
+                assert r.status_code == (304 if revalidate else 200), r.status_code
+
+            return timed(read, repeat, None if revalidate else response_cache.clear)
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            response_cache.clear()
+
+
+def bench_get_current_user(warm: bool, repeat: int) -> list:
+    with rolled_back_session() as db:
+        user = models.User(email="microbench@example.com", hashed_password="-")
+        db.add(user)
+        db.flush()
+        token = create_access_token(data={"sub": user.email})
+        setup = None if warm else token_cache.clear
+        times = timed(lambda _: get_current_user(token, db), repeat, setup)
+        token_cache.clear()
+        return times
+
+
+def cases(args):
+    # name -> function returning the list of timings
+    yield "create_access_token", lambda: timed(lambda _: create_access_token(data={"sub": "bench@example.com"}), args.repeat * 10)
+    token = create_access_token(data={"sub": "bench@example.com"})
+    yield "decode_access_token", lambda: timed(lambda _: decode_access_token(token), args.repeat * 10)
+    yield "get_current_user[cold]", lambda: bench_get_current_user(False, args.repeat * 10)
+    yield "get_current_user[warm]", lambda: bench_get_current_user(True, args.repeat * 10)
+    for size in args.sizes:
+        yield f"generate_seats[seats={size}]", lambda size=size: bench_generate_seats(size, args.repeat)
+        yield f"read_event_seats[seats={size}]", lambda size=size: bench_read_event_seats(size, args.repeat, {})
+        yield f"read_event_seats_packed[seats={size}]", lambda size=size: bench_read_event_seats(size, args.repeat, {"format": "packed"})
+        yield f"read_event_seats_304[seats={size}]", lambda size=size: bench_read_event_seats(size, args.repeat, {}, revalidate=True)
+    for expired in args.expired:
+        yield f"expire_holds[expired={expired}]", lambda expired=expired: bench_expire_holds(expired, args.repeat)
+
+
+def run(args) -> dict:
+    results = {}
+    for name, bench in cases(args):
+        if args.only and not any(part in name for part in args.only):
+            continue
+        times = bench()
+        results[name] = {
+            "median_ms": round(statistics.median(times) * 1000, 4),
+            "min_ms": round(min(times) * 1000, 4),
+            "runs": len(times),
+        }
+        print(f"{name:<42} {results[name]['median_ms']:>12.4f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "when": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    Return the regressions: cases whose median is slower than the baseline by more than 'threshold'
+    """
+    regressions = []
+    print(f"{'case':<42} {'baseline ms':>12} {'now ms':>12} {'change':>8}", file=sys.stderr)
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<42} {'-':>12} {result['median_ms']:>12.4f} {'new':>8}", file=sys.stderr)
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<42} {before['median_ms']:>12.4f} {result['median_ms']:>12.4f} {change:>+7.1%}{flag}", file=sys.stderr)
+        if change > threshold:
+            regressions.append({"case": name, "baseline_ms": before["median_ms"], "now_ms": result["median_ms"], "change": round(change, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10_000], help="seats per event")
+    parser.add_argument("--expired", type=int, nargs="+", default=[10, 1000, 10_000], help="expired holds to release")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="run only the cases whose name contains one of these")
+    parser.add_argument("--save", help="write the results to this JSON baseline")
+    parser.add_argument("--compare", help="compare against this JSON baseline (exit status 1 on regressions)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown of a median before it counts as a regression")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    current = run(args)
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+
+    if not args.compare:
+        print(json.dumps(current, indent=2))
+        return
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    print(json.dumps({**current, "baseline": baseline["meta"], "threshold": args.threshold, "regressions": regressions}, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+-- Indexes for the keyset-paginated listing endpoints.
+-- New databases get them from models.Base.metadata.create_all(); run this on existing databases:
+--     psql "$DATABASE_URL" -f migrations/0001_listing_indexes.sql
+
+-- GET /events/{event_id}/seats (ORDER BY number, optionally filtered by ?status=)
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_seats_event_id_number ON seats (event_id, number);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_seats_event_id_status_number ON seats (event_id, status, number);
+
+-- GET /events/{event_id}/reservations (ORDER BY reserved_at, id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_reservations_reserved_at_id ON reservations (reserved_at, id);
@@ -0,0 +1,19 @@
+-- Enum-typed seat status and indexes for the hot hold/reservation queries.
+-- New databases get them from models.Base.metadata.create_all(); run this on existing databases:
+--     psql "$DATABASE_URL" -f migrations/0002_seat_status_enum_and_hot_indexes.sql
+-- The ALTER COLUMN rewrites the seats table (and its indexes) under an exclusive lock: run it off-peak.
+
+BEGIN;
+CREATE TYPE seat_status AS ENUM ('available', 'on_hold', 'reserved');
+ALTER TABLE seats ALTER COLUMN status DROP DEFAULT;
+ALTER TABLE seats ALTER COLUMN status TYPE seat_status USING status::seat_status;
+COMMIT;
+
+-- expire_holds (DELETE ... WHERE expires_at <= now())
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_holds_expires_at ON holds (expires_at);
+
+-- reserve_seat (one reservation per user per event)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_reservations_user_id ON reservations (user_id);
+
+-- best-available and ?status=available: only the free seats are indexed
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_seats_event_id_number_available ON seats (event_id, number) WHERE status = 'available';
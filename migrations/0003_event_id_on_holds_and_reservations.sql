@@ -0,0 +1,17 @@
+-- Copy event_id onto holds and reservations, so per-event queries don't join seats (step 1 of 2).
+-- New databases get it from models.Base.metadata.create_all(); on existing databases the change is rolled out in order:
+--   1. this migration: adds the columns as NULLable, so the running (old) application keeps inserting rows without them
+--          psql "$DATABASE_URL" -f migrations/0003_event_id_on_holds_and_reservations.sql
+--   2. deploy the application version that writes event_id
+--   3. migrations/0004_event_id_backfill_and_not_null.sql: backfills the older rows in batches, then makes the columns NOT NULL
+
+ALTER TABLE holds ADD COLUMN IF NOT EXISTS event_id INTEGER REFERENCES events (id);
+ALTER TABLE reservations ADD COLUMN IF NOT EXISTS event_id INTEGER REFERENCES events (id);
+
+-- per-user hold limit and per-event expiry
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_holds_event_id_user_id ON holds (event_id, user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_holds_event_id_expires_at ON holds (event_id, expires_at);
+
+-- one reservation per user per event, and the per-event reservation listing
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_reservations_event_id_user_id ON reservations (event_id, user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_reservations_event_id_reserved_at_id ON reservations (event_id, reserved_at, id);
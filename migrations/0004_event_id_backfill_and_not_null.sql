@@ -0,0 +1,45 @@
+-- Copy event_id onto holds and reservations (step 2 of 2, see 0003_event_id_on_holds_and_reservations.sql).
+-- Run it once the application version that writes event_id is deployed everywhere, outside a transaction block:
+--     psql "$DATABASE_URL" -f migrations/0004_event_id_backfill_and_not_null.sql
+-- No step holds a long exclusive lock: the backfill commits every batch, the CHECK is added NOT VALID (no scan)
+-- and validated without blocking writes, and SET NOT NULL then relies on the validated CHECK instead of scanning.
+
+-- backfill the rows written by the old application, 5000 at a time (one transaction per batch)
+DO $$
+DECLARE
+    updated INTEGER;
+BEGIN
+    LOOP
+        UPDATE holds SET event_id = seats.event_id FROM seats
+        WHERE seats.id = holds.seat_id
+          AND holds.id IN (SELECT id FROM holds WHERE event_id IS NULL LIMIT 5000);
+        GET DIAGNOSTICS updated = ROW_COUNT;
+        COMMIT;
+        EXIT WHEN updated = 0;
+    END LOOP;
+    LOOP
+        UPDATE reservations SET event_id = seats.event_id FROM seats
+        WHERE seats.id = reservations.seat_id
+          AND reservations.id IN (SELECT id FROM reservations WHERE event_id IS NULL LIMIT 5000);
+        GET DIAGNOSTICS updated = ROW_COUNT;
+        COMMIT;
+        EXIT WHEN updated = 0;
+    END LOOP;
+END $$;
+
+ALTER TABLE holds DROP CONSTRAINT IF EXISTS holds_event_id_not_null;
+ALTER TABLE holds ADD CONSTRAINT holds_event_id_not_null CHECK (event_id IS NOT NULL) NOT VALID;
+ALTER TABLE holds VALIDATE CONSTRAINT holds_event_id_not_null;
+ALTER TABLE holds ALTER COLUMN event_id SET NOT NULL;
+ALTER TABLE holds DROP CONSTRAINT holds_event_id_not_null;
+
+ALTER TABLE reservations DROP CONSTRAINT IF EXISTS reservations_event_id_not_null;
+ALTER TABLE reservations ADD CONSTRAINT reservations_event_id_not_null CHECK (event_id IS NOT NULL) NOT VALID;
+ALTER TABLE reservations VALIDATE CONSTRAINT reservations_event_id_not_null;
+ALTER TABLE reservations ALTER COLUMN event_id SET NOT NULL;
+ALTER TABLE reservations DROP CONSTRAINT reservations_event_id_not_null;
+
+-- superseded by the event_id indexes of 0003 (every query of the new application filters on event_id)
+DROP INDEX CONCURRENTLY IF EXISTS ix_reservations_reserved_at_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_reservations_user_id;
+DROP INDEX CONCURRENTLY IF EXISTS ix_holds_user_id;
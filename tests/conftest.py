@@ -25,6 +25,10 @@ if not TEST_DATABASE_URL:
 # Override DATABASE_URL for test environment (to ensure it all for safety)
 os.environ["DATABASE_URL"] = TEST_DATABASE_URL
 
+# Profile the SQL of every request: a route running more statements than its budget (app/utils/sql_profiler.py) fails the test
+os.environ.setdefault("SQL_PROFILER", "1")
+os.environ.setdefault("SQL_PROFILER_STRICT", "1")
+
 engine = create_engine(TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -72,7 +76,7 @@ def db_session():
     connection = engine.connect()
     transaction = connection.begin() # starts a DB transaction so all changes made during the test can be rolled back afterward, keeping the DB clean.
 
-    session = TestingSessionLocal(bind=connection)
+    session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint") # a route's db.rollback() only undoes a savepoint, not the test's transaction
     try:
         yield session # pause here and give the access to the DB session
     finally:
@@ -104,4 +108,23 @@ def client(db_session):
     with TestClient(app) as c:
         yield c
 
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+@pytest.fixture()
+def auth_user(client, db_session):
+    """
+    Creates a user in the test session and makes every protected route see it as the logged-in user
+    (overrides get_current_user, so no token is needed)
+    """
+    from app.main import app
+    from app.deps import get_current_user
+    from app import models
+    from app.utils.token_cache import CurrentUser
+
+    user = models.User(email="tester@example.com", hashed_password="-")
+    db_session.add(user)
+    db_session.flush()
+
+    current_user = CurrentUser(user.id, user.email) # what get_current_user returns (not the ORM object, which reloads after each commit)
+    app.dependency_overrides[get_current_user] = lambda: current_user
+    return user
@@ -0,0 +1,137 @@
+import inspect
+from contextlib import contextmanager
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models
+from app.database import POOL_OPTIONS, get_async_db, make_async_engine
+from app.main import create_app
+from app.utils.pool_stats import TimedAsyncAdaptedQueuePool
+from app.utils.security import create_access_token
+
+SEAT_KEYS = {"seat", "seat_id", "seats"}
+TIMESTAMP_KEYS = {"expires_at", "reserved_at"}
+
+
+# ----- HELPERS -----
+
+@contextmanager
+def async_app_client():
+    """
+    A client of the app built with DB_MODE=async, its AsyncSession bound to one connection whose transaction is rolled back on exit
+    - the connection is opened and closed on the TestClient's event loop (an asyncpg connection belongs to one loop)
+    - yields (client, session)
+    """
+    app = create_app("async")
+    engine = make_async_engine()
+    state = {}
+
+    async def open_session():
+        state["connection"] = await engine.connect()
+        state["transaction"] = await state["connection"].begin()
+        state["session"] = AsyncSession(bind=state["connection"], join_transaction_mode="create_savepoint",
+                                        autoflush=False, expire_on_commit=False)
+
+    async def close_session():
+        await state["session"].close()
+        await state["transaction"].rollback()
+        await state["connection"].close()
+        await engine.dispose()
+
+    async def override_get_async_db():
+        yield state["session"]
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    assert isinstance(engine.sync_engine.pool, TimedAsyncAdaptedQueuePool)
+    assert engine.sync_engine.pool.size() == POOL_OPTIONS["pool_size"]
+    with TestClient(app) as c:
+        c.portal.call(open_session)
+        try:
+            yield c, state["session"]
+        finally:
+            c.portal.call(close_session)
+
+
+def normalized(body, ids: dict, kind: str = None):
+    # IDs replaced by their role in the flow and timestamps by their format, so two runs can be compared
+    # - ids: {"event": {id: name}, "seat": {...}, "reservation": {...}}; kind: what the body's own "id" is
+    if isinstance(body, list):
+        return [normalized(item, ids, kind) for item in body]
+    if not isinstance(body, dict):
+        return body
+    def rename(table, value):
+        return [ids[table].get(v, "<?>") for v in value] if isinstance(value, list) else ids[table].get(value, "<?>")
+
+    result = {}
+    for key, value in body.items():
+        if key == "id":
+            value = rename(kind, value)
+        elif key in SEAT_KEYS:
+            value = rename("seat", value)
+        elif key == "event_id":
+            value = rename("event", value)
+        elif key == "user_id":
+            value = "<user>"
+        elif key in TIMESTAMP_KEYS:
+            assert datetime.fromisoformat(value).tzinfo is not None and value.endswith("Z"), value
+            value = "<timestamp>"
+        result[key] = value
+    return result
+
+
+def run_flow(client, token: str, user_id: int) -> list:
+    """
+    create event -> list seats -> hold (one seat, then a batch) -> reserve -> list reservations -> cancel -> list seats
+    - returns each step as (status code, normalized body)
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    created = client.post("/events/", json={"name": "Mode Event", "total_seats": 10})
+    assert created.status_code == 201, created.text
+    event_id = created.json()["id"]
+    seats = client.get(f"/events/{event_id}/seats/")
+    seat_ids = [seat["id"] for seat in seats.json()]
+
+    steps = [(created, "event"), (seats, "seat"),
+             (client.post(f"/events/{event_id}/seats/{seat_ids[-1]}/hold/", json={"seconds": 60}, headers=headers), None),
+             (client.post(f"/events/{event_id}/holds/", json={"seat_ids": seat_ids[4:6], "seconds": 60}, headers=headers), None),
+             (client.post(f"/events/{event_id}/seats/{seat_ids[-1]}/reservation/", headers=headers), "reservation")]
+    reservation_id = steps[-1][0].json().get("id")
+    steps += [(client.get(f"/events/{event_id}/reservations/"), "reservation"),
+              (client.request("DELETE", f"/events/{event_id}/seats/{seat_ids[-1]}/reservation/", json={"user_id": str(user_id)}), None),
+              (client.get(f"/events/{event_id}/seats/"), "seat")]
+
+    ids = {"event": {event_id: "<event>"}, "reservation": {reservation_id: "<reservation>"},
+           "seat": {seat_id: f"<seat {i}>" for i, seat_id in enumerate(seat_ids)}}
+    return [(r.status_code, normalized(r.json(), ids, kind)) for r, kind in steps]
+
+
+# ----- TESTS -----
+
+def test_async_routers_answer_like_the_sync_ones(client, db_session):
+    """
+    The same flow through DB_MODE=async (AsyncSession, run_sync hold path, async token check) and the sync routers
+    gives the same statuses and bodies
+    """
+    # the async run is rolled back before the sync one starts (with PARTITION_BY_EVENT=1 creating an event locks the tables)
+    with async_app_client() as (aclient, session):
+        endpoints = {route.path: route.endpoint for route in aclient.app.routes}
+        assert inspect.iscoroutinefunction(endpoints["/events/{event_id}/seats/{seat_id}/hold/"]) # the aio routers are mounted
+
+        async def add_user():
+            user = models.User(email="async-mode@example.com", hashed_password="-")
+            session.add(user)
+            await session.flush()
+            return user.id
+
+        async_user_id = aclient.portal.call(add_user)
+        async_steps = run_flow(aclient, create_access_token({"sub": "async-mode@example.com"}), async_user_id)
+
+    user = models.User(email="sync-mode@example.com", hashed_password="-")
+    db_session.add(user)
+    db_session.flush()
+    sync_steps = run_flow(client, create_access_token({"sub": "sync-mode@example.com"}), user.id)
+
+    assert [status for status, _ in async_steps] == [201, 200, 201, 201, 201, 200, 200, 200]
+    assert async_steps == sync_steps
+    statuses = [seat["status"] for seat in async_steps[-1][1]]
+    assert statuses == ["available"] * 4 + ["on_hold"] * 2 + ["available"] * 4
@@ -0,0 +1,32 @@
+import pytest
+from fastapi import HTTPException
+from app.utils.password_pool import PasswordHashPool
+
+
+def test_register_and_login(client):
+    """
+    Register and login go through the password hashing pool (bcrypt runs in a worker process)
+    """
+    r = client.post("/auth/register", json={"email": "login@example.com", "password": "s3cret-pass"})
+    assert r.status_code == 201, r.text
+
+    r = client.post("/auth/token", data={"username": "login@example.com", "password": "s3cret-pass"})
+    assert r.status_code == 200, r.text
+    assert r.json()["token_type"] == "bearer"
+
+    r = client.post("/auth/token", data={"username": "login@example.com", "password": "wrong"})
+    assert r.status_code == 400
+
+
+def test_pool_rejects_when_full():
+    pool = PasswordHashPool(workers=1, concurrency=1, queue_timeout=0)
+    pool._slots.acquire() # the only slot is busy
+    try:
+        with pytest.raises(HTTPException) as exc:
+            pool.run(pow, 2, 10)
+        assert exc.value.status_code == 503
+    finally:
+        pool._slots.release()
+
+    assert pool.run(pow, 2, 10) == 1024
+    pool.shutdown()
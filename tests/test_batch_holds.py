@@ -0,0 +1,101 @@
+from app import models
+
+
+# ----- HELPERS -----
+
+# Creates an event and returns its id and the ids of its seats (in seat number order)
+def create_event_with_seats(client, total_seats=10):
+    event = client.post("/events/", json={"name": "Batch Event", "total_seats": total_seats}).json()
+    seat_ids = [s["id"] for s in client.get(f"/events/{event['id']}/seats/").json()]
+    return event["id"], seat_ids
+
+
+def seat_statuses(client, event_id):
+    return {s["id"]: s["status"] for s in client.get(f"/events/{event_id}/seats/").json()}
+
+
+# ----- TESTS -----
+
+def test_batch_hold_holds_every_seat(client, auth_user):
+    event_id, seat_ids = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": [seat_ids[2], seat_ids[0], seat_ids[1]], "seconds": 60})
+    assert r.status_code == 201, r.text
+    assert r.json()["seats"] == seat_ids[:3] # locked and returned in ID order
+
+    statuses = seat_statuses(client, event_id)
+    assert [statuses[i] for i in seat_ids[:4]] == ["on_hold", "on_hold", "on_hold", "available"]
+
+
+def test_batch_hold_is_all_or_nothing(client, auth_user):
+    """
+    If one seat can't be held, none of the others are held either
+    """
+    event_id, seat_ids = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": [seat_ids[0]]})
+    assert r.status_code == 201, r.text
+
+    r2 = client.post(f"/events/{event_id}/holds/", json={"seat_ids": [seat_ids[1], seat_ids[0]]})
+    assert r2.status_code == 409
+    assert seat_statuses(client, event_id)[seat_ids[1]] == "available"
+
+
+def test_batch_hold_applies_user_limit_once(client, auth_user):
+    event_id, seat_ids = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": seat_ids[:4]})
+    assert r.status_code == 409, r.text
+    assert "limit" in r.json()["detail"]
+
+
+def test_batch_hold_unknown_seat(client, auth_user):
+    event_id, seat_ids = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": [seat_ids[0], -1]})
+    assert r.status_code == 404
+
+
+def test_best_available_holds_lowest_adjacent_seats(client, auth_user):
+    event_id, seat_ids = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": [seat_ids[1]]})
+    assert r.status_code == 201, r.text
+
+    # seat 1 is free but seat 2 is taken, so the first run of 2 is seats 3-4
+    r = client.post(f"/events/{event_id}/holds/best-available", json={"quantity": 2, "seconds": 30})
+    assert r.status_code == 201, r.text
+    assert r.json()["seats"] == seat_ids[2:4]
+
+    statuses = seat_statuses(client, event_id)
+    assert [statuses[i] for i in seat_ids[:5]] == ["available", "on_hold", "on_hold", "on_hold", "available"]
+
+
+def test_best_available_applies_user_limit(client, auth_user):
+    event_id, _ = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/holds/best-available", json={"quantity": 4})
+    assert r.status_code == 409
+    assert "limit" in r.json()["detail"]
+
+    # refused before the seat map is searched (no 1 TB search pattern)
+    r = client.post(f"/events/{event_id}/holds/best-available", json={"quantity": 1000000000000})
+    assert r.status_code == 409
+    assert "limit" in r.json()["detail"]
+
+
+def test_best_available_without_a_long_enough_run(client, auth_user):
+    event_id, seat_ids = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": [seat_ids[2], seat_ids[5], seat_ids[8]]})
+    assert r.status_code == 201, r.text
+
+    r = client.post(f"/events/{event_id}/holds/best-available", json={"quantity": 3})
+    assert r.status_code == 409
+    assert "adjacent" in r.json()["detail"]
+
+
+def test_best_available_unknown_event(client, auth_user):
+    r = client.post("/events/999999/holds/best-available", json={"quantity": 1})
+    assert r.status_code == 404
+
+
+def test_holds_store_their_event_id(client, auth_user, db_session):
+    event_id, seat_ids = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": seat_ids[:2]})
+    assert r.status_code == 201, r.text
+    holds = db_session.query(models.Hold).filter(models.Hold.seat_id.in_(seat_ids[:2])).all()
+    assert [hold.event_id for hold in holds] == [event_id, event_id]
@@ -0,0 +1,110 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import delete, select, update
+from app import models
+from app.utils.expire_holds import expire_holds
+from app.utils.seat_generation import generate_seats
+from .conftest import TestingSessionLocal
+
+# ----- HELPERS -----
+
+# Creates an event with its seats directly in the test session
+def make_event(db, total_seats=3):
+    event = models.Event(name="Expire Test", total_seats=total_seats)
+    db.add(event)
+    db.flush()
+    generate_seats(db, event.id, total_seats)
+    seats = db.query(models.Seat).filter(models.Seat.event_id == event.id).order_by(models.Seat.number).all()
+    return event, seats
+
+
+# Puts a seat on hold with the given expiration time
+def make_hold(db, seat, expires_at, user_id="user-x"):
+    seat.status = "on_hold"
+    db.add(models.Hold(user_id=user_id, seat_id=seat.id, event_id=seat.event_id, expires_at=expires_at))
+    db.flush()
+
+
+# ----- TESTS -----
+
+def test_expire_holds_releases_only_expired_seats(db_session):
+    """
+    Expired holds are deleted and their seats become available; active holds stay untouched
+    """
+    event, seats = make_event(db_session)
+    now = datetime.now(timezone.utc)
+    make_hold(db_session, seats[0], now - timedelta(seconds=5))
+    make_hold(db_session, seats[1], now + timedelta(seconds=60))
+
+    released = expire_holds(db_session, event_id=event.id)
+    assert released == 1
+
+    statuses = [s.status for s in db_session.query(models.Seat).filter(models.Seat.event_id == event.id).order_by(models.Seat.number)]
+    assert statuses == ["available", "on_hold", "available"]
+    assert db_session.query(models.Hold).filter(models.Hold.seat_id == seats[0].id).count() == 0
+
+
+def test_expire_holds_respects_event_filter(db_session):
+    """
+    Passing event_id only expires holds belonging to that event
+    """
+    event_a, seats_a = make_event(db_session)
+    event_b, seats_b = make_event(db_session)
+    past = datetime.now(timezone.utc) - timedelta(seconds=5)
+    make_hold(db_session, seats_a[0], past)
+    make_hold(db_session, seats_b[0], past)
+
+    assert expire_holds(db_session, event_id=event_a.id) == 1
+    assert db_session.query(models.Hold).filter(models.Hold.seat_id == seats_b[0].id).count() == 1
+
+
+def test_expire_holds_waits_for_a_seat_being_reserved():
+    """
+    A sweep and a reservation of the same seat don't deadlock: the sweep locks the seat first, like reserve_seat,
+    so it waits for the reservation (which deletes the hold itself) instead of holding the hold row
+    """
+    setup = TestingSessionLocal()
+    event, seats = make_event(setup)
+    make_hold(setup, seats[0], datetime.now(timezone.utc) - timedelta(seconds=5))
+    setup.commit()
+    event_id, seat_id = event.id, seats[0].id
+
+    reserving = TestingSessionLocal()
+    sweeping = TestingSessionLocal()
+    try:
+        # reserve_seat: lock the seat, then delete its hold
+        reserving.execute(select(models.Seat).where(models.Seat.id == seat_id).with_for_update())
+        sweep = ThreadPoolExecutor(1).submit(expire_holds, sweeping, event_id)
+        time.sleep(0.3)
+        assert not sweep.done() # waiting for the seat lock
+        reserving.execute(delete(models.Hold).where(models.Hold.seat_id == seat_id))
+        reserving.execute(update(models.Seat).where(models.Seat.id == seat_id).values(status="reserved"))
+        reserving.commit()
+
+        assert sweep.result(timeout=5) == 0 # the hold went with the reservation
+        assert setup.execute(select(models.Seat.status).where(models.Seat.id == seat_id)).scalar() == "reserved"
+    finally:
+        reserving.close()
+        sweeping.close()
+        setup.rollback()
+        setup.execute(delete(models.Hold).where(models.Hold.event_id == event_id))
+        setup.execute(delete(models.Seat).where(models.Seat.event_id == event_id))
+        setup.execute(delete(models.Event).where(models.Event.id == event_id))
+        setup.commit()
+        setup.close()
+
+
+def test_expire_holds_commits_holds_of_seats_no_longer_on_hold(db_session):
+    """
+    An expired hold whose seat isn't on_hold anymore is still removed (and committed), without releasing the seat
+    """
+    event, seats = make_event(db_session)
+    make_hold(db_session, seats[0], datetime.now(timezone.utc) - timedelta(seconds=5))
+    seats[0].status = "reserved"
+    db_session.commit()
+
+    assert expire_holds(db_session, event_id=event.id) == 0
+    db_session.rollback() # drops anything expire_holds left uncommitted
+    assert db_session.query(models.Hold).filter(models.Hold.event_id == event.id).count() == 0
+    assert db_session.query(models.Seat.status).filter(models.Seat.id == seats[0].id).scalar() == "reserved"
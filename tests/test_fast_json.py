@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+from typing import List
+from pydantic import TypeAdapter
+from app import models
+from app.schemas import EventRead, SeatRead, ReservationRead
+from app.utils.fast_json import dumps, rows_body
+from .test_batch_holds import create_event_with_seats
+
+
+# ----- HELPERS -----
+
+def pydantic_body(schema, objects) -> bytes:
+    # what response_model=List[schema] produced from ORM objects before the fast path
+    adapter = TypeAdapter(List[schema])
+    return adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+
+
+# ----- TESTS -----
+
+def test_datetimes_are_written_like_pydantic(monkeypatch):
+    content = {"at": datetime(2026, 3, 1, 20, 30, 5, 123456, tzinfo=timezone.utc), "name": "Açaí"}
+    expected = TypeAdapter(dict).dump_json(content)
+    assert dumps(content) == expected
+    monkeypatch.setattr("app.utils.fast_json.orjson", None) # without orjson installed
+    assert dumps(content) == expected
+
+
+def test_list_endpoints_send_what_the_schemas_describe(client, auth_user, db_session):
+    """
+    The column-tuple bodies are byte for byte what Pydantic made of the ORM objects
+    """
+    event_id, seat_ids = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/seats/{seat_ids[1]}/hold/", json={"seconds": 60})
+    assert r.status_code == 201, r.text
+    r = client.post(f"/events/{event_id}/seats/{seat_ids[1]}/reservation/")
+    assert r.status_code == 201, r.text
+
+    seats = client.get(f"/events/{event_id}/seats/")
+    orm_seats = db_session.query(models.Seat).filter(models.Seat.event_id == event_id).order_by(models.Seat.number).all()
+    assert seats.content == pydantic_body(SeatRead, orm_seats)
+    assert seats.json()[1]["status"] == "reserved"
+
+    reservations = client.get(f"/events/{event_id}/reservations/")
+    orm_reservations = db_session.query(models.Reservation).filter(models.Reservation.event_id == event_id).all()
+    assert reservations.content == pydantic_body(ReservationRead, orm_reservations)
+
+    events = client.get("/events/", params={"limit": 1000})
+    orm_events = db_session.query(models.Event).order_by(models.Event.id).limit(1000).all()
+    assert events.content == pydantic_body(EventRead, orm_events)
+    assert client.get(f"/events/{event_id}").json() == EventRead.model_validate(db_session.get(models.Event, event_id)).model_dump()
+
+
+def test_rows_body_uses_the_schema_field_order():
+    assert rows_body(SeatRead, [(7, 1, "available")]) == b'[{"id":7,"number":1,"status":"available"}]'
+
+
+def test_hold_and_list_endpoints_write_timestamps_alike(client, auth_user):
+    """
+    The hand-built hold bodies use the same timestamp format as the schema-backed ones: ISO 8601 with 'Z' for UTC
+    """
+    event_id, seat_ids = create_event_with_seats(client)
+    user_id = str(auth_user.id)
+    responses = [
+        client.post(f"/events/{event_id}/seats/{seat_ids[0]}/hold/", json={"seconds": 60}),
+        client.put(f"/events/{event_id}/seats/{seat_ids[0]}/hold/", json={"user_id": user_id, "seconds": 30}),
+        client.post(f"/events/{event_id}/holds/", json={"seat_ids": [seat_ids[1]], "seconds": 60}),
+        client.post(f"/events/{event_id}/holds/best-available", json={"quantity": 1, "seconds": 60}),
+        client.post(f"/events/{event_id}/seats/{seat_ids[0]}/reservation/"),
+        client.get(f"/events/{event_id}/reservations/"),
+    ]
+    for r in responses:
+        assert r.status_code in (200, 201), r.text
+    bodies = [r.json() for r in responses]
+    timestamps = [body["expires_at"] for body in bodies[:4]] + [bodies[4]["reserved_at"], bodies[5][0]["reserved_at"]]
+    for value in timestamps:
+        assert value.endswith("Z") and "+00:00" not in value, timestamps
+        assert datetime.fromisoformat(value).tzinfo == timezone.utc
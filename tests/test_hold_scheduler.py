@@ -0,0 +1,67 @@
+from contextlib import nullcontext
+from datetime import datetime, timezone, timedelta
+from app import models
+from app.utils.expire_holds import holds_expired
+from app.utils.hold_scheduler import HoldExpiryScheduler
+from app.utils.metrics import render_prometheus
+from .test_expire_holds import make_event, make_hold
+
+
+def test_scheduler_pops_due_holds_in_deadline_order():
+    """
+    Only holds whose deadline has passed are popped, the oldest first
+    """
+    scheduler = HoldExpiryScheduler(session_factory=None)
+    now = datetime.now(timezone.utc)
+    scheduler.schedule(1, now - timedelta(seconds=1))
+    scheduler.schedule(2, now - timedelta(seconds=5))
+    scheduler.schedule(3, now + timedelta(seconds=60))
+
+    batch = scheduler._pop_due()
+    assert [hold_id for _, hold_id in batch] == [2, 1]
+    assert scheduler.stats()["pending"] == 1
+
+
+def test_scheduler_skips_refreshed_hold_deadlines():
+    """
+    Refreshing a hold moves its deadline; the old heap entry must not release it
+    """
+    scheduler = HoldExpiryScheduler(session_factory=None)
+    now = datetime.now(timezone.utc)
+    scheduler.schedule(1, now - timedelta(seconds=1))
+    scheduler.schedule(1, now + timedelta(seconds=60)) # refreshed
+
+    assert scheduler._pop_due() == []
+    assert scheduler.stats()["pending"] == 1
+
+
+def test_resync_loads_only_the_holds_due_soon(db_session):
+    """
+    A resync reloads the holds expiring within the next windows, not every hold in the table
+    """
+    event, seats = make_event(db_session)
+    now = datetime.now(timezone.utc)
+    make_hold(db_session, seats[0], now + timedelta(seconds=10))
+    make_hold(db_session, seats[1], now + timedelta(hours=1))
+    hold_ids = dict(db_session.query(models.Hold.seat_id, models.Hold.id).filter(models.Hold.event_id == event.id).all())
+
+    scheduler = HoldExpiryScheduler(session_factory=lambda: nullcontext(db_session))
+    scheduler._resync()
+    assert hold_ids[seats[0].id] in scheduler._scheduled
+    assert hold_ids[seats[1].id] not in scheduler._scheduled
+
+
+def test_scheduler_releases_are_counted_once(db_session):
+    """
+    A scheduler batch counts its released seats in holds_expired_total{source="scheduler"}, under no other name
+    """
+    event, seats = make_event(db_session)
+    make_hold(db_session, seats[0], datetime.now(timezone.utc) - timedelta(seconds=5))
+    hold = db_session.query(models.Hold).filter(models.Hold.event_id == event.id).one()
+    before = holds_expired.labels("scheduler").snapshot()
+
+    scheduler = HoldExpiryScheduler(session_factory=lambda: nullcontext(db_session))
+    scheduler.schedule(hold.id, hold.expires_at, event.id)
+    scheduler._release(scheduler._pop_due())
+    assert holds_expired.labels("scheduler").snapshot() == before + 1
+    assert "hold_expiry_seats_released_total" not in render_prometheus()
@@ -0,0 +1,124 @@
+import asyncio
+import uuid
+from app.utils.idempotency import IdempotencyMiddleware, IdempotencyStore
+from app.utils.waiting_room import waiting_room
+from .test_batch_holds import create_event_with_seats
+from .test_sql_profiler import profile_of
+
+
+# ----- HELPERS -----
+
+def idempotency_key():
+    return {"Idempotency-Key": uuid.uuid4().hex}
+
+
+class CountingApp:
+    """
+    ASGI app answering after 'release' is set; 'statuses' are sent in turn (one per call)
+    """
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        status = self.statuses.pop(0)
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": f"call {self.calls}".encode()})
+
+
+async def post(app, key: bytes = b"k1", path: str = "/events/1/seats/2/hold/"):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "query_string": b"", "app": None,
+             "headers": [(b"idempotency-key", key)]}
+    await app(scope, receive, send)
+    return sent[0]["status"], sent[1]["body"], dict(sent[0]["headers"])
+
+
+# ----- TESTS -----
+
+def test_retried_hold_replays_the_first_response(client, auth_user):
+    event_id, seat_ids = create_event_with_seats(client)
+    url = f"/events/{event_id}/seats/{seat_ids[0]}/hold/"
+    headers = idempotency_key()
+
+    first = client.post(url, json={"seconds": 30}, headers=headers)
+    assert first.status_code == 201, first.text
+    retry = client.post(url, json={"seconds": 30}, headers=headers)
+    assert (retry.status_code, retry.content) == (201, first.content)
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert profile_of(retry)["queries"] == 0 # no seat lock, no query
+
+    # the same key for another request is refused; a retry without a key runs again
+    other = client.post(f"/events/{event_id}/seats/{seat_ids[1]}/hold/", json={"seconds": 30}, headers=headers)
+    assert other.status_code == 422
+    assert client.post(url, json={"seconds": 30}).status_code == 409
+
+
+def test_concurrent_duplicates_coalesce(monkeypatch):
+    monkeypatch.setattr("app.utils.idempotency.resolve_route", lambda scope: None)
+
+    async def scenario():
+        app = CountingApp(201)
+        middleware = IdempotencyMiddleware(app, IdempotencyStore(ttl=60))
+        first = asyncio.create_task(post(middleware))
+        duplicate = asyncio.create_task(post(middleware))
+        await asyncio.sleep(0.01) # both arrived; the duplicate waits for the first one
+        app.release.set()
+        return app.calls, await first, await duplicate
+
+    calls, first, duplicate = asyncio.run(scenario())
+    assert calls == 1
+    assert first[:2] == duplicate[:2] == (201, b"call 1")
+    assert duplicate[2][b"idempotent-replayed"] == b"true"
+
+
+def test_failed_attempts_are_not_stored():
+    async def scenario():
+        app = CountingApp(503, 201)
+        app.release.set()
+        middleware = IdempotencyMiddleware(app, IdempotencyStore(ttl=60))
+        return await post(middleware), await post(middleware), app.calls
+
+    failed, retried, calls = asyncio.run(scenario())
+    assert (failed[0], retried[0], calls) == (503, 201, 2)
+
+
+def test_retry_after_taking_a_queue_ticket_runs_again(client, auth_user, monkeypatch):
+    """
+    A 428 (no queue ticket yet) isn't replayed: the retry with the ticket and the same key gets its seat
+    """
+    monkeypatch.setattr(waiting_room, "enabled", True)
+    event_id, seat_ids = create_event_with_seats(client)
+    url = f"/events/{event_id}/seats/{seat_ids[0]}/hold/"
+    headers = idempotency_key()
+
+    assert client.post(url, json={"seconds": 30}, headers=headers).status_code == 428
+    ticket = client.post(f"/events/{event_id}/queue/").json()["ticket"]
+    retry = client.post(url, json={"seconds": 30}, headers={**headers, "X-Queue-Ticket": ticket})
+    assert retry.status_code == 201, retry.text
+    assert "Idempotent-Replayed" not in retry.headers
+
+
+def test_transient_client_errors_are_not_stored(monkeypatch):
+    monkeypatch.setattr("app.utils.idempotency.resolve_route", lambda scope: None)
+
+    async def scenario():
+        app = CountingApp(429, 409, 404, 404)
+        app.release.set()
+        middleware = IdempotencyMiddleware(app, IdempotencyStore(ttl=60))
+        return [(await post(middleware))[0] for _ in range(4)], app.calls
+
+    statuses, calls = asyncio.run(scenario())
+    assert statuses == [429, 409, 404, 404]
+    assert calls == 3 # the 404 is the answer any retry would get: replayed
@@ -0,0 +1,56 @@
+from app.database import POOL_OPTIONS
+
+
+def test_pool_metrics_report_connection_usage(client):
+    """
+    /metrics/pool reports the live pool state and the checkout wait histogram
+    """
+    r = client.get("/metrics/pool")
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert {"checked_out", "idle", "overflow", "pool_size"} <= set(body["pools"]["sync"])
+    assert body["pools"]["sync"]["max_overflow"] == POOL_OPTIONS["max_overflow"]
+    assert body["checkout_wait_seconds"]["buckets"]["+Inf"] == body["checkout_wait_seconds"]["count"]
+
+
+def test_hold_expiry_metrics(client):
+    r = client.get("/metrics/holds")
+    assert r.status_code == 200, r.text
+    assert "last_lag_seconds" in r.json()
+
+
+def sample(text, line_start):
+    # value of the first exposition line starting with line_start
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_prometheus_exposition_reports_routes_and_sql(client, auth_user):
+    event = client.post("/events/", json={"name": "Metrics Event", "total_seats": 10}).json()
+    seat_id = client.get(f"/events/{event['id']}/seats/").json()[0]["id"]
+    created_before = sample(client.get("/metrics").text, "holds_created_total ")
+
+    r = client.post(f"/events/{event['id']}/seats/{seat_id}/hold/", json={"seconds": 30})
+    assert r.status_code == 201, r.text
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = r.text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    # labeled by the route template, not the raw path
+    assert sample(text, 'http_request_duration_seconds_count{method="POST",route="/events/{event_id}/seats/{seat_id}/hold/",status="201"}') >= 1
+    assert sample(text, 'db_queries_per_request_count{route="/events/{event_id}/seats/{seat_id}/hold/"}') >= 1
+    assert sample(text, 'db_queries_per_request_sum{route="/events/{event_id}/seats/{seat_id}/hold/"}') >= 1
+    assert sample(text, "holds_created_total ") == created_before + 1
+    assert sample(text, "http_requests_in_flight ") >= 1 # this scrape itself
+
+
+def test_labeled_metrics_render_escaped_labels():
+    from app.utils.metrics import Counter, render_prometheus
+    registry = {}
+    counter = Counter("demo_total", "Demo", labelnames=("path",), registry=registry)
+    counter.labels('a"b').inc(2)
+    assert render_prometheus(registry) == '# HELP demo_total Demo\n# TYPE demo_total counter\ndemo_total{path="a\\"b"} 2\n'
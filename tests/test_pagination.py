@@ -0,0 +1,53 @@
+from app.utils.pagination import encode_cursor, decode_cursor
+
+# ----- HELPERS -----
+
+# Follows X-Next-Cursor until the last page and returns every item
+def fetch_all_pages(client, url, **params):
+    items, cursor, pages = [], None, 0
+    while True:
+        r = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        items += r.json()
+        pages += 1
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            return items, pages
+
+
+# ----- TESTS -----
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42), int) == [42]
+
+
+def test_invalid_cursor_is_rejected(client):
+    r = client.get("/events/", params={"cursor": "not-a-cursor"})
+    assert r.status_code == 400
+
+
+def test_seat_pages_cover_the_event_once(client):
+    event = client.post("/events/", json={"name": "Paged Event", "total_seats": 25}).json()
+    seats, pages = fetch_all_pages(client, f"/events/{event['id']}/seats/", limit=10)
+    assert pages == 3
+    assert [s["number"] for s in seats] == list(range(1, 26))
+
+
+def test_seat_status_filter(client, auth_user):
+    event = client.post("/events/", json={"name": "Filtered Event", "total_seats": 10}).json()
+    first = client.get(f"/events/{event['id']}/seats/", params={"limit": 1}).json()[0]
+    r = client.post(f"/events/{event['id']}/seats/{first['id']}/hold/", json={"seconds": 60})
+    assert r.status_code == 201, r.text
+
+    on_hold = client.get(f"/events/{event['id']}/seats/", params={"status": "on_hold"}).json()
+    available = client.get(f"/events/{event['id']}/seats/", params={"status": "available"}).json()
+    assert [s["id"] for s in on_hold] == [first["id"]]
+    assert len(available) == 9
+
+
+def test_event_pages(client):
+    for i in range(3):
+        client.post("/events/", json={"name": f"Listed {i}", "total_seats": 10})
+    events, _ = fetch_all_pages(client, "/events/", limit=2)
+    ids = [e["id"] for e in events]
+    assert ids == sorted(ids) and len(ids) == len(set(ids)) >= 3
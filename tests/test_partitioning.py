@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import text
+from app.database import PARTITION_BY_EVENT
+from app.utils.partitioning import PARTITIONED_TABLES, detach_event_partitions, partition_name
+from .test_batch_holds import create_event_with_seats
+
+pytestmark = pytest.mark.skipif(not PARTITION_BY_EVENT, reason="run with PARTITION_BY_EVENT=1")
+
+
+# ----- HELPERS -----
+
+def attached_partitions(db, event_id: int) -> list:
+    return db.execute(text("SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = inhrelid "
+                           "WHERE child.relname LIKE :pattern ORDER BY child.relname"),
+                      {"pattern": f"%_event_{event_id}"}).scalars().all()
+
+
+# ----- TESTS -----
+
+def test_created_event_gets_its_own_partitions(client, auth_user, db_session):
+    event_id, seat_ids = create_event_with_seats(client)
+    other_event_id, _ = create_event_with_seats(client)
+    assert attached_partitions(db_session, event_id) == sorted(partition_name(table, event_id) for table in PARTITIONED_TABLES)
+
+    r = client.post(f"/events/{event_id}/seats/{seat_ids[0]}/hold/", json={"seconds": 60})
+    assert r.status_code == 201, r.text
+    assert db_session.execute(text(f"SELECT count(*) FROM {partition_name('holds', event_id)}")).scalar() == 1
+
+    # a per-event query is planned against that event's partition only
+    plan = "\n".join(db_session.execute(text("EXPLAIN SELECT id FROM seats WHERE event_id = :event_id"),
+                                        {"event_id": event_id}).scalars())
+    assert partition_name("seats", event_id) in plan
+    assert partition_name("seats", other_event_id) not in plan
+
+
+def test_detached_event_leaves_the_shared_tables(client, auth_user, db_session):
+    event_id, seat_ids = create_event_with_seats(client)
+    other_event_id, _ = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/seats/{seat_ids[0]}/hold/", json={"seconds": 60})
+    assert r.status_code == 201, r.text
+
+    detached = detach_event_partitions(db_session.connection(), event_id)
+    assert detached == [partition_name(table, event_id) for table in reversed(PARTITIONED_TABLES)]
+    assert attached_partitions(db_session, event_id) == []
+    assert db_session.execute(text("SELECT count(*) FROM seats WHERE event_id = :e"), {"e": event_id}).scalar() == 0
+    assert db_session.execute(text("SELECT count(*) FROM seats WHERE event_id = :e"), {"e": other_event_id}).scalar() == 10
+    # the archived rows are still there, in the detached tables
+    assert db_session.execute(text(f"SELECT count(*) FROM {partition_name('seats', event_id)}")).scalar() == 10
+    assert db_session.execute(text(f"SELECT count(*) FROM {partition_name('holds', event_id)}")).scalar() == 1
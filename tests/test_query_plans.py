@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import models
+from app.utils.expire_holds import expire_holds
+from .conftest import engine
+
+
+"""
+EXPLAIN-based check: every query the routers send must be answerable through an index
+- the SQL of a full hold/reserve/list flow is captured from the test engine
+- each SELECT/UPDATE/DELETE is re-run as EXPLAIN with enable_seqscan = off: the planner then only picks
+  a sequential scan when no index can serve the query, so a 'Seq Scan' in the plan means a missing index
+"""
+
+
+@contextmanager
+def captured_queries():
+    queries = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            queries.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield queries
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def seq_scans(db, queries) -> list:
+    connection = db.connection()
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    found = []
+    for statement, parameters in queries:
+        plan = "\n".join(row[0] for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters))
+        if "Seq Scan" in plan:
+            found.append(f"{statement}\n{plan}")
+    return found
+
+
+def test_router_queries_use_indexes(client, auth_user, db_session):
+    with captured_queries() as queries:
+        event_id = client.post("/events/", json={"name": "Plan Event", "total_seats": 20}).json()["id"]
+        seats = client.get(f"/events/{event_id}/seats/", params={"limit": 5}).json()
+        client.get(f"/events/{event_id}/seats/", params={"status": "available"})
+        client.get(f"/events/{event_id}/seats/", params={"format": "packed"})
+        client.get("/events/", params={"limit": 1})
+
+        r = client.post(f"/events/{event_id}/seats/{seats[0]['id']}/hold/", json={"seconds": 60})
+        assert r.status_code == 201, r.text
+        r = client.post(f"/events/{event_id}/holds/best-available", json={"quantity": 2})
+        assert r.status_code == 201, r.text
+        r = client.post(f"/events/{event_id}/seats/{seats[0]['id']}/reservation/")
+        assert r.status_code == 201, r.text
+        client.get(f"/events/{event_id}/reservations/")
+
+        expire_holds(db_session)
+        expire_holds(db_session, event_id=event_id)
+
+    assert queries
+    assert seq_scans(db_session, queries) == []
+
+
+def test_seat_status_is_an_enum(db_session):
+    assert models.Seat.__table__.c.status.type.enums == list(models.SEAT_STATUSES)
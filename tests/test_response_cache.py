@@ -0,0 +1,104 @@
+from app.utils.response_cache import CachedBody, ResponseCache, matches, response_cache
+from .test_batch_holds import create_event_with_seats
+from .test_sql_profiler import profile_of
+
+
+# ----- TESTS -----
+
+def test_seat_list_is_answered_from_the_event_version(client, auth_user):
+    event_id, seat_ids = create_event_with_seats(client)
+    first = client.get(f"/events/{event_id}/seats/", params={"limit": 4})
+    etag = first.headers["ETag"]
+
+    # same version: 304 without any query, and the cached bytes (with the cursor header) for a client without the tag
+    r = client.get(f"/events/{event_id}/seats/", params={"limit": 4}, headers={"If-None-Match": etag})
+    assert (r.status_code, r.content) == (304, b"")
+    assert profile_of(r)["queries"] == 0
+    r = client.get(f"/events/{event_id}/seats/", params={"limit": 4})
+    assert r.content == first.content and r.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert profile_of(r)["queries"] == 0
+
+    # other representations of the same event have their own tags
+    packed = client.get(f"/events/{event_id}/seats/", params={"format": "packed"})
+    assert packed.headers["ETag"] != etag
+
+    # a hold is a new version: the old tag gets the new seats
+    r = client.post(f"/events/{event_id}/seats/{seat_ids[0]}/hold/", json={"seconds": 60})
+    assert r.status_code == 201, r.text
+    r = client.get(f"/events/{event_id}/seats/", params={"limit": 4}, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json()[0]["status"] == "on_hold"
+
+
+def test_event_list_etag_changes_when_an_event_is_created(client):
+    client.post("/events/", json={"name": "Listed Event", "total_seats": 10})
+    etag = client.get("/events/").headers["ETag"]
+    assert client.get("/events/", headers={"If-None-Match": etag}).status_code == 304
+
+    event = client.post("/events/", json={"name": "Newer Event", "total_seats": 10}).json()
+    r = client.get("/events/", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert event["id"] in [e["id"] for e in r.json()]
+
+    r = client.get(f"/events/{event['id']}")
+    assert client.get(f"/events/{event['id']}", headers={"If-None-Match": r.headers["ETag"]}).status_code == 304
+
+
+def test_stale_versions_are_kept_only_if_the_body_is_the_same():
+    cache = ResponseCache(ttl=0) # every version is stale at once
+    body = CachedBody(b"[1]", "application/json", {})
+    version = cache.store(1, "v", cache.lookup(1, "v")[0], body)
+    assert cache.store(1, "v", version, body) == version # reloaded, same bytes: clients keep their tag
+    changed = cache.store(1, "v", version, body._replace(body=b"[2]"))
+    assert changed > version
+
+
+def test_body_built_across_a_change_is_not_cached():
+    cache = ResponseCache()
+    body = CachedBody(b"[1]", "application/json", {})
+    version = cache.store(1, "v", cache.lookup(1, "v")[0], body)
+    cache.bump(1) # a seat changed while another request was reading the old state
+    stale = cache.store(1, "v", version, body)
+    current, fresh, cached = cache.lookup(1, "v")
+    assert stale != current and cached is None
+    assert matches(f'"x", {cache.etag(current, "v")}', cache.etag(current, "v").removeprefix("W/"))
+
+
+def test_change_committed_while_a_miss_is_built_is_not_cached(monkeypatch):
+    """
+    A miss reads the database, a hold commits (bump) before the body is stored: the old body must not be served as current
+    """
+    monkeypatch.setattr("app.utils.response_cache.RESPONSE_CACHE", True)
+    cache = ResponseCache()
+    old = CachedBody(b"[available]", "application/json", {})
+    for key in (1, "events"): # an event's seats, and the catalog (bumped by create_event)
+        response, seen_version = cache.cached_response(key, "v", None)
+        assert response is None
+        cache.bump(key)
+        etag = cache.etag(cache.store(key, "v", seen_version, old), "v")
+        assert cache.cached_response(key, "v", None)[0] is None # rebuilt, not the old bytes
+        assert cache.cached_response(key, "v", etag)[0] is None # and the old tag gets no 304
+
+    # the same when the entry was dropped (clear() on a listener reconnect) while the body was built
+    response, seen_version = cache.cached_response(2, "v", None)
+    cache.clear()
+    cache.store(2, "v", seen_version, old)
+    assert cache.cached_response(2, "v", None)[0] is None
+
+
+def test_unknown_events_dont_evict_cached_ones(client, auth_user, monkeypatch):
+    """
+    GETs for event IDs that don't exist answer 404 without taking a place in the cache
+    """
+    monkeypatch.setattr(response_cache, "size", 1)
+    event_id, _ = create_event_with_seats(client)
+    etag = client.get(f"/events/{event_id}/seats/").headers["ETag"]
+
+    for unknown_id in range(10**9, 10**9 + 5):
+        assert client.get(f"/events/{unknown_id}/seats/").status_code == 404
+        assert client.get(f"/events/{unknown_id}").status_code == 404
+
+    r = client.get(f"/events/{event_id}/seats/", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert profile_of(r)["queries"] == 0
@@ -0,0 +1,74 @@
+import asyncio
+import json
+import threading
+from app.utils.seat_events import SeatEventBroker, SeatEventListener, DROPPED, ORIGIN, broker
+from app.utils.seat_index import SeatAvailabilityIndex
+from .conftest import engine
+from .test_batch_holds import create_event_with_seats
+
+
+def test_fan_out_from_another_thread():
+    local_broker = SeatEventBroker(max_queue=10)
+
+    async def scenario():
+        a = local_broker.subscribe(1)
+        b = local_broker.subscribe(1)
+        other_event = local_broker.subscribe(2)
+        thread = threading.Thread(target=local_broker.publish, args=(1, [5, 6], "on_hold"))
+        thread.start()
+        thread.join()
+        received = [await asyncio.wait_for(s.queue.get(), 1) for s in (a, b)]
+        assert other_event.queue.empty()
+        return received
+
+    assert asyncio.run(scenario()) == [{"event_id": 1, "seat_ids": [5, 6], "status": "on_hold"}] * 2
+
+
+def test_slow_subscriber_is_dropped():
+    local_broker = SeatEventBroker(max_queue=2)
+
+    async def scenario():
+        slow = local_broker.subscribe(1)
+        for seat_id in range(3):
+            local_broker.publish(1, [seat_id], "reserved")
+        await asyncio.sleep(0) # let the queued offers run
+        assert slow.queue.get_nowait() is DROPPED
+        assert local_broker._subscribers == {} # it no longer receives changes
+
+    asyncio.run(scenario())
+
+
+def test_committed_hold_reaches_subscribers(client, auth_user):
+    event_id, seat_ids = create_event_with_seats(client)
+
+    async def scenario():
+        subscriber = broker.subscribe(event_id)
+        try:
+            r = await asyncio.to_thread(client.post, f"/events/{event_id}/holds/", json={"seat_ids": seat_ids[:2]})
+            assert r.status_code == 201, r.text
+            return await asyncio.wait_for(subscriber.queue.get(), 1)
+        finally:
+            broker.unsubscribe(subscriber)
+
+    assert asyncio.run(scenario()) == {"event_id": event_id, "seat_ids": seat_ids[:2], "status": "on_hold"}
+
+
+def test_listener_applies_other_processes_changes(monkeypatch):
+    index = SeatAvailabilityIndex(ttl=60)
+    monkeypatch.setattr("app.utils.seat_events.seat_index", index)
+    applied = []
+    monkeypatch.setattr(index, "set_status", lambda event_id, seat_ids, status: applied.append((event_id, seat_ids, status)))
+
+    listener = SeatEventListener(engine)
+    listener._handle(json.dumps({"o": "other-process", "e": 7, "s": [1, 2], "t": "reserved"}))
+    listener._handle(json.dumps({"o": ORIGIN, "e": 7, "s": [3], "t": "reserved"})) # already applied locally
+    assert applied == [(7, [1, 2], "reserved")]
+
+    # malformed payloads are skipped without raising (which would drop the LISTEN connection)
+    for payload in ("not json", json.dumps({"o": "other-process", "e": 7}), json.dumps([1, 2]), "null"):
+        listener._handle(payload)
+    assert applied == [(7, [1, 2], "reserved")]
+
+
+def test_stream_unknown_event(client):
+    assert client.get("/events/999999/seats/stream").status_code == 404
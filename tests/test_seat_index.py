@@ -0,0 +1,68 @@
+from app import models
+from app.utils.seat_generation import generate_seats
+from app.utils.seat_index import EventSeatMap, SeatAvailabilityIndex, seat_index
+
+
+# Creates an event with its seats directly in the test session
+def make_event(db, total_seats=10):
+    event = models.Event(name="Index Test", total_seats=total_seats)
+    db.add(event)
+    db.flush()
+    generate_seats(db, event.id, total_seats)
+    seat_ids = [s.id for s in db.query(models.Seat).filter(models.Seat.event_id == event.id).order_by(models.Seat.number)]
+    return event, seat_ids
+
+
+def test_index_loads_statuses_and_applies_transitions(db_session):
+    index = SeatAvailabilityIndex(ttl=60)
+    event, seat_ids = make_event(db_session)
+    db_session.query(models.Seat).filter(models.Seat.id == seat_ids[1]).update({"status": "reserved"})
+
+    assert index.status(db_session, event.id, seat_ids[0]) == "available"
+    assert index.status(db_session, event.id, seat_ids[1]) == "reserved"
+    assert index.status(db_session, event.id, -1) is None # unknown seats are left to the database
+
+    index.set_status(event.id, [seat_ids[0]], "on_hold")
+    assert index.status(db_session, event.id, seat_ids[0]) == "on_hold"
+
+
+def test_reload_that_raced_with_an_update_is_discarded(db_session):
+    """
+    A transition committed while a map was being loaded must not be overwritten by the older snapshot
+    """
+    index = SeatAvailabilityIndex(ttl=60)
+    event, seat_ids = make_event(db_session)
+
+    class RacingSession:
+        def execute(self, stmt):
+            result = db_session.execute(stmt)
+            index.set_status(event.id, [seat_ids[0]], "on_hold") # committed by another request meanwhile
+            return result
+
+    index.get_map(RacingSession(), event.id)
+    assert event.id not in index._maps
+    assert index.status(db_session, event.id, seat_ids[0]) == "available" # reloaded from the database
+
+
+def test_hold_updates_index_and_rejects_taken_seat(client, auth_user):
+    event = client.post("/events/", json={"name": "Hot Event", "total_seats": 10}).json()
+    seat_id = client.get(f"/events/{event['id']}/seats/").json()[0]["id"]
+
+    r = client.post(f"/events/{event['id']}/seats/{seat_id}/hold/", json={"seconds": 60})
+    assert r.status_code == 201, r.text
+    assert seat_index._maps[event["id"]].states[0] == 2 # on_hold
+
+    r2 = client.post(f"/events/{event['id']}/seats/{seat_id}/hold/", json={"seconds": 60})
+    assert r2.status_code == 409
+
+
+def test_find_available_run():
+    # seat numbers 1..6: available, on_hold, available, available, reserved, available
+    rows = [(11, 1, "available"), (12, 2, "on_hold"), (13, 3, "available"), (14, 4, "available"), (15, 5, "reserved"), (16, 6, "available")]
+    seat_map = EventSeatMap(rows)
+    assert seat_map.find_available_run(1) == 0
+    assert seat_map.find_available_run(2) == 2
+    assert seat_map.find_available_run(1, start=3) == 3
+    assert seat_map.find_available_run(3) == -1
+    assert seat_map.find_available_run(10 ** 12) == -1 # longer than the event
+    assert [seat_map.ids[i] for i in range(2, 4)] == [13, 14]
@@ -0,0 +1,29 @@
+from app.utils.seat_map import pack_2bit, unpack_2bit, run_length, id_runs
+
+
+def test_pack_2bit_round_trip():
+    codes = [0, 1, 2, 0, 0, 2, 1]
+    assert unpack_2bit(pack_2bit(codes), len(codes)) == codes
+
+
+def test_run_length_and_id_runs():
+    assert run_length([0, 0, 0, 2, 2, 1]) == [[0, 3], [2, 2], [1, 1]]
+    assert id_runs([5, 6, 7, 10, 11]) == [[5, 3], [10, 2]]
+
+
+def test_compact_seat_map_matches_json_listing(client, auth_user):
+    """
+    The compact formats describe the same seats and statuses as the regular JSON list
+    """
+    event = client.post("/events/", json={"name": "Compact Event", "total_seats": 12}).json()
+    seats = client.get(f"/events/{event['id']}/seats/").json()
+    r = client.post(f"/events/{event['id']}/seats/{seats[2]['id']}/hold/", json={"seconds": 60})
+    assert r.status_code == 201, r.text
+
+    packed = client.get(f"/events/{event['id']}/seats/", params={"format": "packed"}).json()
+    rle = client.get(f"/events/{event['id']}/seats/", headers={"Accept": "application/vnd.reservio.seatmap+json; encoding=rle"}).json()
+
+    assert packed["count"] == 12
+    assert packed["ids"] == [[seats[0]["id"], 12]]
+    assert unpack_2bit(packed["data"], 12) == [0, 0, 1] + [0] * 9
+    assert rle["data"] == [[0, 2], [1, 1], [0, 9]]
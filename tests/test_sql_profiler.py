@@ -0,0 +1,64 @@
+import pytest
+from app.utils.sql_profiler import PROFILE_HEADER, QUERY_BUDGETS, QueryBudgetExceeded, QueryProfile, statement_shape
+from .test_batch_holds import create_event_with_seats
+from .test_optimistic_holds import login_as
+
+
+# ----- HELPERS -----
+
+def profile_of(response):
+    # X-SQL-Profile "queries=3; time_ms=1.2; repeated=0" -> {"queries": 3.0, ...}
+    return {key: float(value) for key, value in (part.split("=") for part in response.headers[PROFILE_HEADER].split("; "))}
+
+
+# ----- TESTS -----
+
+def test_statement_shape_ignores_parameters():
+    a = statement_shape("SELECT seats.id FROM seats\n  WHERE seats.id IN (1, 2, 3)")
+    b = statement_shape("SELECT seats.id FROM seats WHERE seats.id IN (__[POSTCOMPILE_id_1])")
+    assert a == b == "SELECT seats.id FROM seats WHERE seats.id IN (...)"
+
+
+def test_repeated_shapes_are_reported():
+    profile = QueryProfile()
+    profile.statements = [("SELECT holds WHERE id = %(id)s", 0.001)] * 4 + [("UPDATE seats", 0.002)]
+    assert profile.count == 5
+    assert profile.repeated(threshold=3) == [("SELECT holds WHERE id = %(id)s", 4)]
+    assert profile.repeated(threshold=5) == []
+
+
+def test_batch_hold_runs_a_fixed_number_of_statements(client, auth_user, db_session):
+    """
+    Holding 1 or 3 seats runs the same statements: no per-hold reload after the commit
+    """
+    event_id, seat_ids = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": seat_ids[:1], "seconds": 60}) # loads the seat index
+    assert r.status_code == 201, r.text
+
+    login_as(db_session, "one@example.com")
+    one = client.post(f"/events/{event_id}/holds/", json={"seat_ids": seat_ids[1:2], "seconds": 60})
+    assert one.status_code == 201, one.text
+    login_as(db_session, "three@example.com")
+    three = client.post(f"/events/{event_id}/holds/", json={"seat_ids": seat_ids[2:5], "seconds": 60})
+    assert three.status_code == 201, three.text
+
+    assert profile_of(three)["repeated"] == 0
+    assert profile_of(three)["queries"] == profile_of(one)["queries"]
+
+
+def test_batch_over_the_hold_limit_runs_no_statement(client, auth_user):
+    """
+    A batch larger than the per-user hold limit is refused before any seat is looked up or locked
+    """
+    event_id, seat_ids = create_event_with_seats(client)
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": seat_ids + list(range(-5000, 0)), "seconds": 60})
+    assert r.status_code == 409, r.text
+    assert r.json()["detail"] == "User holds limit reached for this event"
+    assert profile_of(r)["queries"] == 0
+
+
+def test_route_over_its_budget_fails_in_strict_mode(client, monkeypatch):
+    statements = QUERY_BUDGETS["POST /events/"] # the route runs exactly its budget (3 with PARTITION_BY_EVENT=1)
+    monkeypatch.setitem(QUERY_BUDGETS, "POST /events/", 1)
+    with pytest.raises(QueryBudgetExceeded, match=rf"POST /events/ ran {statements} SQL statements \(budget 1\)"):
+        client.post("/events/", json={"name": "Budget Event", "total_seats": 10})
@@ -0,0 +1,64 @@
+import time
+from app import models
+from app.deps import get_current_user
+from app.utils.security import create_access_token
+from app.utils.token_cache import TokenCache, CurrentUser, token_cache, cache_hits, cache_misses
+
+
+def test_cache_hits_until_expiry():
+    cache = TokenCache(max_size=10, ttl=60)
+    user = CurrentUser(id=1, email="a@example.com")
+    assert cache.get("t1") is None
+
+    cache.put("t1", user, expires_at=time.time() + 30)
+    assert cache.get("t1") == user
+
+    cache.put("t2", user, expires_at=time.time() - 1) # token already expired
+    assert cache.get("t2") is None
+
+
+def test_cache_is_bounded_lru():
+    cache = TokenCache(max_size=2, ttl=60)
+    for i in range(3):
+        if i == 2:
+            cache.get("t0") # t0 becomes the most recently used, so t1 is evicted
+        cache.put(f"t{i}", CurrentUser(id=i, email=f"{i}@example.com"), expires_at=time.time() + 30)
+    assert cache.get("t1") is None
+    assert cache.get("t0") is not None and cache.get("t2") is not None
+
+
+def test_invalidate_user_drops_all_their_tokens():
+    cache = TokenCache(max_size=10, ttl=60)
+    cache.put("a1", CurrentUser(id=1, email="a@example.com"), expires_at=time.time() + 30)
+    cache.put("a2", CurrentUser(id=1, email="a@example.com"), expires_at=time.time() + 30)
+    cache.put("b1", CurrentUser(id=2, email="b@example.com"), expires_at=time.time() + 30)
+    cache.invalidate_user(1)
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b1") is not None
+
+
+def test_protected_route_resolves_token_once(client, db_session):
+    """
+    The second request with the same token is served from the cache (no decode, no user query)
+    """
+    user = models.User(email="cached@example.com", hashed_password="-")
+    db_session.add(user)
+    db_session.flush()
+    token = create_access_token(data={"sub": user.email})
+    token_cache.clear()
+
+    misses = cache_misses.snapshot()
+    assert get_current_user(token, db_session) == CurrentUser(id=user.id, email=user.email)
+    hits = cache_hits.snapshot()
+    assert get_current_user(token, db_session).id == user.id
+    assert cache_hits.snapshot() == hits + 1
+    assert cache_misses.snapshot() == misses + 1
+
+    # changing the user drops its cached tokens
+    user.email = "renamed@example.com"
+    db_session.flush()
+    assert token_cache.get(token) is None
+
+    r = client.get("/metrics/auth")
+    assert r.status_code == 200
+    assert {"hits", "misses", "size"} <= set(r.json()["token_cache"])
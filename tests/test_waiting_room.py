@@ -0,0 +1,71 @@
+import pytest
+from fastapi import HTTPException
+from jose import JWTError
+from app.utils.security import create_access_token, decode_access_token
+from app.utils.waiting_room import WaitingRoom, waiting_room
+from .test_batch_holds import create_event_with_seats
+
+
+def test_burst_is_admitted_then_rate_limited():
+    room = WaitingRoom(enabled=True, rate=10, burst=3)
+    tickets = [room.issue(1, f"u{i}") for i in range(5)]
+    assert [t["admitted"] for t in tickets] == [True, True, True, False, False]
+    assert tickets[3]["eta_seconds"] == pytest.approx(0.1, abs=0.02)
+    assert tickets[4]["position"] == 2
+
+    # queues are per event
+    assert room.issue(2, "u")["admitted"]
+
+
+def test_admit_checks_ticket_event_user_and_time():
+    room = WaitingRoom(enabled=True, rate=1, burst=1)
+    first = room.issue(1, "u1")["ticket"]
+    second = room.issue(1, "u2")["ticket"]
+
+    room.admit(1, "u1", first)
+    with pytest.raises(HTTPException) as exc:
+        room.admit(1, "u2", second)
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == "1"
+
+    for event_id, user_id, ticket, code in ((1, "u1", None, 428), (2, "u1", first, 403), (1, "u2", first, 403), (1, "u1", "junk", 403)):
+        with pytest.raises(HTTPException) as exc:
+            room.admit(event_id, user_id, ticket)
+        assert exc.value.status_code == code
+
+
+def test_queueing_again_keeps_the_users_place():
+    room = WaitingRoom(enabled=True, rate=1, burst=1)
+    first = room.issue(1, "u1")
+    assert all(room.issue(1, "u1") == first for _ in range(100)) # same ticket, the schedule doesn't move
+    assert room.issue(1, "u2")["eta_seconds"] == pytest.approx(1, abs=0.05)
+
+
+def test_queue_tickets_and_access_tokens_are_not_interchangeable():
+    room = WaitingRoom(enabled=True)
+    ticket = room.issue(1, "7")["ticket"]
+    with pytest.raises(JWTError):
+        decode_access_token(ticket)
+    with pytest.raises(HTTPException) as exc:
+        room.admit(1, "7", create_access_token({"sub": "7", "evt": 1, "adm": 0}))
+    assert exc.value.status_code == 403
+
+
+def test_disabled_room_lets_everyone_in():
+    WaitingRoom(enabled=False).admit(1, "u", None)
+
+
+def test_hold_requires_admitted_ticket(client, auth_user, monkeypatch):
+    monkeypatch.setattr(waiting_room, "enabled", True)
+    event_id, seat_ids = create_event_with_seats(client)
+
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": [seat_ids[0]]})
+    assert r.status_code == 428
+
+    r = client.post(f"/events/{event_id}/queue/")
+    assert r.status_code == 201, r.text
+    ticket = r.json()["ticket"]
+    assert client.get(f"/events/{event_id}/queue/", headers={"X-Queue-Ticket": ticket}).json()["admitted"]
+
+    r = client.post(f"/events/{event_id}/holds/", json={"seat_ids": [seat_ids[0]]}, headers={"X-Queue-Ticket": ticket})
+    assert r.status_code == 201, r.text